@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Copyright: 2025 Auxsys
+
+Benchmark of the processing stages on a synthetic SOC (see synthetic.py).
+Every stage is timed separately, the results are written as JSON report and
+can be compared against a saved baseline report: the benchmark fails (exit
+code 1) if a stage got slower than the baseline by more than the tolerance.
+
+    python benchmarks/stages.py -c 5000 -o baseline.json
+    python benchmarks/stages.py -c 5000 -b baseline.json
+"""
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import generate_soc, generate_dump
+from src.graphs import ClockGraph, MemoryClockGraph
+from src.filters import FilterAccumulator, QueryFilter, MemoryVisFilter
+from src.grapher import Grapher
+from src.utils import SparseMemory
+
+REPORT_VERSION = 1
+STAGES = ["from_yaml", "from_intelhex", "memory_graph", "query_filter", "build_raw_graph", "render"]
+
+def measure(function: Callable[[], object], repeat: int) -> tuple[object, dict]:
+    """Run the function `repeat` times, its last result and the times in ms"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, { "median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3), "runs": repeat }
+
+def run_stages(soc_file: Path, dump_file: Path, query: str, repeat: int, render: str | None) -> dict[str, dict | None]:
+    """Times of every stage, each working on the result of the previous ones. Skipped stages are None"""
+    results: dict[str, dict | None] = {}
+
+    def from_yaml() -> ClockGraph:
+        with soc_file.open("r") as fp:
+            return ClockGraph.from_yaml(fp)
+    graph, results["from_yaml"] = measure(from_yaml, repeat)
+
+    def from_intelhex() -> SparseMemory:
+        with dump_file.open("r") as fp:
+            return SparseMemory.from_intelhex(fp)
+    memory, results["from_intelhex"] = measure(from_intelhex, repeat)
+
+    mem_graph, results["memory_graph"] = measure(lambda: MemoryClockGraph(graph, memory), repeat)
+
+    query_clk = graph.get_clk(query)
+    assert query_clk is not None
+    query_filter, results["query_filter"] = measure(lambda: QueryFilter(mem_graph, query_clk), repeat)
+
+    def grapher() -> Grapher:
+        filters = FilterAccumulator()
+        filters.add_filter(query_filter)
+        filters.add_filter(MemoryVisFilter(mem_graph))
+        return Grapher(graph, filters, "benchmark")
+    _, results["build_raw_graph"] = measure(lambda: grapher().build_raw_graph("benchmark"), repeat)
+
+    if render is not None and shutil.which("dot") is not None:
+        _, results["render"] = measure(lambda: grapher().render_bytes(render), repeat)
+    else:
+        results["render"] = None
+    return results
+
+def compare(report: dict, baseline: dict, tolerance: float) -> bool:
+    """Print the stages relative to the baseline, False if one is slower than the tolerance allows"""
+    if report["parameters"] != baseline.get("parameters"):
+        print("warning: the baseline was measured with different parameters", file=sys.stderr)
+
+    ok = True
+    for stage in STAGES:
+        current, base = report["stages"].get(stage), baseline.get("stages", {}).get(stage)
+        if current is None or base is None:
+            print(f"{stage:16} skipped")
+            continue
+        ratio = current["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        slower = ratio > 1 + tolerance
+        ok &= not slower
+        print(f"{stage:16} {current['median_ms']:9.1f} ms  baseline {base['median_ms']:9.1f} ms  "
+              f"{ratio:6.2f}x {'FAIL' if slower else 'ok'}")
+    return ok
+
+def main() -> int:
+    parser = ArgumentParser(description="Benchmark the processing stages on a synthetic SOC")
+    parser.add_argument("-c", "--clocks", type=int, default=2000, help="Approximate number of clocks")
+    parser.add_argument("--depth", type=int, default=8, help="Layers of muxes")
+    parser.add_argument("--fanin", type=int, default=4, help="Inputs per mux")
+    parser.add_argument("--dump-size", type=int, help="Bytes in the dump (default: all registers)")
+    parser.add_argument("--fragments", type=int, default=1, help="Separate blocks in the dump")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="Runs per stage")
+    parser.add_argument("--render", default="svg", metavar="FORMAT",
+                        help="Format of the render stage, `none` to skip it (skipped without graphviz)")
+    parser.add_argument("-o", "--output", type=Path, help="Write the report (JSON) to this file")
+    parser.add_argument("-b", "--baseline", type=Path, help="Compare against this report")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline (default: 0.25 = 25%%)")
+    parser.add_argument("--keep", type=Path, metavar="DIR", help="Keep the generated files in this directory")
+    args = parser.parse_args()
+
+    soc = generate_soc(args.clocks, args.depth, args.fanin, args.seed)
+    parameters = {
+        **soc.parameters, "dump_size": args.dump_size, "fragments": args.fragments,
+        "repeat": args.repeat, "render": None if args.render == "none" else args.render,
+    }
+
+    with tempfile.TemporaryDirectory() as td:
+        directory = args.keep or Path(td)
+        directory.mkdir(parents=True, exist_ok=True)
+        soc_file, dump_file = directory / "synthetic.yaml", directory / "synthetic.ihex"
+        soc_file.write_text(soc.yaml)
+        dump_file.write_text(generate_dump(soc, args.dump_size, args.fragments, seed=args.seed))
+
+        stages = run_stages(soc_file, dump_file, soc.query, args.repeat, parameters["render"])
+
+    report = {
+        "version": REPORT_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "clocks": soc.clocks,
+        "stages": stages,
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.baseline is not None:
+        return 0 if compare(report, json.loads(args.baseline.read_text()), args.tolerance) else 1
+
+    for stage in STAGES:
+        result = stages[stage]
+        print(f"{stage:16} " + ("skipped" if result is None else
+                                f"{result['median_ms']:9.1f} ms (min {result['min_ms']:.1f} ms)"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
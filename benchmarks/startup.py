@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Copyright: 2025 Auxsys
+
+Startup benchmark of the command line tool. Runs typical short invocations
+several times and fails (exit code 1) if the median wall time or the import
+time of the program exceeds its budget.
+"""
+from argparse import ArgumentParser
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import os
+
+ROOT = Path(__file__).parent.parent
+SOC = "NXP_LPC55S1x_DS"
+
+# budgets in milliseconds, generous enough for slow CI machines
+WALL_BUDGET_MS = {
+    "unknown-soc": 300,
+    "dot-cached": 600,
+}
+IMPORT_BUDGET_MS = 150
+# modules that must not be imported for a cached .dot run
+FORBIDDEN_MODULES = {"graphviz", "jsonschema", "yaml", "numpy"}
+
+
+def run(args: list[str], env: dict[str, str], extra: list[str] = []) -> tuple[float, str]:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *extra, str(ROOT / "clock-vis.py"), *args],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    return (time.perf_counter() - start) * 1000, proc.stderr
+
+
+def import_times(stderr: str) -> dict[str, int]:
+    """Cumulative import time (µs) per top level module from -X importtime"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name.startswith(" ") or name.startswith("  "):
+            continue  # only top level imports
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            pass
+    return times
+
+
+def main(repeat: int) -> int:
+    failed = False
+    with tempfile.TemporaryDirectory() as td:
+        env = {**os.environ, "XDG_CACHE_HOME": td}
+        out = str(Path(td) / "out.dot")
+        scenarios = {
+            "unknown-soc": ["-s", "does-not-exist", "-o", out],
+            "dot-cached": ["-s", SOC, "-o", out],
+        }
+
+        run(scenarios["dot-cached"], env)  # warm up the cache
+
+        for name, args in scenarios.items():
+            times = [run(args, env)[0] for _ in range(repeat)]
+            median = statistics.median(times)
+            ok = median <= WALL_BUDGET_MS[name]
+            failed |= not ok
+            print(f"{name:12} median {median:7.1f} ms (budget {WALL_BUDGET_MS[name]} ms) {'ok' if ok else 'FAIL'}")
+
+        _, stderr = run(scenarios["dot-cached"], env, ["-X", "importtime"])
+        times = import_times(stderr)
+        total = sum(times.values()) / 1000
+        ok = total <= IMPORT_BUDGET_MS
+        failed |= not ok
+        print(f"{'imports':12} total  {total:7.1f} ms (budget {IMPORT_BUDGET_MS} ms) {'ok' if ok else 'FAIL'}")
+        for module, us in sorted(times.items(), key=lambda item: -item[1])[:5]:
+            print(f"  {module:30} {us / 1000:7.1f} ms")
+
+        if (loaded := FORBIDDEN_MODULES & set(times)):
+            failed = True
+            print(f"FAIL: heavy modules imported for a cached .dot run: {', '.join(sorted(loaded))}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Startup time benchmark of clock-vis.py")
+    parser.add_argument("-n", "--repeat", type=int, default=10, help="Runs per scenario")
+    sys.exit(main(parser.parse_args().repeat))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Copyright: 2025 Auxsys
+
+Generator of synthetic SOC descriptions and matching Intel HEX dumps, used
+to benchmark the tool at the scale of large SOCs.
+
+The clocks are built in layers: every layer has muxes selecting from the
+previous layer and from random earlier layers (reconvergent paths), each mux
+feeds a gated clock directly or through a divider. The register fields are
+packed into 32-bit words starting at the base address, so many fields share
+a word like in real register maps.
+"""
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+from pathlib import Path
+import random
+import sys
+
+BASE_ADDRESS = 0x40000000
+
+@dataclass
+class SyntheticSoc:
+    yaml: str
+    base: int        # address of the first register word
+    size: int        # bytes of the register words
+    clocks: int      # number of generated clocks
+    query: str       # clock at the end of the deepest path
+    parameters: dict = field(default_factory=dict)
+
+class _Registers:
+    """Packs the fields into consecutive 32-bit words"""
+    def __init__(self, base: int) -> None:
+        self.base = base
+        self.words = 0
+        self._bit = 32
+
+    def field(self, width: int) -> str:
+        if self._bit + width > 32:
+            self.words += 1
+            self._bit = 0
+        low = self._bit
+        self._bit += width
+        addr = self.base + 4 * (self.words - 1)
+        bits = f"[{low}]" if width == 1 else f"[{low + width - 1}, {low}]"
+        return f"!addr32le [0x{addr:08X}, {bits}]"
+
+def generate_soc(clocks: int = 2000, depth: int = 8, fanin: int = 4, seed: int = 0,
+                 base: int = BASE_ADDRESS) -> SyntheticSoc:
+    """
+    Description with about `clocks` clocks in `depth` layers of muxes with
+    `fanin` inputs each.
+    """
+    rng = random.Random(seed)
+    regs = _Registers(base)
+    sel_width = max(1, (fanin - 1).bit_length())
+    lines = ["name: synthetic", "vendor: benchmark", "clocks:"]
+    count = 0
+
+    def add(name: str, *props: str):
+        nonlocal count
+        count += 1
+        lines.append(f"  - {name}:")
+        lines.extend(f"      {prop}" for prop in props)
+
+    sources = [f"clk_src{idx}" for idx in range(max(4, clocks // 50))]
+    for idx, name in enumerate(sources):
+        props = ["desc: synthetic source", "type: clk", f"freq: {rng.choice([32768, 1000000, 12000000, 96000000])}"]
+        if idx % 2:
+            props.append(f"is_enabled: [{{0: false, 1: true}}, {regs.field(1)}]")
+        add(name, *props)
+
+    # a unit is a mux, a clock and every second time a divider in between
+    units = max(1, (clocks - len(sources)) * 2 // (5 * depth))
+    layers = [sources]
+    for layer in range(depth):
+        outputs = []
+        for unit in range(units):
+            name = f"{layer}_{unit}"
+            previous = layers[-1]
+            candidates = [rng.choice(previous)] + [rng.choice(rng.choice(layers)) for _ in range(fanin - 1)]
+            inputs = [f"{key}: {clk}" for key, clk in enumerate(dict.fromkeys(candidates))]
+            if rng.random() < 0.1:
+                inputs.append(f"{len(inputs)}: RESERVED")
+            add(f"mux_{name}", "desc: synthetic mux", "type: mux", f"reg: {regs.field(sel_width)}",
+                "input: {" + ", ".join(inputs[:1 << sel_width]) + "}")
+
+            source = f"mux_{name}"
+            if unit % 2:
+                if rng.random() < 0.5:
+                    add(f"div_{name}", "desc: synthetic divider", "type: div", f"r_div: {regs.field(8)}",
+                        "value: !!lambda div -> div + 1", f"input: {source}")
+                else:
+                    add(f"div_{name}", "desc: synthetic fractional divider", "type: div",
+                        f"r_div: {regs.field(8)}", f"r_mult: {regs.field(8)}",
+                        "value: !!lambda div, mult -> 1 + mult / (div + 1)", f"input: {source}")
+                source = f"div_{name}"
+
+            add(f"clk_{name}", "desc: synthetic clock", "type: clk", f"input: {source}",
+                f"is_enabled: [{{0: false, 1: true}}, {regs.field(1)}]")
+            outputs.append(f"clk_{name}")
+        layers.append(outputs)
+
+    return SyntheticSoc(
+        yaml="\n".join(lines) + "\n", base=base, size=4 * regs.words, clocks=count, query=layers[-1][-1],
+        parameters={ "clocks": clocks, "depth": depth, "fanin": fanin, "seed": seed },
+    )
+
+def _record(address: int, record_type: int, data: bytes) -> str:
+    raw = bytes([len(data), (address >> 8) & 0xFF, address & 0xFF, record_type]) + data
+    return f":{(raw + bytes([-sum(raw) & 0xFF])).hex().upper()}\n"
+
+def write_intelhex(blocks: list[tuple[int, bytes]], record_size: int = 16) -> str:
+    """Intel HEX text of the (address, data) blocks"""
+    records = []
+    upper = None
+    for address, data in blocks:
+        offset = 0
+        while offset < len(data):
+            addr = address + offset
+            if addr >> 16 != upper:
+                upper = addr >> 16
+                records.append(_record(0, 4, upper.to_bytes(2, "big")))
+            # records must not cross a 64 KiB boundary
+            length = min(record_size, len(data) - offset, 0x10000 - (addr & 0xFFFF))
+            records.append(_record(addr & 0xFFFF, 0, data[offset:offset + length]))
+            offset += length
+    records.append(_record(0, 1, b""))
+    return "".join(records)
+
+def generate_dump(soc: SyntheticSoc, size: int | None = None, fragments: int = 1, gap: int = 64,
+                  record_size: int = 16, seed: int = 0) -> str:
+    """
+    Intel HEX dump of `size` random bytes (default: all registers of the
+    SOC) starting at its base address, split into `fragments` blocks with
+    `gap` bytes in between. Registers in the gaps read as the filler byte.
+    """
+    rng = random.Random(seed)
+    size = soc.size if size is None else size
+    length = -(-size // fragments)
+
+    blocks = []
+    address = soc.base
+    for _ in range(fragments):
+        data = rng.randbytes(min(length, size))
+        size -= len(data)
+        blocks.append((address, data))
+        address += len(data) + gap
+    return write_intelhex(blocks, record_size)
+
+def main() -> int:
+    parser = ArgumentParser(description="Generate a synthetic SOC description and a matching memory dump")
+    parser.add_argument("output", type=Path, help="Description to write (.yaml)")
+    parser.add_argument("-m", "--memory", type=Path, help="Intel HEX dump to write")
+    parser.add_argument("-c", "--clocks", type=int, default=2000, help="Approximate number of clocks")
+    parser.add_argument("--depth", type=int, default=8, help="Layers of muxes")
+    parser.add_argument("--fanin", type=int, default=4, help="Inputs per mux")
+    parser.add_argument("--dump-size", type=int, help="Bytes in the dump (default: all registers)")
+    parser.add_argument("--fragments", type=int, default=1, help="Separate blocks in the dump")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    soc = generate_soc(args.clocks, args.depth, args.fanin, args.seed)
+    args.output.write_text(soc.yaml)
+    if args.memory is not None:
+        args.memory.write_text(generate_dump(soc, args.dump_size, args.fragments, seed=args.seed))
+    print(f"{soc.clocks} clocks, {soc.size} bytes of registers at 0x{soc.base:08X}, query {soc.query}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Copyright: 2025 Auxsys
+
+Analyse a whole fleet of memory dumps against one SOC description in
+parallel and write an aggregate report. See src/fleet.py.
+"""
+from argparse import ArgumentParser
+from pathlib import Path
+import json
+import sys
+import time
+
+
+SOC_DIR = Path("./socs/")
+
+
+def parse():
+    parser = ArgumentParser(
+        description="Analyse many memory dumps of a SOC in parallel: distinct configurations, mux selections and disabled clocks that are required.",
+        epilog="Example: ./clock-vis-fleet.py -s NXP_LPC55S1x_DS dumps/ -o fleet.json",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--soc",
+        required=True,
+        help="Select the SOC. See ./socs/ for a list of all supported",
+    )
+
+    parser.add_argument(
+        "dumps",
+        metavar="DUMPS",
+        nargs="+",
+        help="Directories with memory dumps (all files with a known suffix) or glob patterns, e.g. 'farm/*/state.ihex'",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="FILE",
+        default=None,
+        help="Write the report (JSON) to this file instead of stdout",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes. Defaults to the number of cores",
+    )
+
+    parser.add_argument(
+        "-ba",
+        "--base-address",
+        metavar="ADDRESS",
+        type=lambda value: int(value, 0),
+        default=None,
+        help="Address of the first byte of raw binary (.bin) dumps. If omitted, it is read from the sidecar file <DUMP>.base",
+    )
+
+    parser.add_argument(
+        "-r",
+        "--require",
+        metavar="CLOCKNAME",
+        action="append",
+        default=[],
+        help="Clock that has to be enabled on every board. Can be given multiple times. Disabled clocks feeding an enabled clock are always reported",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always load the SOC description from its yaml file instead of using (and updating) the cache.",
+    )
+
+    return parser.parse_args()
+
+
+def printe(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def main(*, soc: str, dumps: list[str], output_file: str | None = None, jobs: int | None = None,
+         base_address: int | None = None, required: list[str] = [], use_cache: bool = True):
+    soc_file = SOC_DIR / f"{soc}.yaml"
+    if not soc_file.is_file():
+        printe(f"Unknown soc file ({soc_file}) was provided. Please use one of:")
+        for soc_p in SOC_DIR.glob("*.yaml"):
+            printe(f" - {soc_p.stem}")
+        sys.exit(-1)
+
+    from src.fleet import FleetAnalyzer, FleetReport, find_dumps
+
+    dump_files = find_dumps(dumps)
+    if not dump_files:
+        printe(f"No memory dumps found in {', '.join(dumps)}.")
+        sys.exit(-1)
+
+    if use_cache:
+        from src.graphs.compiledcache import load_clock_graph
+        graph = load_clock_graph(soc_file)
+    else:
+        from src.graphs import ClockGraph
+        with soc_file.open("r") as fp:
+            graph = ClockGraph.from_yaml(fp)
+
+    try:
+        analyzer = FleetAnalyzer(graph, required, base_address)
+    except KeyError as e:
+        printe(f"Required clock {e} does not exist in {soc}.")
+        sys.exit(-1)
+
+    report = FleetReport(analyzer)
+    start = time.perf_counter()
+    for result in analyzer.run(dump_files, jobs):
+        report.add(result)
+    elapsed = time.perf_counter() - start
+
+    printe(f"Analysed {report.dumps} dumps in {elapsed:.2f} s ({report.dumps / elapsed:.0f} dumps/s), "
+           f"{len(report.configurations)} configurations, {len(report.failed)} failed")
+
+    text = json.dumps(report.to_json(), indent=2) + "\n"
+    if output_file is None:
+        sys.stdout.write(text)
+    else:
+        Path(output_file).write_text(text)
+
+
+if __name__ == "__main__":
+    args = parse()
+    main(
+        soc=args.soc,
+        dumps=args.dumps,
+        output_file=args.output,
+        jobs=args.jobs,
+        base_address=args.base_address,
+        required=args.require,
+        use_cache=not args.no_cache,
+    )
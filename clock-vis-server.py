@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Copyright: 2025 Auxsys
+
+Serve the clock visualization over HTTP (TCP or unix socket), with every
+SOC description preloaded. See src/server.py for the API.
+"""
+from argparse import ArgumentParser
+from pathlib import Path
+import sys
+import os
+
+
+SOC_DIR = Path("./socs/")
+
+
+def parse():
+    parser = ArgumentParser(
+        description="Serve the clock visualization of all SOCs over HTTP.",
+        epilog="Example: curl --data-binary @state.ihex 'http://localhost:8080/render/NXP_LPC55S1x_DS?format=svg'",
+    )
+
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1)",
+    )
+
+    parser.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=8080,
+        help="Port to listen on (default: 8080)",
+    )
+
+    parser.add_argument(
+        "-u",
+        "--unix",
+        metavar="PATH",
+        default=None,
+        help="Listen on a unix socket instead of TCP",
+    )
+
+    parser.add_argument(
+        "--socs",
+        metavar="DIR",
+        type=Path,
+        default=SOC_DIR,
+        help="Directory with the SOC descriptions to load (default: ./socs/)",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always load the SOC descriptions from their yaml files and lay out the graphs instead of using (and updating) the caches.",
+    )
+
+    return parser.parse_args()
+
+
+def printe(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def main(*, host: str, port: int, unix: str | None, soc_dir: Path, use_cache: bool = True):
+    from src.server import ClockVisServer, UnixClockVisServer, load_socs
+    from src.layoutcache import LayoutCache
+
+    if use_cache:
+        from src.graphs.compiledcache import load_clock_graph
+        socs = load_socs(soc_dir, load_clock_graph, LayoutCache())
+    else:
+        socs = load_socs(soc_dir)
+
+    if not socs:
+        printe(f"No soc files found in {soc_dir}. Exiting...")
+        sys.exit(-1)
+    printe(f"Loaded {', '.join(socs)}")
+
+    if unix is not None:
+        if os.path.exists(unix):
+            os.unlink(unix)  # stale socket of a previous run
+        server = UnixClockVisServer(unix, socs)
+        printe(f"Listening on {unix}")
+    else:
+        server = ClockVisServer((host, port), socs)
+        printe(f"Listening on http://{host}:{server.server_address[1]}")
+
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+    if unix is not None:
+        os.unlink(unix)
+
+
+if __name__ == "__main__":
+    args = parse()
+    main(
+        host=args.host,
+        port=args.port,
+        unix=args.unix,
+        soc_dir=args.socs,
+        use_cache=not args.no_cache,
+    )
@@ -10,13 +10,13 @@ from textwrap import dedent
 from pathlib import Path
 from os import PathLike
 import traceback
+import time
 import sys
+import os
 
-from src.graphs import ClockGraph, MemoryClockGraph
-from src.filters import FilterAccumulator, QueryFilter, MemoryVisFilter
-from src.grapher import Grapher
-from src.utils import SparseMemory
-from src.utils.sparse_memory import ParsingError, UnknownFiletypeError
+# The modules of the individual stages are imported where they are needed,
+# so e.g. a wrong soc name fails before anything heavy is loaded. yaml and
+# jsonschema are only imported on a cache miss.
 
 
 SOC_DIR = Path("./socs/")
@@ -40,6 +40,12 @@ def parse():
 
               (gdb) dump ihex memory /tmp/state.bin 0x50000000 0x50000FFC
 
+            Raw binary dumps (.bin) and ELF core files (.elf, .core) are supported as well.
+            Raw dumps need their base address, e.g.
+
+              (gdb) dump binary memory /tmp/state.bin 0x50000000 0x50000FFC
+              $ clock-vis.py -s NXP_LPC55S1x_DS -m /tmp/state.bin -ba 0x50000000 -o out.pdf
+
             If using PyOCD, one should first disable the default behavior of (for GDB)
             unknown memory being inaccessible with
 
@@ -60,8 +66,19 @@ def parse():
     parser.add_argument(
         "-o",
         "--output",
-        help="Output file name. Suffix is used to determine file type. Use .dot for graphviz code",
-        required=True,
+        nargs="+",
+        action="extend",
+        help="Output file name(s). Suffix is used to determine file type. Use .dot for graphviz code. Multiple outputs share a single layout. When rendering multiple queries, `{clock}` is replaced by the name of the queried clock",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--stdout",
+        metavar="FORMAT",
+        nargs="?",
+        const="dot",
+        default=None,
+        help="Write the graph to stdout instead of a file, e.g. to use it in a pipeline. FORMAT is any graphviz output format (default: dot)",
     )
 
     parser.add_argument(
@@ -79,6 +96,15 @@ def parse():
         help="Memory file containing the clock registers. Parser is determined by suffix.",
     )
 
+    parser.add_argument(
+        "-ba",
+        "--base-address",
+        metavar="ADDRESS",
+        type=lambda value: int(value, 0),
+        default=None,
+        help="Address of the first byte of a raw binary (.bin) memory file. If omitted, it is read from the sidecar file <MEMORYFILE>.base",
+    )
+
     parser.add_argument(
         "-sc",
         "--only-show-config",
@@ -90,8 +116,24 @@ def parse():
         "-q",
         "--query",
         metavar="CLOCKNAME",
+        action="append",
+        default=None,
+        help="Visualize the connections made by a single clock. If a memory dump is provided, only active connections are traversed. Can be given multiple times, see --output",
+    )
+
+    parser.add_argument(
+        "-qa",
+        "--query-all-outputs",
+        action="store_true",
+        help="Query every output clock, i.e. every clock that is not connected anywhere else. See --output",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
         default=None,
-        help="Visualize the connections made by a single clock. If a memory dump is provided, only active connections are traversed",
+        help="Number of parallel render workers when rendering multiple queries or outputs. Defaults to the number of cores",
     )
 
     parser.add_argument(
@@ -101,22 +143,245 @@ def parse():
         help="Limit the graph to only show edges and nodes highlighted by the query.",
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "-a",
+        "--address",
+        metavar="ADDRESS[:BIT[-BIT]]",
+        action="append",
+        default=None,
+        help="Instead of rendering, list the clocks reading the register (bits) at the address and all clocks they feed. With a memory dump, only active connections are followed. Can be given multiple times",
+    )
+
+    parser.add_argument(
+        "-d",
+        "--diff",
+        metavar="MEMORYFILE",
+        default=None,
+        help="Compare the memory file given with --memory (e.g. a known good state) with this one. Lists the differing register fields and shows the state of this one, highlighting the differences",
+    )
+
+    parser.add_argument(
+        "-r",
+        "--replay",
+        metavar="TRACEFILE",
+        default=None,
+        help="Replay a trace of register writes (`TIMESTAMP ADDRESS VALUE [SIZE]` per line, `-` for stdin) on top of the memory file (or empty memory) and write the timeline of all clock state changes to the output (.csv or .npz, csv for --stdout) instead of rendering",
+    )
+
+    parser.add_argument(
+        "-e",
+        "--export",
+        metavar="FORMAT",
+        choices=["json", "csv"],
+        default=None,
+        help="Instead of rendering, write the resolved state of every clock of the memory file (type, enable, mux selection, active input, frequency, divider and register values) as `json` or `csv` to the output (or stdout)",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--watch",
+        metavar="SECONDS",
+        nargs="?",
+        type=float,
+        const=0.5,
+        default=None,
+        help="Keep running and render again whenever the memory file changes, checking every SECONDS (default: 0.5). Rendering is skipped if the state of the clocks did not change",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always load the SOC description from its yaml file and lay out the graph instead of using (and updating) the caches.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        nargs="?",
+        const="-",
+        default=None,
+        help="Record wall time, CPU time and peak allocation of every stage and count register reads, filter lookups and emitted edges. The report is written as JSON to FILE (default: stderr)",
+    )
+
+    parser.add_argument(
+        "--cprofile",
+        metavar="FILE",
+        default=None,
+        help="Write cProfile statistics of the whole run to FILE (e.g. for `python -m pstats` or snakeviz)",
+    )
+
+    args = parser.parse_args()
+    if args.replay is not None and args.output is not None and len(args.output) > 1:
+        parser.error("--replay writes a single timeline")
+    if args.replay is not None and (args.watch is not None or args.diff is not None):
+        parser.error("--replay can not be combined with --watch or --diff")
+    if args.export is not None and (args.memory is None or args.watch is not None or args.replay is not None):
+        parser.error("--export requires a memory file and can not be combined with --watch or --replay")
+    if args.export is not None and args.output is not None and len(args.output) > 1:
+        parser.error("--export writes a single file")
+    if args.address is None and (args.output is None) == (args.stdout is None):
+        parser.error("exactly one of -o/--output or --stdout is required")
+    if args.watch is not None and args.memory is None:
+        parser.error("--watch requires a memory file")
+    if args.diff is not None and (args.memory is None or args.watch is not None):
+        parser.error("--diff requires a memory file to compare with and can not be watched")
+    return args
 
 
 def printe(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
 
 
+def render_job(source: str, output_files: list[str]):
+    """Render in a worker process. Exceptions are flattened, as not all of them survive pickling"""
+    from src.grapher import render_outputs, RenderError
+
+    try:
+        render_outputs(source, output_files, jobs=1)
+    except Exception as e:
+        raise RenderError(f"Rendering {', '.join(output_files)} failed: {e}") from None
+
+
+def load_memory(memory_file: Path, base_address: int | None, watch: bool):
+    """Parse the memory file, exits on errors. Returns the memory and, if watching, its DumpWatcher"""
+    from src.utils import SparseMemory
+    from src.utils.sparse_memory import ParsingError, UnknownFiletypeError, MissingBaseAddressError
+    from src.utils.dumpwatcher import DumpWatcher
+
+    if not memory_file.is_file():
+        printe(
+            f"Provided memory file ({memory_file}) is not a file or does not exist."
+        )
+        sys.exit(-1)
+    try:
+        if watch:
+            watcher = DumpWatcher(memory_file, base_address=base_address)
+            return watcher.read(), watcher
+        return SparseMemory.parse_file(memory_file, base_address=base_address), None
+    except ParsingError as e:
+        printe(
+            f"Provided memory file ({memory_file}) could not be parsed due to an exception."
+        )
+        traceback.print_exception(e, file=sys.stderr)
+        sys.exit(-1)
+    except UnknownFiletypeError as e:
+        printe(
+            f"Parser not found for file ({memory_file}). Currently only supported are:"
+        )
+        for suffix, name in e.supported.items():
+            printe(f" - `{suffix}`: {name}")
+        sys.exit(-1)
+    except MissingBaseAddressError as e:
+        printe(f"{e} Please provide one using --base-address.")
+        sys.exit(-1)
+
+
+def report_changes(old_file, new_file, changes, out):
+    from src.graphs import Clock, Mux
+
+    def describe(clk, value: int) -> str:
+        match clk:
+            case Clock() if clk.is_enabled is not None:
+                state = clk.is_enabled[0].get(value)
+                return f"{value} ({'unknown' if state is None else 'enabled' if state else 'disabled'})"
+            case Mux():
+                inp = clk.inputs.get(value, clk.inputs.get("default"))
+                return f"{value} ({'-' if inp is None else inp.name})"
+            case _:
+                return f"0x{value:X}"
+
+    print(f"{len(changes)} register field(s) differ between {old_file} and {new_file}", file=out)
+    for field, old, new in changes:
+        print(f"  {field.clock.name} {field.name}: {describe(field.clock, old)} -> {describe(field.clock, new)}", file=out)
+
+
+def replay_trace(graph, memory, trace_file: str, output_file: str | None):
+    from src.tracereplay import TraceReplay, CsvTimeline, NpzTimeline, read_trace
+    from src.utils.sparse_memory import ParsingError
+
+    suffix = None if output_file is None else Path(output_file).suffix.lower()
+    if suffix not in (None, ".csv", ".npz"):
+        printe("The timeline of a replay is written as .csv or .npz. Exiting...")
+        sys.exit(-1)
+
+    out = open(output_file, "w") if suffix == ".csv" else sys.stdout
+    timeline = NpzTimeline(output_file) if suffix == ".npz" else CsvTimeline(out)
+
+    started = time.perf_counter()
+    try:
+        with (sys.stdin if trace_file == "-" else open(trace_file, "r")) as trace:
+            count = TraceReplay(graph, memory).replay(read_trace(trace), timeline)
+        # a failed replay leaves no (partial) .npz behind
+        timeline.close()
+    except OSError as e:
+        printe(f"Could not read the trace ({e}). Exiting...")
+        sys.exit(-1)
+    except ParsingError as e:
+        printe(f"Trace could not be parsed: {e}. Exiting...")
+        sys.exit(-1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    printe(f"Replayed {count} writes in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+def export_state(mem_graph, fmt: str, output_file: str | None, **info):
+    from src.stateexport import write_json, write_csv
+
+    out = sys.stdout if output_file is None else open(output_file, "w")
+    try:
+        if fmt == "json":
+            write_json(mem_graph, out.write, **info)
+        else:
+            write_csv(mem_graph, out.write)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def report_addresses(graph, addresses: list[str]):
+    from src.graphs import address_report, parse_address
+
+    parsed = []
+    for text in addresses:
+        try:
+            parsed.append((text, *parse_address(text)))
+        except ValueError:
+            printe(f"Invalid address `{text}`, expected ADDRESS[:BIT[-BIT]]. Exiting...")
+            sys.exit(-1)
+
+    for text, address, bits in parsed:
+        report = address_report(graph, address, bits)
+        print(f"{text}:")
+        if not report["fields"]:
+            print("  not read by any clock")
+            continue
+        for field in report["fields"]:
+            high, low = field["bits"]
+            print(f"  {field['clock']} ({field['type']}) {field['field']} @{field['register']}[{high}:{low}]")
+        print(f"  downstream ({len(report['downstream'])}): {', '.join(report['downstream']) or '-'}")
+
+
 def main(
     *,
     soc: str,
-    output_file: str,
+    output_file: str | list[str] | None,
     graph_title: str | None,
     memory_file: PathLike | str | None,
-    query: str | None,
+    base_address: int | None = None,
+    query: str | list[str] | None,
+    query_all_outputs: bool = False,
+    jobs: int | None = None,
     only_show_config: bool = False,
     only_show_query: bool = False,
+    use_cache: bool = True,
+    stdout_format: str | None = None,
+    watch: float | None = None,
+    addresses: list[str] | None = None,
+    diff_file: PathLike | str | None = None,
+    trace_file: str | None = None,
+    export_format: str | None = None,
 ):
 
     # verify soc
@@ -127,72 +392,263 @@ def main(
             printe(f" - {soc_p.stem}")
         sys.exit(-1)
 
-    with soc_file.open("r") as fp:
-        main_graph = ClockGraph.from_yaml(fp)
+    from src.utils.profiling import stage
+
+    with stage("load_soc"):
+        if use_cache:
+            from src.graphs.compiledcache import load_clock_graph
+            main_graph = load_clock_graph(soc_file)
+        else:
+            from src.graphs import ClockGraph
+            with soc_file.open("r") as fp:
+                main_graph = ClockGraph.from_yaml(fp)
 
     # load memory file
     mem_graph = None
+    watcher = None
     if memory_file:
-        memory_file = Path(memory_file)
-        if not memory_file.is_file():
-            printe(
-                f"Provided memory file ({memory_file}) is not a file or does not exist."
-            )
-            sys.exit(-1)
-        try:
-            memory = SparseMemory.parse_file(memory_file)
-        except ParsingError as e:
-            printe(
-                f"Provided memory file ({memory_file}) could not be parsed due to an exception."
-            )
-            traceback.print_exception(e, file=sys.stderr)
-            sys.exit(-1)
-        except UnknownFiletypeError as e:
-            printe(
-                f"Parser not found for file ({memory_file}). Currently only supported are:"
-            )
-            for suffix, name in e.supported.items():
-                printe(f" - `{suffix}`: {name}")
-            sys.exit(-1)
+        from src.graphs import MemoryClockGraph
 
-        mem_graph = MemoryClockGraph(main_graph, memory)
+        with stage("load_memory"):
+            memory, watcher = load_memory(Path(memory_file), base_address, watch is not None)
+        with stage("memory_graph"):
+            mem_graph = MemoryClockGraph(main_graph, memory)
 
-    filters = FilterAccumulator(show_hidden=not only_show_query)
+    # compare against a second dump
+    difffilter = None
+    if diff_file:
+        from src.graphs import MemoryClockGraph
+        from src.filters import DiffFilter
 
-    # lookup our query
-    if query is not None:
-        queryclk = main_graph.get_clk(query)
-        if queryclk is None:
-            printe(f"Unknown clock {query}. Exiting...")
+        if mem_graph is None:
+            printe("Comparing requires a memory file to compare with. Exiting...")
             sys.exit(-1)
 
-        if mem_graph is None:
-            qfilter = QueryFilter(main_graph, queryclk)
-        else:
-            qfilter = QueryFilter(mem_graph, queryclk)
+        with stage("load_memory"):
+            new_memory, _ = load_memory(Path(diff_file), base_address, False)
+        # the graph shows the second dump, highlighting the differences to the first one
+        with stage("memory_graph"):
+            old_graph, mem_graph = mem_graph, MemoryClockGraph(main_graph, new_memory)
+        with stage("diff"):
+            changes = old_graph.diff(mem_graph)
+        report_changes(memory_file, diff_file, changes, sys.stderr if output_file is None else sys.stdout)
 
-        filters.add_filter(qfilter)
+        difffilter = DiffFilter(old_graph, mem_graph, (field.clock for field, _, _ in changes))
 
-    if mem_graph is not None:
-        filters.add_filter(MemoryVisFilter(mem_graph))
+    if addresses:
+        with stage("addresses"):
+            report_addresses(main_graph if mem_graph is None else mem_graph, addresses)
+        return
 
-    g = Grapher(
-        mem_graph if mem_graph is not None and only_show_config else main_graph,
-        filters,
-        graph_title,
-    )
+    if export_format is not None:
+        if mem_graph is None:
+            printe("Exporting the clock state requires a memory file. Exiting...")
+            sys.exit(-1)
+        with stage("export"):
+            export_state(mem_graph, export_format,
+                         output_file if isinstance(output_file, str) or output_file is None else output_file[0],
+                         soc=main_graph.name, memory=str(diff_file or memory_file))
+        return
+
+    if trace_file is not None:
+        from src.utils import SparseMemory
+
+        with stage("replay"):
+            replay_trace(main_graph, memory if mem_graph is not None else SparseMemory(), trace_file,
+                         output_file if isinstance(output_file, str) or output_file is None else output_file[0])
+        return
+
+    from src.filters import FilterAccumulator, QueryFilter, MemoryVisFilter
+    from src.grapher import Grapher, RenderError, render_cached
+
+    queries = [] if query is None else [query] if isinstance(query, str) else list(query)
+    if query_all_outputs:
+        outputs = main_graph.get_output_clks()
+        queries += [clk.name for clk in main_graph.get_clks() if clk in outputs and clk.name not in queries]
+
+    output_files = [] if output_file is None else [output_file] if isinstance(output_file, str) else list(output_file)
+
+    # multiple queries render one set of files each
+    batch = len(queries) > 1 or any("{clock}" in out for out in output_files)
+    if batch and (not output_files or not all("{clock}" in out for out in output_files)):
+        printe("Multiple queries given, the output file names have to contain `{clock}`. Exiting...")
+        sys.exit(-1)
+
+    # lookup our queries
+    queryclks = []
+    for name in queries:
+        queryclk = main_graph.get_clk(name)
+        if queryclk is None:
+            printe(f"Unknown clock {name}. Exiting...")
+            sys.exit(-1)
+        queryclks.append(queryclk)
+
+    memfilter = MemoryVisFilter(mem_graph) if mem_graph is not None else None
+    graph = mem_graph if mem_graph is not None and only_show_config else main_graph
+
+    def build(queryclk) -> Grapher:
+        filters = FilterAccumulator(show_hidden=not only_show_query)
+
+        if queryclk is not None:
+            with stage("query"):
+                qfilter = QueryFilter(main_graph if mem_graph is None else mem_graph, queryclk)
+
+            filters.add_filter(qfilter)
+
+        if memfilter is not None:
+            filters.add_filter(memfilter)
+
+        if difffilter is not None:
+            filters.add_filter(difffilter)
+
+        title = graph_title
+        if batch and title is not None and queryclk is not None:
+            title = title.replace("{clock}", queryclk.name)
+        return Grapher(graph, filters, title)
+
+    # layouts are only needed when actually rendering
+    layout_cache = None
+    if use_cache and (any(Path(out).suffix.lower() != ".dot" for out in output_files)
+                      or stdout_format not in (None, "dot")):
+        from src.layoutcache import LayoutCache
+        layout_cache = LayoutCache()
+
+    def render():
+        if not batch:
+            grapher = build(queryclks[0] if queryclks else None)
+            if not output_files:
+                grapher.render_stdout(stdout_format or "dot", layout_cache)
+            else:
+                grapher.render_all(output_files, jobs, layout_cache)
+            return
+
+        # the graphs are shared, only the rendering is fanned out to other processes
+        renders = [
+            (build(queryclk), [out.replace("{clock}", queryclk.name) for out in output_files])
+            for queryclk in queryclks
+        ]
+
+        if layout_cache is not None:
+            # layouts and conversions run in graphviz subprocesses, threads are enough
+            render_cached(renders, layout_cache, jobs)
+        elif all(Path(out).suffix.lower() == ".dot" for _, outs in renders for out in outs) or len(renders) <= 1:
+            for grapher, outs in renders:
+                grapher.render_all(outs, jobs)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            # timed as a whole, the profiler does not follow into the workers. Their
+            # CPU time is counted once the pool has shut down
+            with stage("dot"), ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(renders))) as pool:
+                futures = [pool.submit(render_job, grapher.graph.source, outs) for grapher, outs in renders]
+                for future in futures:
+                    future.result()
+
+    try:
+        with stage("render"):
+            render()
+    except RenderError as e:
+        printe(f"{e}. Exiting...")
+        sys.exit(-1)
 
-    g.render(output_file)
+    if watcher is None:
+        return
+    assert mem_graph is not None
+    from src.utils.sparse_memory import ParsingError
+
+    # only the clocks reading changed registers are evaluated again
+    printe(f"Watching {memory_file} for changes, stop with Ctrl+C")
+    try:
+        while True:
+            time.sleep(watch or 0.5)
+            if not watcher.modified():
+                continue
+
+            started = time.perf_counter()
+            try:
+                with stage("update"):
+                    writes = watcher.diff()
+                    if writes is not None:
+                        changed = len(mem_graph.apply_writes(writes))
+                    else:
+                        new_graph = MemoryClockGraph(main_graph, watcher.read())
+                        changed = sum(
+                            state != new_state for state, new_state
+                            in zip(mem_graph.resolved_state().values(), new_graph.resolved_state().values())
+                        )
+                        mem_graph = new_graph
+                        memfilter = MemoryVisFilter(mem_graph)
+                        graph = mem_graph if only_show_config else main_graph
+            except (ParsingError, OSError) as e:
+                # most likely caught the file while it is being written, try again
+                printe(f"Could not read {memory_file} ({e}), retrying...")
+                continue
+
+            if changed == 0:
+                printe("Memory changed, but not the state of the clocks. Not rendering")
+                continue
+
+            try:
+                with stage("render"):
+                    render()
+                printe(f"{changed} clock(s) changed, updated in {(time.perf_counter() - started) * 1000:.0f} ms")
+            except RenderError as e:
+                printe(f"{e}.")
+    except KeyboardInterrupt:
+        pass
+
+
+def profiled(run, profile_file: str | None, cprofile_file: str | None):
+    """Run with the profiler and / or cProfile, the results are written even if the run exits early"""
+    import json
+    from contextlib import ExitStack
+    from src.utils.profiling import Profiler
+
+    profiler = Profiler() if profile_file is not None else None
+    cprofiler = None
+    try:
+        with ExitStack() as stack:
+            if profiler is not None:
+                stack.enter_context(profiler)
+            if cprofile_file is not None:
+                import cProfile
+                cprofiler = cProfile.Profile()
+                stack.callback(cprofiler.disable)
+                cprofiler.enable()
+            run()
+    finally:
+        if cprofiler is not None:
+            cprofiler.dump_stats(cprofile_file)
+        if profiler is not None:
+            report = json.dumps(profiler.report(), indent=2)
+            if profile_file == "-":
+                printe(report)
+            else:
+                Path(profile_file).write_text(report + "\n")
 
 
 if __name__ == "__main__":
     args = parse()
-    main(
+    run = lambda: main(
         soc=args.soc,
         output_file=args.output,
         graph_title=args.title,
         memory_file=args.memory,
+        base_address=args.base_address,
         query=args.query,
+        query_all_outputs=args.query_all_outputs,
+        jobs=args.jobs,
         only_show_config=args.only_show_config,
         only_show_query=args.only_show_query,
+        use_cache=not args.no_cache,
+        stdout_format=args.stdout,
+        watch=args.watch,
+        addresses=args.address,
+        diff_file=args.diff,
+        trace_file=args.replay,
+        export_format=args.export,
     )
+    if args.profile is None and args.cprofile is None:
+        run()
+    else:
+        profiled(run, args.profile, args.cprofile)
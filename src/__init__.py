@@ -0,0 +1,6 @@
+"""
+Copyright: 2025 Auxsys
+
+SOC clock visualizer
+"""
+__version__ = "0.1.0"
@@ -8,6 +8,7 @@ from .queryfilter import QueryFilter
 from .accumulator import FilterAccumulator
 from .abstractfilter import AbstractFilter
 from .memoryvisfilter import MemoryVisFilter
+from .difffilter import DiffFilter
 
 from .abstractfilter import Property
-from .memoryvisfilter import MemPropertyMux, MemPropertyIsEnabled, MemPropertyRegisters
+from .memoryvisfilter import MemPropertyMux, MemPropertyIsEnabled, MemPropertyRegisters, MemPropertyFrequency
@@ -11,6 +11,8 @@ from ..utils import Color
 class FilterAccumulator:
     def __init__(self, *, show_hidden: bool = True) -> None:
         self._filters: list[AbstractFilter] = []
+        # number of clock and edge lookups, see utils.profiling
+        self.lookups = 0
 
         self._color_dict = {
             State.HIDE: Color.from_hex("#0003") if show_hidden else None,
@@ -18,27 +20,26 @@ class FilterAccumulator:
             State.UNKNOWN: Color.from_hex("#00F"),
             State.SPECIAL: Color.from_hex("#F00")
         }
+        # colors of the combined states, looked up once
+        self._special, self._hide, self._show = (self._color_dict[s] for s in (State.SPECIAL, State.HIDE, State.SHOW))
 
     def add_filter(self, filter: AbstractFilter):
         self._filters.append(filter)
 
-    def lookup_clock(self, clock: ClockType) -> Color | None:
-        opinions = [filter.should_show_clock(clock) for filter in self._filters]
-
+    def _combine(self, opinions: list[State]) -> Color | None:
         if State.SPECIAL in opinions:
-            return self._color_dict[State.SPECIAL]
+            return self._special
         if State.HIDE in opinions:
-            return self._color_dict[State.HIDE]
-        return self._color_dict[State.SHOW]
+            return self._hide
+        return self._show
 
-    def lookup_edge(self, n_from: ClockType, n_to: ClockType) -> Color | None:
-        opinions = [filter.should_show_edge(n_from, n_to) for filter in self._filters]
+    def lookup_clock(self, clock: ClockType) -> Color | None:
+        self.lookups += 1
+        return self._combine([filter.should_show_clock(clock) for filter in self._filters])
 
-        if State.SPECIAL in opinions:
-            return self._color_dict[State.SPECIAL]
-        if State.HIDE in opinions:
-            return self._color_dict[State.HIDE]
-        return self._color_dict[State.SHOW]
+    def lookup_edge(self, n_from: ClockType, n_to: ClockType) -> Color | None:
+        self.lookups += 1
+        return self._combine([filter.should_show_edge(n_from, n_to) for filter in self._filters])
 
     def lookup_clock_properties(self, clock: ClockType) -> dict[type[Property], Property]:
         prop_dict = {}
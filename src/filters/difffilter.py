@@ -0,0 +1,28 @@
+"""
+Copyright: 2025 Auxsys
+
+Filter highlighting the differences between the clock configurations of
+two memory dumps: clocks with changed register fields and edges that are
+only active in one of them.
+"""
+from typing import Iterable
+
+from ..graphs import MemoryClockGraph, ClockType
+from .abstractfilter import AbstractFilter, Property, State
+
+class DiffFilter(AbstractFilter):
+    def __init__(self, old: MemoryClockGraph, new: MemoryClockGraph, changed: Iterable[ClockType]) -> None:
+        self._old = old
+        self._new = new
+        self._changed = set(changed)
+
+    def should_show_clock(self, clk: ClockType) -> State:
+        return State.SPECIAL if clk in self._changed else State.SHOW
+
+    def should_show_edge(self, n_from: ClockType, n_to: ClockType) -> State:
+        was_active = n_to in self._old.list_outputs_for_clk(n_from)
+        is_active = n_to in self._new.list_outputs_for_clk(n_from)
+        return State.SPECIAL if was_active != is_active else State.SHOW
+
+    def get_clock_properties(self, clk: ClockType) -> list[Property] | None:
+        return None
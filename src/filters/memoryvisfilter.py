@@ -22,6 +22,10 @@ class MemPropertyIsEnabled(Property):
 class MemPropertyRegisters(Property):
     registers: dict[int, tuple[int, int]]
 
+@dataclass(frozen=True)
+class MemPropertyFrequency(Property):
+    frequency: float | None  # in Hz, None if unknown
+
 
 class MemoryVisFilter(AbstractFilter):
     def __init__(self, graph: MemoryClockGraph):
@@ -46,6 +50,7 @@ class MemoryVisFilter(AbstractFilter):
                 ...
 
         props.append(MemPropertyRegisters(self._graph.get_registers(clk)))
+        props.append(MemPropertyFrequency(self._graph.get_frequencies()[clk]))
 
         return props
 
@@ -3,7 +3,9 @@ Copyright: 2025 Auxsys
 
 Clock filter using a clock name
 """
-from ..graphs import AbstractGraph, ClockType
+from typing import Callable, Iterable
+
+from ..graphs import AbstractGraph, ClockType, ClockLoopError
 from .abstractfilter import AbstractFilter, Property, State
 
 class QueryFilter(AbstractFilter):
@@ -14,38 +16,31 @@ class QueryFilter(AbstractFilter):
         self._query = query
 
         # build filtered node set
-        self._filtered_graph: set[ClockType] = set()
-
-        ## find all predecessors / inputs
-        def find_predecessors(path: list[ClockType]) -> set[ClockType]:
-            """I am aware that this is not efficient, but our graphs are small"""
-            all_inputs = {path[-1]}
-            if (inputs := graph.list_inputs_for_clk(path[-1])) is not None:
-                for inp in inputs:
-                    if inp in path:
-                        raise Exception(f"Loop found in clk graph. See node `{inp}`")
-
-                    all_inputs.update(find_predecessors([*path, inp]))
-
-            return all_inputs
+        self._filtered_graph: set[ClockType] = {self._query}
 
         if show_inputs:
-            self._filtered_graph.update(find_predecessors([self._query]))
-
-        ## find all successors / outputs
-        def find_successors(graph: AbstractGraph, path: list[ClockType]) -> set[ClockType]:
-            """I am aware that this is not efficient, but our graphs are small"""
-            all_outputs = {path[-1]}
-
-            for out in graph.list_outputs_for_clk(path[-1]):
-                if out in path:
-                    raise Exception(f"Loop found in clk graph. See node `{out}`")
-                all_outputs.update(find_successors(graph, [*path, out]))
-
-            return all_outputs
+            ## find all predecessors / inputs
+            self._filtered_graph.update(self._reachable(graph.list_inputs_for_clk))
 
         if show_outputs:
-            self._filtered_graph.update(find_successors(self._graph, [self._query]))
+            ## find all successors / outputs
+            self._filtered_graph.update(self._reachable(graph.list_outputs_for_clk))
+
+        # loops were already searched for by the graph, only check whether we hit one
+        for cycle in graph.get_cycles():
+            if not self._filtered_graph.isdisjoint(cycle):
+                raise ClockLoopError(cycle)
+
+    def _reachable(self, neighbours: Callable[[ClockType], Iterable[ClockType]]) -> set[ClockType]:
+        """All clocks reachable from the query, each visited once"""
+        visited = {self._query}
+        todo = [self._query]
+        while todo:
+            for nclk in neighbours(todo.pop()):
+                if nclk not in visited:
+                    visited.add(nclk)
+                    todo.append(nclk)
+        return visited
 
     def should_show_clock(self, clk: ClockType) -> State:
         if clk == self._query:
@@ -58,7 +53,7 @@ class QueryFilter(AbstractFilter):
 
     def should_show_edge(self, n_from: ClockType, n_to: ClockType) -> State:
         if n_from in self._filtered_graph and n_to in self._filtered_graph:
-            if n_from in self._graph.list_inputs_for_clk(n_to):
+            if self._graph.has_edge(n_from, n_to):
                 return State.SHOW
         return State.HIDE
 
@@ -0,0 +1,211 @@
+"""
+Copyright: 2025 Auxsys
+
+Analysis of many memory dumps (e.g. of every board of a test farm) against
+one description. The graph is loaded once, the dumps are parsed and evaluated
+in worker processes: with the `fork` start method the workers share the graph
+of the parent copy-on-write instead of loading or unpickling it themselves.
+Only a compact result per dump goes back to the parent, which aggregates:
+
+- the distinct configurations (resolved state of all clocks) and their boards
+- how often every mux selection occurs
+- boards with disabled clocks that are required: clocks given explicitly and
+  disabled clocks a consumer runs from (through the active connections).
+  Consumers are the gated clocks that are enabled and the ungated output
+  clocks, which always run (e.g. the clock of the CPU)
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+import glob
+import hashlib
+import os
+
+from .graphs import ClockGraph, MemoryClockGraph, ClockType, Clock, Mux
+from .graphs.memoryclockgraph import ParsedClock, ParsedMux, ParsedDiv
+from .utils import SparseMemory
+
+# suffixes of the dumps picked up from directories, see SparseMemory.parse_file
+DUMP_SUFFIXES = {".ihex", ".bin", ".elf", ".core"}
+
+@dataclass(frozen=True)
+class DumpResult:
+    name: str
+    config: str = ""                                # id of the resolved configuration
+    selections: tuple[int | None, ...] = ()         # selected input of every mux, see FleetAnalyzer.muxes
+    disabled_required: tuple[str, ...] = ()
+    error: str | None = None
+
+def find_dumps(patterns: Iterable[str | Path]) -> list[Path]:
+    """Dumps in the directories (not recursive) or matching the glob patterns, in a stable order"""
+    dumps: dict[Path, None] = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = [p for p in path.iterdir() if p.suffix.lower() in DUMP_SUFFIXES]
+        else:
+            matches = [Path(p) for p in glob.glob(str(pattern))]
+        for match in sorted(matches):
+            if match.is_file():
+                dumps[match] = None
+    return list(dumps)
+
+class FleetAnalyzer:
+    def __init__(self, graph: ClockGraph, required: Iterable[str] = (), base_address: int | None = None) -> None:
+        """`required` are the names of clocks that have to be enabled on every board"""
+        self.graph = graph
+        self.base_address = base_address
+        self.muxes = [clk for clk in graph.compact.clocks if isinstance(clk, Mux)]
+        self.consumers = [clk for clk in graph.compact.clocks if isinstance(clk, Clock)
+                          and (clk.is_enabled is not None or clk in graph.get_output_clks())]
+        self.required: list[ClockType] = []
+        for name in required:
+            clk = graph.get_clk(name)
+            if clk is None:
+                raise KeyError(name)
+            self.required.append(clk)
+
+    def analyze(self, dump: Path) -> DumpResult:
+        """Parse and evaluate a single dump, failures are reported in the result"""
+        try:
+            return self._evaluate(dump)
+        except Exception as e:
+            # a single broken dump must not abort the whole run
+            return DumpResult(str(dump), error=f"{e.__class__.__name__}: {e}")
+
+    def _evaluate(self, dump: Path) -> DumpResult:
+        memory = SparseMemory.parse_file(dump, base_address=self.base_address)
+        mem_graph = MemoryClockGraph(self.graph, memory)
+
+        state = []
+        for clk in self.graph.compact.clocks:
+            match mem_graph.get_parsed_for_clk(clk):
+                case ParsedClock(is_enabled=enabled):
+                    state.append(enabled)
+                case ParsedMux(choosen=choosen):
+                    state.append(choosen)
+                case ParsedDiv(value=value):
+                    state.append(value)
+        config = hashlib.sha1(repr(state).encode()).hexdigest()[:16]
+
+        selections = tuple(mem_graph.get_parsed_for_clk(mux).choosen for mux in self.muxes)  # type: ignore
+        return DumpResult(str(dump), config, selections, tuple(clk.name for clk in self.disabled_required(mem_graph)))
+
+    def disabled_required(self, mem_graph: MemoryClockGraph) -> list[ClockType]:
+        """Required clocks that are disabled, in the order of the description"""
+        def disabled(clk: ClockType) -> bool:
+            parsed = mem_graph.get_parsed_for_clk(clk)
+            return isinstance(parsed, ParsedClock) and not parsed.is_enabled
+
+        # first disabled clock upstream of the consumers, following the active inputs
+        upstream: dict[ClockType, ClockType | None] = {}
+        for clk in self.consumers:
+            path, cur = [], clk
+            while True:
+                if cur in upstream:
+                    found = upstream[cur]
+                    break
+                path.append(cur)
+                inputs = mem_graph.list_inputs_for_clk(cur)
+                if not inputs or inputs[0] in path:
+                    found = None
+                    break
+                if disabled(inputs[0]):
+                    found = inputs[0]
+                    break
+                cur = inputs[0]
+            for pclk in path:
+                upstream[pclk] = found
+
+        result = { clk for clk in self.required if disabled(clk) }
+        for clk in self.consumers:
+            if not disabled(clk) and (found := upstream[clk]) is not None:
+                result.add(found)
+        return [clk for clk in self.graph.compact.clocks if clk in result]
+
+    def run(self, dumps: list[Path], jobs: int | None = None) -> Iterator[DumpResult]:
+        """Results of all dumps in their order, evaluated on `jobs` processes (default: all cores)"""
+        jobs = jobs or os.cpu_count() or 1
+        if jobs <= 1 or len(dumps) <= 1:
+            yield from map(self.analyze, dumps)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        import gc
+
+        # forked workers inherit the analyzer, with other start methods it is pickled once per worker
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        # keep the garbage collector from touching (and so copying) the shared objects
+        gc.freeze()
+        try:
+            with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                                     initializer=_init_worker, initargs=(self,)) as pool:
+                chunksize = max(1, min(64, len(dumps) // (jobs * 4)))
+                yield from pool.map(_analyze, dumps, chunksize=chunksize)
+        finally:
+            gc.unfreeze()
+
+_worker: FleetAnalyzer | None = None
+
+def _init_worker(analyzer: FleetAnalyzer):
+    global _worker
+    _worker = analyzer
+
+def _analyze(dump: Path) -> DumpResult:
+    assert _worker is not None
+    return _worker.analyze(dump)
+
+@dataclass
+class FleetReport:
+    analyzer: FleetAnalyzer
+    dumps: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+    configurations: dict[str, list[str]] = field(default_factory=dict)
+    selections: list[Counter] = field(default_factory=list)
+    disabled_required: dict[str, list[str]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.selections = [Counter() for _ in self.analyzer.muxes]
+
+    def add(self, result: DumpResult):
+        self.dumps += 1
+        if result.error is not None:
+            self.failed[result.name] = result.error
+            return
+
+        self.configurations.setdefault(result.config, []).append(result.name)
+        for counter, selected in zip(self.selections, result.selections):
+            counter[selected] += 1
+        if result.disabled_required:
+            self.disabled_required[result.name] = list(result.disabled_required)
+
+    def to_json(self) -> dict:
+        def input_name(mux: Mux, key: int | None) -> str:
+            inp = mux.inputs.get(key, mux.inputs.get("default")) if key is not None else None
+            return "RESERVED" if inp is None else inp.name
+
+        selections = {}
+        for mux, counter in zip(self.analyzer.muxes, self.selections):
+            names: Counter = Counter()
+            for key, n in counter.items():
+                names[input_name(mux, key)] += n
+            selections[mux.name] = dict(names.most_common())
+
+        required: Counter = Counter(name for names in self.disabled_required.values() for name in names)
+        return {
+            "soc": self.analyzer.graph.name,
+            "dumps": self.dumps,
+            "failed": self.failed,
+            "configurations": [
+                { "id": config, "count": len(boards), "boards": boards }
+                for config, boards in sorted(self.configurations.items(), key=lambda item: -len(item[1]))
+            ],
+            "mux_selections": selections,
+            "disabled_required": {
+                "clocks": dict(required.most_common()),
+                "boards": self.disabled_required,
+            },
+        }
@@ -4,62 +4,331 @@ Copyright: 2025 Auxsys
 Using the tree and a respective highlighting node, this will
 graph the tree using graphviz.
 """
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import tempfile
-import graphviz
-
-from .filters import FilterAccumulator, MemPropertyRegisters, MemPropertyIsEnabled, MemPropertyMux
-from .graphs import AbstractGraph, Clock, ClockType, Div, Mux
+from typing import IO, TYPE_CHECKING, Callable, Iterable, Sequence
+import subprocess
+import json
+import sys
+import os
+
+from .utils.dot import DotGraph
+from .utils.profiling import stage, count
+from .filters import FilterAccumulator, MemPropertyRegisters, MemPropertyIsEnabled, MemPropertyMux, MemPropertyFrequency
+from .graphs import AbstractGraph, Clock, ClockType, Div, Mux, format_frequency
+
+if TYPE_CHECKING:
+    from .layoutcache import Layout, LayoutCache
+
+class RenderError(Exception):
+    ...
+
+# format of the positioned graph, from which every other format is converted
+LAYOUT_FORMAT = "xdot"
+
+def _run_dot(fmt: str, output: IO[bytes], write_source: Callable[[Callable[[str], object]], None],
+             command: Sequence[str] = ("dot",)):
+    """
+    Stream the DOT source into the stdin of `dot`, its stdout goes directly
+    into `output`. `write_source` is called with the function writing to dot.
+    """
+    cmd = [*command, f"-T{fmt}"]
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=output, encoding="utf-8")
+    except FileNotFoundError:
+        raise RenderError(f"Could not execute `{cmd[0]}`, make sure graphviz is installed and on the PATH")
+
+    assert proc.stdin is not None
+    try:
+        with proc.stdin:
+            write_source(proc.stdin.write)
+    except BrokenPipeError:
+        pass  # dot exited early, its return code tells why
+    with stage("dot"):
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RenderError(f"`{' '.join(cmd)}` failed with exit code {proc.returncode}")
+
+def render_bytes(source: str, fmt: str, *, positioned: bool = False) -> bytes:
+    """Render the DOT source into `fmt` in memory, see `render_source` for `positioned`"""
+    cmd = ["neato", "-n2", f"-T{fmt}"] if positioned else ["dot", f"-T{fmt}"]
+    try:
+        with stage("dot"):
+            proc = subprocess.run(cmd, input=source.encode(), capture_output=True)
+    except FileNotFoundError:
+        raise RenderError(f"Could not execute `{cmd[0]}`, make sure graphviz is installed and on the PATH")
+    if proc.returncode != 0:
+        raise RenderError(f"`{' '.join(cmd)}` failed with exit code {proc.returncode}")
+    return proc.stdout
+
+def layout_source(source: str, fmt: str = LAYOUT_FORMAT) -> str:
+    """Run the layout once, returns the graph with positions for every node and edge"""
+    return render_bytes(source, fmt).decode()
+
+def cached_layout(cache: "LayoutCache", skeleton: str) -> "Layout":
+    """Layout of the skeleton source, only running `dot` if it is not cached yet"""
+    from .layoutcache import Layout
+
+    layout = cache.get(skeleton)
+    if layout is None:
+        with stage("layout"):
+            layout = Layout.from_graphviz_json(json.loads(layout_source(skeleton, "json")))
+        cache.put(skeleton, layout)
+    return layout
+
+def render_source(source: str, filename: Path | str, *, positioned: bool = False):
+    """
+    Write DOT source to the file, rendering it if the suffix is not `.dot`.
+    If the source is `positioned` (see `layout_source`), the layout is kept
+    and only converted into the format of the file.
+    Module level function, so it can be run in worker processes.
+    """
+    filename = Path(filename).expanduser()
+    command = ("neato", "-n2") if positioned else ("dot",)
+
+    try:
+        match filename.suffix.lower():
+            case ".dot":
+                filename.write_text(source)
+            case suffix:
+                with filename.open("wb") as fp:
+                    _run_dot(suffix[1:], fp, lambda write: write(source), command)
+    except Exception:
+        filename.unlink(missing_ok=True)
+        raise
+
+def render_outputs(source: str, filenames: Iterable[Path | str], jobs: int | None = None):
+    """
+    Write DOT source to every file. If multiple files have to be rendered,
+    the layout is computed once and the conversion into the individual
+    formats runs concurrently on up to `jobs` workers.
+    """
+    filenames = [Path(f).expanduser() for f in filenames]
+    rendered = [f for f in filenames if f.suffix.lower() != ".dot"]
+
+    for filename in filenames:
+        if filename not in rendered:
+            render_source(source, filename)
+
+    if len(rendered) <= 1:
+        for filename in rendered:
+            render_source(source, filename)
+        return
+
+    layout = layout_source(source)
+    # the profiler does not follow into the workers, the conversions are timed as a whole
+    with stage("dot"), ThreadPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(rendered))) as pool:
+        futures = [pool.submit(render_source, layout, f, positioned=True) for f in rendered]
+        for future in futures:
+            future.result()
+
+def render_cached(renders: Sequence[tuple["Grapher", Sequence[Path | str]]], cache: "LayoutCache",
+                  jobs: int | None = None):
+    """
+    Render every grapher into its files, using the cached layouts. Missing
+    layouts are computed and all formats are converted concurrently on up
+    to `jobs` workers.
+    """
+    rendered = []
+    for grapher, filenames in renders:
+        filenames = [Path(f).expanduser() for f in filenames]
+        for filename in filenames:
+            if filename.suffix.lower() == ".dot":
+                grapher.render(filename)
+        if targets := [f for f in filenames if f.suffix.lower() != ".dot"]:
+            rendered.append((grapher, grapher.skeleton_source(), targets))
+
+    if not rendered:
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        # graphers with the same topology share the layout. The profiler does not
+        # follow into the workers, so the stages are timed around them
+        unique = list(dict.fromkeys(skeleton for _, skeleton, _ in rendered))
+        with stage("layout"):
+            layouts = dict(zip(unique, pool.map(lambda skeleton: cached_layout(cache, skeleton), unique)))
+
+        with stage("dot"):
+            futures = []
+            for grapher, skeleton, targets in rendered:
+                positioned = grapher.positioned_source(layouts[skeleton])
+                futures += [pool.submit(render_source, positioned, f, positioned=True) for f in targets]
+
+            for future in futures:
+                future.result()
 
 class Grapher():
     def __init__(self, clocks: AbstractGraph, filters: FilterAccumulator, title: str | None = None) -> None:
         self.clocks = clocks
         self.filters = filters
+        self.title = title
+
+        self._graph: DotGraph | None = None
 
-        self.build_raw_graph(title)
+        # set while building the unstyled or positioned variants of the graph
+        self._skeleton = False
+        self._layout: "Layout | None" = None
+
+    @property
+    def graph(self) -> DotGraph:
+        """The complete graph, built in memory on first access"""
+        if self._graph is None:
+            self._graph = self.build_raw_graph(self.title)
+        return self._graph
+
+    def write(self, write: Callable[[str], object]):
+        """Stream the DOT source statement by statement into `write`"""
+        if self._graph is not None:
+            for line in self._graph.lines():
+                write(line)
+        else:
+            self.build_raw_graph(self.title, sink=write)
 
     def render(self, filename: Path | str):
+        """
+        Render into the file, the format is given by its suffix. The source
+        is streamed into the file (.dot) or the stdin of `dot` without being
+        built in memory first.
+        """
         filename = Path(filename).expanduser()
 
-        match filename.suffix.lower():
-            case ".dot":
-                filename.write_text(self.graph.source)
-            case _:
-                with tempfile.TemporaryDirectory() as td:
-                    self.graph.render(
-                        filename=Path(td) / "tmp.gv",
-                        directory=Path(td),
-                        outfile=filename)
-
-    def add_edge(self, graph: graphviz.Digraph, clk_from: ClockType, clk_to: ClockType):
-        if self.filters.lookup_edge(clk_from, clk_to) is None:
-            return
+        try:
+            match filename.suffix.lower():
+                case ".dot":
+                    with filename.open("w") as fp:
+                        self.write(fp.write)
+                case suffix:
+                    with filename.open("wb") as fp:
+                        _run_dot(suffix[1:], fp, self.write)
+        except Exception:
+            filename.unlink(missing_ok=True)
+            raise
+
+    def render_all(self, filenames: Sequence[Path | str], jobs: int | None = None,
+                   layout_cache: "LayoutCache | None" = None):
+        """
+        Render into every file, the layout is shared between all of them (see
+        `render_outputs`) or taken from the `layout_cache`.
+        """
+        if layout_cache is not None:
+            render_cached([(self, filenames)], layout_cache, jobs)
+        elif sum(Path(f).suffix.lower() != ".dot" for f in filenames) <= 1:
+            for filename in filenames:
+                self.render(filename)
+        else:
+            render_outputs(self.graph.source, filenames, jobs)
+
+    def render_stdout(self, fmt: str = "dot", layout_cache: "LayoutCache | None" = None):
+        """Write the graph to stdout, rendered to `fmt` unless it is `dot`"""
+        if fmt == "dot":
+            self.write(sys.stdout.write)
+            sys.stdout.flush()
+        elif layout_cache is not None:
+            positioned = self.positioned_source(cached_layout(layout_cache, self.skeleton_source()))
+            sys.stdout.flush()
+            _run_dot(fmt, sys.stdout.buffer, lambda write: write(positioned), ("neato", "-n2"))
+        else:
+            sys.stdout.flush()
+            _run_dot(fmt, sys.stdout.buffer, self.write)
+
+    def render_bytes(self, fmt: str = "dot", layout_cache: "LayoutCache | None" = None) -> bytes:
+        """The graph rendered to `fmt` (or its source for `dot`) in memory"""
+        if fmt == "dot":
+            return self.graph.source.encode()
+        if layout_cache is not None:
+            positioned = self.positioned_source(cached_layout(layout_cache, self.skeleton_source()))
+            return render_bytes(positioned, fmt, positioned=True)
+        return render_bytes(self.graph.source, fmt)
+
+    def build_json(self) -> dict:
+        """The shown clocks and edges with their colours and memory state"""
+        clocks = []
+        for clk in self.clocks.get_clks():
+            if (color := self.filters.lookup_clock(clk)) is None:
+                continue
 
-        from_s = clk_from.name
-        if isinstance(clk_from, Mux):
-            from_s += ":out"
+            entry = { "name": clk.name, "type": clk.__class__.__name__.lower(), "color": str(color) }
+            props = self.filters.lookup_clock_properties(clk)
+            if isinstance(item := props.get(MemPropertyIsEnabled), MemPropertyIsEnabled):
+                entry["enabled"] = item.is_enabled
+            if isinstance(item := props.get(MemPropertyMux), MemPropertyMux):
+                entry["selected"] = item.selected
+            if isinstance(item := props.get(MemPropertyFrequency), MemPropertyFrequency):
+                entry["frequency"] = item.frequency
+            if isinstance(item := props.get(MemPropertyRegisters), MemPropertyRegisters):
+                entry["registers"] = { f"0x{addr:X}": reg for addr, (reg, _) in item.registers.items() }
+            clocks.append(entry)
+
+        edges = []
+        for clk in self.clocks.get_clks():
+            for inp in self.clocks.list_inputs_for_clk(clk):
+                if (color := self.filters.lookup_edge(inp, clk)) is not None:
+                    edges.append({ "from": inp.name, "to": clk.name, "color": str(color) })
+
+        return { "title": self.title, "clocks": clocks, "edges": edges }
+
+    def skeleton_source(self) -> str:
+        """
+        Source of the graph without any state: no colours or styles and
+        placeholders instead of register values. It determines the layout.
+        """
+        self._skeleton = True
+        try:
+            return self.build_raw_graph(self.title).source
+        finally:
+            self._skeleton = False
+
+    def positioned_source(self, layout: "Layout") -> str:
+        """Source of the graph with the geometry of `layout`, to be rendered with `neato -n2`"""
+        self._layout = layout
+        try:
+            return self.build_raw_graph(self.title).source
+        finally:
+            self._layout = None
+
+    def _style(self, **attrs: str | None) -> dict[str, str | None]:
+        return {} if self._skeleton else attrs
+
+    def _node_geometry(self, name: str) -> dict[str, str]:
+        return {} if self._layout is None else self._layout.node(name)
+
+    def add_edge(self, graph: DotGraph, clk_from: ClockType, clk_to: ClockType) -> bool:
+        if self.filters.lookup_edge(clk_from, clk_to) is None:
+            return False
 
-        to_s = clk_to.name
-        if isinstance(clk_to, Mux):
-            to_s += f":{clk_from.name}"
+        tailport = "out:e" if isinstance(clk_from, Mux) else "e"
+        headport = f"{clk_from.name}:w" if isinstance(clk_to, Mux) else "w"
+        geometry = {} if self._layout is None else self._layout.edge(clk_from.name, tailport, clk_to.name, headport)
 
-        graph.edge(from_s + ":e", to_s + ":w", color=str(self.filters.lookup_edge(clk_from, clk_to)))
+        graph.edge(f"{clk_from.name}:{tailport}", f"{clk_to.name}:{headport}",
+                   **self._style(color=str(self.filters.lookup_edge(clk_from, clk_to))), **geometry)
+        return True
 
     def build_label(self, clk: ClockType) -> str:
         label = clk.name
+        props = self.filters.lookup_clock_properties(clk)
 
-        if (item := self.filters.lookup_clock_properties(clk).get(MemPropertyRegisters)) is not None:
+        if (item := props.get(MemPropertyFrequency)) is not None:
+            assert isinstance(item, MemPropertyFrequency)
+            # the placeholder is as wide as the usual frequencies
+            label += f'<BR/><FONT POINT-SIZE="10">{"000.000 MHz" if self._skeleton else format_frequency(item.frequency)}</FONT>'
+
+        if (item := props.get(MemPropertyRegisters)) is not None:
             assert isinstance(item, MemPropertyRegisters)
 
             if len(item.registers.items()) > 0:
                 label += '<BR/><FONT FACE="MonoSpace" POINT-SIZE="10">'
                 for addr, (reg, width) in item.registers.items():
-                    label += f"@{addr:X} = 0x{reg:0{width//8}X}<BR/>"
+                    if self._skeleton:
+                        # as wide as the largest value, so the layout fits all of them
+                        label += f"@{addr:X} = 0x{'0' * (width // 4)}<BR/>"
+                    else:
+                        label += f"@{addr:X} = 0x{reg:0{width//8}X}<BR/>"
                 label += "</FONT>"
 
         return f"<{label}>"
 
-    def build_mux(self, graph: graphviz.Digraph, clk: Mux):
+    def build_mux(self, graph: DotGraph, clk: Mux):
         _inputs = []
         _default = None
 
@@ -67,6 +336,8 @@ class Grapher():
         if (item := self.filters.lookup_clock_properties(clk).get(MemPropertyMux)) is not None:
             assert isinstance(item, MemPropertyMux)
             selected = item.selected
+        if self._skeleton:
+            selected = None
 
         for k, sclk in clk.inputs.items():
             if not sclk:
@@ -79,7 +350,7 @@ class Grapher():
         if _default:
             _inputs.append((_default.name, "default"))
 
-        if not any(selected == key for _, key in _inputs):
+        if not self._skeleton and not any(selected == key for _, key in _inputs):
             selected = "default"
 
         struct = '<table border="0" cellborder="1" cellspacing="0">\n'
@@ -94,32 +365,49 @@ class Grapher():
 
         struct += '</table>'
 
-        g = graphviz.Digraph(
-                name=f"cluster_{clk.name}",
-                graph_attr={"labelloc": "b", "color": "none", "label": self.build_label(clk), "fontsize": "14"}
+        cluster = f"cluster_{clk.name}"
+        g = DotGraph(
+                name=cluster,
+                graph_attr={
+                    "labelloc": "b", "color": "none", "label": self.build_label(clk), "fontsize": "14",
+                    **({} if self._layout is None else self._layout.cluster(cluster)),
+                }
         )
-        g.node(clk.name, f"<{struct}>", color=str(self.filters.lookup_clock(clk)), shape="none")
+        g.node(clk.name, f"<{struct}>", **self._style(color=str(self.filters.lookup_clock(clk))), shape="none",
+               **self._node_geometry(clk.name))
         graph.subgraph(g)
 
-    def build_clock(self, graph: graphviz.Digraph, clk: Clock):
+    def build_clock(self, graph: DotGraph, clk: Clock):
         border = "solid"
         if (item := self.filters.lookup_clock_properties(clk).get(MemPropertyIsEnabled)) is not None:
             assert isinstance(item, MemPropertyIsEnabled)
             border = border if item.is_enabled else "dashed"
 
-        graph.node(clk.name, self.build_label(clk), style=border, color=str(self.filters.lookup_clock(clk)))
+        graph.node(clk.name, self.build_label(clk), **self._style(style=border, color=str(self.filters.lookup_clock(clk))),
+                   **self._node_geometry(clk.name))
+
+    def build_div(self, graph: DotGraph, clk: Div):
+        graph.node(clk.name, self.build_label(clk), **self._style(color=str(self.filters.lookup_clock(clk))),
+                   **self._node_geometry(clk.name))
 
-    def build_div(self, graph: graphviz.Digraph, clk: Div):
-        graph.node(clk.name, self.build_label(clk), color=str(self.filters.lookup_clock(clk)))
+    def build_raw_graph(self, title: str | None, sink: Callable[[str], object] | None = None) -> DotGraph:
+        lookups = self.filters.lookups
+        with stage("dot_source"):
+            graph, edges = self._build_raw_graph(title, sink)
+        count("filter_lookups", self.filters.lookups - lookups)
+        count("edges_emitted", edges)
+        return graph
 
-    def build_raw_graph(self, title: str | None):
-        graph = graphviz.Digraph(
+    def _build_raw_graph(self, title: str | None, sink: Callable[[str], object] | None) -> tuple[DotGraph, int]:
+        graph = DotGraph(
             node_attr={"fontname": "Sans-Serif", "shape": "record"},
             graph_attr={
                 "fontname": "Sans-Serif", "splines": "polyline",
                 "ranksep":"3", "rankdir": "LR", "newrank": "true",
                 "labelloc": "t", "labeljust": "l", "fontsize": "40", "label": title,
-            }
+                **({} if self._layout is None else self._layout.graph),
+            },
+            sink=sink,
         )
 
         # add nodes
@@ -138,22 +426,19 @@ class Grapher():
                     raise NotImplementedError(f"Missing type {clk.__class__}")
 
         # add edges
+        edges = 0
         for clk in self.clocks.get_clks():
             for inp in self.clocks.list_inputs_for_clk(clk):
-                self.add_edge(graph, inp, clk)
-
-        # find start / endpoints
-        with graph.subgraph() as s:
-            s.attr(rank="same")
-            for n in self.clocks.get_input_clks():
-                if self.filters.lookup_clock(n) is not None:
-                    s.node(n.name)
-
-        with graph.subgraph() as s:
-            s.attr(rank="same")
-            for n in self.clocks.get_output_clks():
-                if self.filters.lookup_clock(n) is not None:
-                    s.node(n.name)
-
-        self.graph = graph
+                edges += self.add_edge(graph, inp, clk)
+
+        # find start / endpoints, in a stable order so equal graphs result in equal sources
+        for ends in (self.clocks.get_input_clks(), self.clocks.get_output_clks()):
+            with graph.subgraph() as s:
+                s.attr(rank="same")
+                for n in self.clocks.get_clks():
+                    if n in ends and self.filters.lookup_clock(n) is not None:
+                        s.node(n.name)
+
+        graph.close()
+        return graph, edges
 
@@ -6,3 +6,7 @@ Module that contains clock graphs in various forms
 from .clockgraph import *
 from .elements import *
 from .memoryclockgraph import MemoryClockGraph
+from .cycles import ClockLoopError
+from .registers import RegisterField, RegisterIndex, address_report, parse_address
+from .frequencies import FrequencyEngine, format_frequency
+# .snapshotdecoder is intentionally not imported here as it depends on numpy
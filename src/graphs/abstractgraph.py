@@ -4,9 +4,10 @@ Copyright: 2025 Auxsys
 Abstract class representing a graph
 """
 from abc import ABC, abstractmethod
-from typing import Iterator
+from typing import Iterable, Iterator
 
 from .elements import ClockType
+from .registers import RegisterIndex
 
 class AbstractGraph(ABC):
 
@@ -35,3 +36,28 @@ class AbstractGraph(ABC):
     @abstractmethod
     def list_inputs_for_clk(self, clk: ClockType) -> list[ClockType]:
         ...
+
+    @abstractmethod
+    def get_register_index(self) -> RegisterIndex:
+        """Reverse index from register addresses to the fields / clocks reading them"""
+        ...
+
+    @abstractmethod
+    def get_cycles(self) -> list[list[ClockType]]:
+        """Loops in the graph, each as list of clocks. Determined once on construction"""
+        ...
+
+    def has_edge(self, n_from: ClockType, n_to: ClockType) -> bool:
+        """`n_from` is one of the inputs of `n_to`"""
+        return n_from in self.list_inputs_for_clk(n_to)
+
+    def list_downstream(self, clks: Iterable[ClockType]) -> set[ClockType]:
+        """All clocks fed by any of the clocks (excluding them, unless fed by another one)"""
+        downstream: set[ClockType] = set()
+        todo = list(clks)
+        while todo:
+            for nclk in self.list_outputs_for_clk(todo.pop()):
+                if nclk not in downstream:
+                    downstream.add(nclk)
+                    todo.append(nclk)
+        return downstream
@@ -6,15 +6,17 @@ Clock graph description structure and respective parser
 from typing import TextIO, Iterator
 from pathlib import Path
 import json
-import jsonschema
-
-import yaml
-# we don't need the speed from the c parser
-from yaml import Loader
 
 from .elements import ClockType, Clock, Mux, Pll, Div
 from .yamlobjects import AddrObject, LambdaObject
 from .abstractgraph import AbstractGraph
+from .cycles import find_cycles_compact
+from .compact import CompactGraph
+from .registers import RegisterIndex, RegisterReadPlan, list_register_fields
+from .frequencies import FrequencyEngine
+from ..utils.profiling import stage
+
+SCHEMA_FILE = Path(__file__).parent / "../../socs/soc.schema.json"
 
 class ClockGraph(AbstractGraph):
     def __init__(self, name, vendor, clocks) -> None:
@@ -22,6 +24,31 @@ class ClockGraph(AbstractGraph):
         self.vendor = vendor
         self.clocks = clocks
 
+        self._build_index()
+
+    def _build_index(self):
+        """Ids and adjacency of all clocks. Built once, the graph is not altered afterwards"""
+        self.compact = CompactGraph(self.clocks.values())
+
+        self._input_clks: set[ClockType] = {
+            clk for clk in self.clocks.values() if isinstance(clk, Clock) and clk.input is None
+        }
+        self._output_clks: set[ClockType] = {
+            clk for clk in self.clocks.values()
+            if isinstance(clk, Clock) and len(self.compact.outputs(clk.index)) == 0
+        }
+
+        self._cycles = find_cycles_compact(self.compact)
+
+        fields = list_register_fields(self.compact.clocks)
+        self.read_plan = RegisterReadPlan(fields)
+        self._registers = RegisterIndex(fields)
+        self._frequency_engine: FrequencyEngine | None = None
+
+    def __getstate__(self) -> dict:
+        # the index is pickled along, so loading a cached graph does not rebuild it
+        return { **self.__dict__, "_frequency_engine": None }
+
     def get_clk(self, name: str) -> ClockType | None:
         return self.clocks.get(name)
 
@@ -30,29 +57,45 @@ class ClockGraph(AbstractGraph):
 
     def get_input_clks(self) -> set[ClockType]:
         """These are clocks that don't have an input themselves"""
-        return { clk for clk in self.get_clks() if isinstance(clk, Clock) and clk.input is None }
+        return self._input_clks
 
     def get_output_clks(self) -> set[ClockType]:
         """These are clocks that are not connected anywhere else"""
-        clocks: set[ClockType] = { clk for clk in self.get_clks() if isinstance(clk, Clock) }
-        is_used: set[ClockType] = set()
-        for clk in self.clocks.values():
-            if clk.list_inputs() is not None:
-                is_used.update(clk.list_inputs())
+        return self._output_clks
 
-        return clocks - is_used
+    def get_cycles(self) -> list[list[ClockType]]:
+        return self._cycles
 
     def list_outputs_for_clk(self, clk: ClockType) -> set[ClockType]:
-        outputs: set[ClockType] = set()
-
-        for oclk in self.clocks.values():
-            if (l := oclk.list_inputs()) is not None and clk in l:
-                outputs.add(oclk)
-
-        return outputs
+        if not self.compact.contains(clk):
+            return set()
+        clocks = self.compact.clocks
+        return { clocks[idx] for idx in self.compact.outputs(clk.index) }
 
     def list_inputs_for_clk(self, clk: ClockType) -> list[ClockType]:
-        return [] if (d := clk.list_inputs()) is None else d
+        if not self.compact.contains(clk):
+            return [] if (d := clk.list_inputs()) is None else d
+        clocks = self.compact.clocks
+        return [clocks[idx] for idx in self.compact.inputs(clk.index)]
+
+    def has_edge(self, n_from: ClockType, n_to: ClockType) -> bool:
+        if not (self.compact.contains(n_from) and self.compact.contains(n_to)):
+            return super().has_edge(n_from, n_to)
+        return n_from.index in self.compact.inputs(n_to.index)
+
+    def get_register_index(self) -> RegisterIndex:
+        """Reverse index from register addresses to the fields / clocks reading them"""
+        return self._registers
+
+    def list_clks_reading(self, start: int, stop: int) -> set[ClockType]:
+        """Clocks reading a register word overlapping the addresses [start, stop)"""
+        return self._registers.clks_reading(start, stop)
+
+    def get_frequency_engine(self) -> FrequencyEngine:
+        """Frequency propagation compiled for this graph, built on first use"""
+        if self._frequency_engine is None:
+            self._frequency_engine = FrequencyEngine(self, read_plan=self.read_plan)
+        return self._frequency_engine
 
     ################
     # Data Parsing #
@@ -72,25 +115,29 @@ class ClockGraph(AbstractGraph):
             else:
                 return obj
 
+        import jsonschema  # slow to import and only needed here
+
         json_valid_data = sanitize_data(data)
         jsonschema.validate(instance=json_valid_data, schema=schema)
 
 
     @classmethod
-    def from_yaml(cls, soc_file: TextIO, schema_file: str | Path | None = Path(__file__).parent / "../../socs/soc.schema.json"):
-        soc_data = soc_file.read()
-
-        def tag_add_constructor(loader: Loader, node):
-            value: list[int] = loader.construct_sequence(node)
-            return sum(value)
+    def from_yaml(cls, soc_file: TextIO, schema_file: str | Path | None = SCHEMA_FILE,
+                  *, loader: type | None = None):
+        # yaml and jsonschema are imported lazily, they are not needed when
+        # the graph is loaded from the compiled cache
+        import yaml
+        from .yamlloader import SocLoader
 
-        yaml.add_constructor("!add", tag_add_constructor, Loader=Loader)
-        soc_data = yaml.load(soc_data, Loader=Loader)
+        with stage("yaml"):
+            soc_data = yaml.load(soc_file, Loader=SocLoader if loader is None else loader)
 
         # validate the data (if schema is available)
         if schema_file is not None:
+            import jsonschema
+
             schema_file = Path(schema_file)
-            with schema_file.open("r") as fp:
+            with schema_file.open("r") as fp, stage("schema_validation"):
                 try:
                     cls.validate_data(json.load(fp), soc_data)
                 except jsonschema.ValidationError as e:
@@ -111,7 +158,8 @@ class ClockGraph(AbstractGraph):
                 item = mcls(
                     name=name, description=data["desc"],
                     is_enabled=is_enabled,
-                    input=data.get("input", None)
+                    input=data.get("input", None),
+                    frequency=data.get("freq", None)
                 )
             elif data["type"] == "mux":
                 item = Mux(
@@ -121,9 +169,12 @@ class ClockGraph(AbstractGraph):
                 )
             elif data["type"] == "div":
                 registers = {
-                     key.lstrip("r_"):value for key, value in data.items()
+                     key[2:]:value for key, value in data.items()
                      if isinstance(key, str) and key.startswith("r_")
                 }
+                if set(data["value"].args) != set(registers):
+                    raise ValueError(f"The arguments of `{data['value'].original}` ({name}) do not match its registers "
+                                     f"({', '.join(registers)})")
 
                 item = Div(
                     name=name, description=data["desc"],
@@ -145,4 +196,5 @@ class ClockGraph(AbstractGraph):
             else:
                 raise NotImplementedError(f"Missing type {clock.__class__}")
 
-        return cls(soc_data["name"], soc_data["vendor"], clocks)
+        with stage("build_graph"):
+            return cls(soc_data["name"], soc_data["vendor"], clocks)
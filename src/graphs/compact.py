@@ -0,0 +1,63 @@
+"""
+Copyright: 2025 Auxsys
+
+Compact representation of the clock graph. Every clock gets a dense integer
+id (stored in `ClockType.index`), the edges are kept in CSR form: the inputs
+of clock `i` are `in_idx[in_ptr[i]:in_ptr[i + 1]]`, same for the outputs.
+Graphs keep their per-clock state in flat arrays indexed by these ids.
+"""
+from array import array
+from typing import Iterable
+
+from .elements import ClockType
+
+# id of a missing clock (e.g. no active input)
+NO_CLOCK = -1
+
+class CompactGraph:
+    __slots__ = ("clocks", "in_ptr", "in_idx", "out_ptr", "out_idx")
+
+    def __init__(self, clocks: Iterable[ClockType]) -> None:
+        """Assigns the ids in order, clocks only referenced as input are appended"""
+        self.clocks: list[ClockType] = list(clocks)
+        for idx, clk in enumerate(self.clocks):
+            clk.index = idx
+
+        in_ptr, in_idx = [0], []
+        clks = self.clocks
+        for clk in clks:  # includes the appended ones
+            for inp in clk.list_inputs() or ():
+                pos = inp.index
+                if not (0 <= pos < len(clks) and clks[pos] is inp):
+                    pos = inp.index = len(clks)
+                    clks.append(inp)
+                in_idx.append(pos)
+            in_ptr.append(len(in_idx))
+
+        # reverse edges, each output once
+        outputs: list[list[int]] = [[] for _ in clks]
+        for dst in range(len(clks)):
+            for src in in_idx[in_ptr[dst]:in_ptr[dst + 1]]:
+                if not outputs[src] or outputs[src][-1] != dst:
+                    outputs[src].append(dst)
+        out_ptr, out_idx = [0], []
+        for outs in outputs:
+            out_idx += outs
+            out_ptr.append(len(out_idx))
+
+        self.in_ptr, self.in_idx = array("i", in_ptr), array("i", in_idx)
+        self.out_ptr, self.out_idx = array("i", out_ptr), array("i", out_idx)
+
+    def __len__(self) -> int:
+        return len(self.clocks)
+
+    def contains(self, clk: ClockType) -> bool:
+        """The clock is part of this graph (and its index valid)"""
+        idx = clk.index
+        return 0 <= idx < len(self.clocks) and self.clocks[idx] is clk
+
+    def inputs(self, idx: int) -> array:
+        return self.in_idx[self.in_ptr[idx]:self.in_ptr[idx + 1]]
+
+    def outputs(self, idx: int) -> array:
+        return self.out_idx[self.out_ptr[idx]:self.out_ptr[idx + 1]]
@@ -0,0 +1,95 @@
+"""
+Copyright: 2025 Auxsys
+
+On-disk cache of compiled (parsed, validated and cross-referenced) clock
+graphs. Loading a cached graph neither parses yaml nor validates the schema.
+Entries are keyed by a hash over the description, the schema and the tool
+version, so they invalidate as soon as any of these change. A new entry only
+replaces the entries of older revisions of the same description file, loaded
+with the same schema and tool version.
+"""
+from pathlib import Path
+import glob
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+
+from .. import __version__
+from .clockgraph import ClockGraph, SCHEMA_FILE
+from ..utils.profiling import stage
+
+# bump whenever the pickled structure of the graph changes
+CACHE_FORMAT = 4
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "clock-visualizer"
+
+def cache_prefix(soc_file: Path, schema_data: bytes | None) -> str:
+    """Identifies the description file, schema and tool version an entry was built with"""
+    digest = hashlib.sha256()
+    digest.update(f"{__version__}/{CACHE_FORMAT}\0{soc_file.resolve()}\0".encode())
+    if schema_data is not None:
+        digest.update(schema_data)
+    return digest.hexdigest()[:16]
+
+def cache_key(soc_data: bytes, schema_data: bytes | None) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{__version__}/{CACHE_FORMAT}\0".encode())
+    digest.update(soc_data)
+    digest.update(b"\0")
+    if schema_data is not None:
+        digest.update(schema_data)
+    return digest.hexdigest()
+
+def load_clock_graph(soc_file: Path, schema_file: Path | None = SCHEMA_FILE,
+                     cache_dir: Path | None = None) -> ClockGraph:
+    """
+    Load the clock graph from the cache or, if missing / outdated, from the
+    yaml description. `cache_dir=None` uses the default cache directory.
+    """
+    cache_dir = default_cache_dir() if cache_dir is None else Path(cache_dir)
+
+    soc_data = soc_file.read_bytes()
+    schema_data = None if schema_file is None else Path(schema_file).read_bytes()
+    prefix = f"{soc_file.stem}-{cache_prefix(soc_file, schema_data)}"
+    cache_file = cache_dir / f"{prefix}-{cache_key(soc_data, schema_data)}.pickle"
+
+    try:
+        with cache_file.open("rb") as fp, stage("cache"):
+            graph = pickle.load(fp)
+        if isinstance(graph, ClockGraph):
+            return graph
+    except Exception:
+        # missing or unusable (unpickling may fail with almost any error), simply rebuild it
+        pass
+
+    graph = ClockGraph.from_yaml(io.StringIO(soc_data.decode()), schema_file)
+
+    try:
+        data = pickle.dumps(graph, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        # e.g. an element that can not be pickled, the graph simply is not cached
+        return graph
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # remove outdated revisions of this description
+        for old in cache_dir.glob(f"{glob.escape(prefix)}-{'?' * 64}.pickle"):
+            old.unlink(missing_ok=True)
+
+        # write atomically, concurrent runs may read the cache at any time
+        with tempfile.NamedTemporaryFile("wb", dir=cache_dir, suffix=".tmp", delete=False) as fp:
+            try:
+                fp.write(data)
+            except Exception:
+                os.unlink(fp.name)
+                raise
+        os.replace(fp.name, cache_file)
+    except OSError:
+        # not being able to cache is not an error
+        pass
+
+    return graph
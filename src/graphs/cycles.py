@@ -0,0 +1,121 @@
+"""
+Copyright: 2025 Auxsys
+
+Loop detection in clock graphs. The strongly connected components are found
+with Tarjan's algorithm, each component with more than one node (or a node
+feeding itself) contains at least one loop, which is reported as a path.
+"""
+from typing import Callable, Hashable, Iterable, TypeVar, TYPE_CHECKING
+
+from .elements import ClockType
+if TYPE_CHECKING:
+    from .abstractgraph import AbstractGraph
+    from .compact import CompactGraph
+
+T = TypeVar("T", bound=Hashable)
+
+class ClockLoopError(Exception):
+    def __init__(self, cycle: list[ClockType], *args: object) -> None:
+        super().__init__(*args)
+        self.cycle = cycle
+
+    def __str__(self) -> str:
+        path = " -> ".join(clk.name for clk in [*self.cycle, self.cycle[0]])
+        return f"Loop found in clk graph: {path}" + super().__str__()
+
+def _strongly_connected(nodes: Iterable[T], inputs_of: Callable[[T], Iterable[T]]) -> list[list[T]]:
+    """Tarjan's algorithm (iterative) over the input edges of the graph"""
+    index: dict[T, int] = {}
+    lowlink: dict[T, int] = {}
+    on_stack: set[T] = set()
+    stack: list[T] = []
+    components = []
+
+    for root in nodes:
+        if root in index:
+            continue
+
+        work = [(root, iter(inputs_of(root)))]
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, neighbours = work[-1]
+            for nxt in neighbours:
+                if nxt not in index:
+                    index[nxt] = lowlink[nxt] = len(index)
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, iter(inputs_of(nxt))))
+                    break
+                elif nxt in on_stack:
+                    lowlink[node] = min(lowlink[node], index[nxt])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
+
+def _loops(nodes: Iterable[T], inputs_of: Callable[[T], Iterable[T]]) -> list[list[T]]:
+    """One loop (each node feeding the previous one) per cyclic component"""
+    cycles = []
+    for component in _strongly_connected(nodes, inputs_of):
+        members = set(component)
+        start = component[0]
+        if len(component) == 1 and start not in inputs_of(start):
+            continue
+
+        # every member has an input within the component, so following these
+        # inputs has to end up at an already visited node
+        path: list[T] = []
+        position: dict[T, int] = {}
+        node = start
+        while node not in position:
+            position[node] = len(path)
+            path.append(node)
+            node = next(inp for inp in inputs_of(node) if inp in members)
+        cycles.append(path[position[node]:])
+
+    return cycles
+
+def find_cycles(graph: "AbstractGraph") -> list[list[ClockType]]:
+    """One loop (as list of clocks, each feeding the previous one) per cyclic component"""
+    return _loops(graph.get_clks(), graph.list_inputs_for_clk)
+
+def find_cycles_compact(compact: "CompactGraph") -> list[list[ClockType]]:
+    """`find_cycles` over the ids of a compact graph"""
+    # peel off the clocks in topological order, only those left over are
+    # part of or fed by a loop (usually none)
+    pending = [0] * len(compact)
+    for dst in compact.out_idx:
+        pending[dst] += 1
+    ready = [idx for idx, count in enumerate(pending) if count == 0]
+    out_ptr, out_idx = compact.out_ptr, compact.out_idx
+    while ready:
+        idx = ready.pop()
+        for dst in out_idx[out_ptr[idx]:out_ptr[idx + 1]]:
+            pending[dst] -= 1
+            if pending[dst] == 0:
+                ready.append(dst)
+
+    left = [idx for idx, count in enumerate(pending) if count > 0]
+    if not left:
+        return []
+
+    def inputs_of(idx: int) -> list[int]:
+        return [inp for inp in compact.inputs(idx) if pending[inp] > 0]
+
+    return [[compact.clocks[idx] for idx in cycle] for cycle in _loops(left, inputs_of)]
@@ -8,15 +8,17 @@ from typing import Callable, TYPE_CHECKING
 if TYPE_CHECKING:
     from ..utils import SparseMemory
 
-from dataclasses import dataclass
-from copy import deepcopy
+from dataclasses import dataclass, field
 
 from .yamlobjects import AddrObject
 
-@dataclass()
+# elements are compared and hashed by identity, graphs never hold two clocks
+# with the same name. Slotted, so methods can not use super() (python < 3.14)
+@dataclass(slots=True, eq=False)
 class ClockType():
     name: str
     description: str
+    index: int = field(default=-1, init=False, repr=False)  # dense id within its graph, see compact.py
 
     @property
     def used_registers(self) -> set[AddrObject]:
@@ -25,20 +27,15 @@ class ClockType():
     def list_inputs(self) -> None | list["ClockType"]:
         raise NotImplementedError()
 
-    def __hash__(self) -> int:
-        return self.name.__hash__()
-
-@dataclass()
+@dataclass(slots=True, eq=False)
 class Clock(ClockType):
     is_enabled: None | tuple[dict[int, bool], AddrObject]
     input: None | ClockType
+    frequency: None | float = None  # in Hz, for sources with a fixed frequency
 
     @property
     def used_registers(self) -> set[AddrObject]:
-        regs = super().used_registers
-        if self.is_enabled is not None:
-            regs.add(self.is_enabled[1])
-        return deepcopy(regs)
+        return set() if self.is_enabled is None else {self.is_enabled[1]}
 
     def list_inputs(self) -> None | list[ClockType]:
         return [self.input] if self.input else None
@@ -51,26 +48,22 @@ class Clock(ClockType):
             raise ValueError(f"Invalid bits ({addr.bit}) for this operation [required len=1]")
         return value[memory.get_register(addr)]
 
-    def __hash__(self) -> int:
-        return self.name.__hash__()
+    def parse_fields(self, fields: dict[str, int]) -> bool:
+        """As `parse`, with the values of the register fields (see registers.list_register_fields)"""
+        return True if self.is_enabled is None else self.is_enabled[0][fields["is_enabled"]]
 
-@dataclass()
+@dataclass(slots=True, eq=False)
 class Pll(Clock):
     ...
 
-    def __hash__(self) -> int:
-        return self.name.__hash__()
-
-@dataclass()
+@dataclass(slots=True, eq=False)
 class Mux(ClockType):
     register: AddrObject
     inputs: dict[int | str, None | ClockType]
 
     @property
     def used_registers(self) -> set[AddrObject]:
-        regs = super().used_registers
-        regs.add(self.register)
-        return deepcopy(regs)
+        return {self.register}
 
     def list_inputs(self) -> None | list[ClockType]:
         return [ ins for ins in self.inputs.values() if ins is not None ]
@@ -78,25 +71,30 @@ class Mux(ClockType):
     def parse(self, memory: SparseMemory) -> int:
         return memory.get_register(self.register)
 
-    def __hash__(self) -> int:
-        return self.name.__hash__()
+    def parse_fields(self, fields: dict[str, int]) -> int:
+        return fields["select"]
 
-@dataclass()
+@dataclass(slots=True, eq=False)
 class Div(ClockType):
     input: ClockType
-    value: Callable[[list[int]], float]
+    value: Callable[[list[int]], float]  # divisor for the register values, ordered as `value.args`
     registers: dict[str, AddrObject]
 
     def list_inputs(self) -> None | list[ClockType]:
         return [self.input]
 
-    def __hash__(self) -> int:
-        return self.name.__hash__()
+    def parse(self, memory: SparseMemory) -> float:
+        return self.parse_fields({ name: memory.get_register(reg) for name, reg in self.registers.items() })
+
+    def parse_fields(self, fields: dict[str, int]) -> float:
+        args = getattr(self.value, "args", self.registers)
+        try:
+            return self.value([fields[arg] for arg in args])
+        except ZeroDivisionError:
+            return float("inf")
 
     @property
     def used_registers(self) -> set[AddrObject]:
-        regs = super().used_registers
-        regs.update(reg for reg in self.registers.values())
-        return deepcopy(regs)
+        return set(self.registers.values())
 
 
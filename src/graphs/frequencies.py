@@ -0,0 +1,178 @@
+"""
+Copyright: 2025 Auxsys
+
+Propagation of the clock frequencies through the graph. The graph is compiled
+once into a plan in topological order (sources first), so evaluating a
+configuration computes every clock exactly once. The register values are read
+from a memory, or given as array with one row per dump to evaluate many dumps
+in one vectorized pass.
+
+Sources are clocks with a fixed frequency (`freq` in the description, or
+overridden by name). Disabled clocks and reserved mux inputs run at 0 Hz,
+unknown frequencies (missing source frequency, unknown register values) are
+None (NaN for arrays). The multiplication of PLLs is not described, so the
+output of an enabled PLL without a fixed frequency is unknown as well.
+"""
+from typing import Sequence, TYPE_CHECKING
+
+from .elements import ClockType, Clock, Pll, Mux, Div
+from .cycles import ClockLoopError
+from .registers import RegisterField, RegisterReadPlan, list_register_fields
+
+if TYPE_CHECKING:
+    import numpy as np
+    from ..utils import SparseMemory
+    from .abstractgraph import AbstractGraph
+
+# steps of the plan
+_CLOCK, _MUX, _DIV = range(3)
+
+# column / clock index of unconnected (reserved) mux inputs
+_RESERVED = -1
+
+def format_frequency(frequency: float | None) -> str:
+    """Frequency with a fitting unit, e.g. `12 MHz` or `32.768 kHz`"""
+    if frequency is None or frequency != frequency:
+        return "? Hz"
+    for unit, scale in (("GHz", 1e9), ("MHz", 1e6), ("kHz", 1e3)):
+        if abs(frequency) >= scale:
+            return f"{frequency / scale:.3f}".rstrip("0").rstrip(".") + f" {unit}"
+    return f"{frequency:.3f}".rstrip("0").rstrip(".") + " Hz"
+
+def topological_order(graph: "AbstractGraph") -> list[ClockType]:
+    """Clocks ordered such that every clock comes after its inputs"""
+    if cycles := graph.get_cycles():
+        raise ClockLoopError(cycles[0])
+
+    pending = { clk: len(set(graph.list_inputs_for_clk(clk))) for clk in graph.get_clks() }
+    ready = [clk for clk, count in pending.items() if count == 0]
+    order = []
+    while ready:
+        clk = ready.pop()
+        order.append(clk)
+        for nclk in graph.list_outputs_for_clk(clk):
+            pending[nclk] -= 1
+            if pending[nclk] == 0:
+                ready.append(nclk)
+    return order
+
+class FrequencyEngine:
+    def __init__(self, graph: "AbstractGraph", sources: dict[str, float] | None = None,
+                 read_plan: RegisterReadPlan | None = None) -> None:
+        """
+        `sources` overrides the frequency of clocks by name, e.g. the crystal
+        of a board. The register values are given in the order of the fields
+        of `read_plan` (e.g. `ClockGraph.read_plan`, to share the values decoded
+        by a `MemoryClockGraph`), by default a plan over all fields of the graph.
+        """
+        self.clocks = topological_order(graph)
+        self._read_plan = RegisterReadPlan(list_register_fields(self.clocks)) if read_plan is None else read_plan
+        self.fields: list[RegisterField] = self._read_plan.fields
+
+        index = { clk: idx for idx, clk in enumerate(self.clocks) }
+        columns = { (field.clock, field.name): col for col, field in enumerate(self.fields) }
+        sources = sources or {}
+
+        def input_index(clk: ClockType | None) -> int | None:
+            return None if clk is None else index[clk]
+
+        self._plan: list[tuple] = []
+        for idx, clk in enumerate(self.clocks):
+            match clk:
+                case Clock():
+                    enable = None if clk.is_enabled is None else (columns[(clk, "is_enabled")], clk.is_enabled[0])
+                    frequency = sources.get(clk.name, clk.frequency)
+                    # a PLL does not pass its input frequency through
+                    source = None if isinstance(clk, Pll) else input_index(clk.input)
+                    self._plan.append((_CLOCK, idx, source, frequency, enable))
+                case Mux():
+                    inputs = {
+                        key: _RESERVED if sclk is None else index[sclk]
+                        for key, sclk in clk.inputs.items() if key != "default"
+                    }
+                    default = clk.inputs.get("default")
+                    self._plan.append((_MUX, idx, columns[(clk, "select")], inputs,
+                                       None if default is None else index[default]))
+                case Div():
+                    args = getattr(clk.value, "args", clk.registers)
+                    cols = [columns[(clk, arg)] for arg in args] if clk.value is not None else None
+                    self._plan.append((_DIV, idx, input_index(clk.input), clk.value, cols))
+                case _:
+                    raise NotImplementedError(f"Missing type {clk.__class__}")
+
+    def read_values(self, memory: "SparseMemory") -> list[int]:
+        """Values of all register `fields` in the memory"""
+        return self._read_plan.read(memory)
+
+    def evaluate(self, memory: "SparseMemory") -> dict[ClockType, float | None]:
+        """Frequency of every clock for the configuration in the memory"""
+        return self.evaluate_values(self.read_values(memory))
+
+    def evaluate_values(self, values: Sequence[int]) -> dict[ClockType, float | None]:
+        """Frequency of every clock for the values of the register `fields`"""
+        freqs: list[float | None] = [None] * len(self.clocks)
+
+        for kind, idx, a, b, c in self._plan:
+            if kind == _CLOCK:
+                frequency = b if b is not None else None if a is None else freqs[a]
+                if c is not None:
+                    state = c[1].get(values[c[0]])
+                    frequency = None if state is None else frequency if state else 0.0
+                freqs[idx] = frequency
+            elif kind == _MUX:
+                target = b.get(values[a], c)
+                freqs[idx] = None if target is None else 0.0 if target == _RESERVED else freqs[target]
+            else:
+                frequency = None if a is None or b is None else freqs[a]
+                if frequency is not None:
+                    try:
+                        divisor = b([values[col] for col in c])
+                    except ZeroDivisionError:
+                        divisor = float("inf")
+                    frequency = frequency / divisor if divisor else None
+                freqs[idx] = frequency
+
+        return dict(zip(self.clocks, freqs))
+
+    def evaluate_many(self, values: "np.typing.ArrayLike") -> dict[ClockType, "np.ndarray"]:
+        """
+        Frequencies for many configurations at once. `values` has one row per
+        configuration with the values of the register `fields` as columns, the
+        result holds an array with one frequency per row for every clock.
+        """
+        import numpy as np
+
+        values = np.asarray(values, dtype=np.int64).reshape(-1, len(self.fields))
+        rows = values.shape[0]
+        freqs = np.full((len(self.clocks), rows), np.nan)
+
+        with np.errstate(all="ignore"):
+            for kind, idx, a, b, c in self._plan:
+                out = freqs[idx]
+                if kind == _CLOCK:
+                    if b is not None:
+                        out[:] = b
+                    elif a is not None:
+                        out[:] = freqs[a]
+                    if c is not None:
+                        col, states = c
+                        enabled = np.zeros(rows, dtype=bool)
+                        known = np.zeros(rows, dtype=bool)
+                        for key, state in states.items():
+                            match = values[:, col] == key
+                            known |= match
+                            enabled |= match & bool(state)
+                        out[:] = np.where(enabled, out, np.where(known, 0.0, np.nan))
+                elif kind == _MUX:
+                    select = values[:, a]
+                    if c is not None:
+                        out[:] = freqs[c]
+                    for key, target in b.items():
+                        match = select == key
+                        out[match] = 0.0 if target == _RESERVED else freqs[target][match]
+                elif a is not None and b is not None:
+                    divisor = np.asarray(b([values[:, col] for col in c]), dtype=np.float64)
+                    out[:] = freqs[a] / divisor
+                    out[~np.isfinite(out)] = np.nan
+
+        return { clk: freqs[idx] for idx, clk in enumerate(self.clocks) }
@@ -10,8 +10,12 @@ from ..utils import SparseMemory
 from .elements import ClockType, Clock, Mux, Div, Pll
 from .clockgraph import ClockGraph
 from .abstractgraph import AbstractGraph
+from .cycles import find_cycles
+from .registers import RegisterIndex, RegisterField
+from .compact import NO_CLOCK
+from array import array
 from dataclasses import dataclass
-from typing import Iterator
+from typing import Iterable, Iterator
 
 @dataclass(frozen=True)
 class ParsedClockType:
@@ -40,23 +44,92 @@ class MemoryClockGraph(AbstractGraph):
     def __init__(self, graph: ClockGraph, memory: SparseMemory) -> None:
         self._graph = graph
         self._memory = memory
-        self._parsednodes: dict[ClockType, ParsedClockType] = self._preprocess()
-
-    def _preprocess(self) -> dict[ClockType, ParsedClockType]:
-        parsednodes = {}
-        for node in self._graph.get_clks():
-            match node:
-                case Clock():
-                    parsed = ParsedClock(node, node.parse(self._memory))
-                case Mux():
-                    parsed = ParsedMux(node, node.parse(self._memory))
-                case Div():
-                    parsed = ParsedDiv(node, -1)
-                case _:
-                    raise NotImplementedError(f"Node type not yet implemented ({node})")
-
-            parsednodes[node] = parsed
-        return parsednodes
+        self._compact = graph.compact
+        self._plan = graph.read_plan
+
+        # every register word is read once, the fields are decoded from them
+        self._words = self._plan.read_words(memory)
+        self._values = array("Q", self._plan.decode(self._words))
+
+        # state per clock id, see compact.py
+        self._parsed: list[ParsedClockType] = [self._parse_node(clk) for clk in self._compact.clocks]
+        self._active_input = array("i", [NO_CLOCK]) * len(self._compact)
+        self._enabled = bytearray(len(self._compact))
+        for idx, parsed in enumerate(self._parsed):
+            self._set_active(idx, parsed)
+        self._find_cycles()
+
+        self._frequencies: dict[ClockType, float | None] | None = None
+
+    def _parse_node(self, node: ClockType) -> ParsedClockType:
+        fields = self._plan.clock_values(node, self._values)
+        match node:
+            case Clock():
+                return ParsedClock(node, node.parse_fields(fields))
+            case Mux():
+                return ParsedMux(node, node.parse_fields(fields))
+            case Div():
+                return ParsedDiv(node, node.parse_fields(fields))
+            case _:
+                raise NotImplementedError(f"Node type not yet implemented ({node})")
+
+    def apply_writes(self, writes: Iterable[tuple[int, bytes]]) -> set[ClockType]:
+        """
+        Write `(address, data)` into the memory and re-evaluate only the clocks
+        reading the written registers. Returns the clocks whose state or
+        register values changed.
+        """
+        changed = set()
+        rewire = False
+
+        for address, data in writes:
+            self._memory[address:address + len(data)] = data
+
+            readers = set()
+            for word in self._plan.words_overlapping(address, address + len(data)):
+                value = self._plan.read_word(self._memory, word)
+                if value == self._words[word]:
+                    continue
+                self._words[word] = value
+                for idx in self._plan.word_fields(word):
+                    self._values[idx] = self._plan.decode_field(self._words, idx)
+                    readers.add(self._plan.fields[idx].clock)
+
+            # the register values of all readers changed
+            changed |= readers
+            for clk in readers:
+                parsed = self._parse_node(clk)
+                if parsed != self._parsed[clk.index]:
+                    self._parsed[clk.index] = parsed
+                    self._set_active(clk.index, parsed)
+                    # dividers do not change the connections
+                    rewire |= not isinstance(parsed, ParsedDiv)
+                    self._frequencies = None
+
+        if rewire:
+            self._find_cycles()
+        return changed
+
+    def resolved_state(self) -> dict[ClockType, tuple[ParsedClockType, dict[int, tuple[int, int]]]]:
+        """Everything shown about the clocks: their parsed state and register values"""
+        return { clk: (self._parsed[clk.index], self.get_registers(clk)) for clk in self.get_clks() }
+
+    def _set_active(self, idx: int, parsed: ParsedClockType):
+        """Active input (by the mux selection) and enable of the clock"""
+        match parsed:
+            case ParsedMux():
+                v = parsed.origin.inputs.get(parsed.choosen, None)
+                self._active_input[idx] = NO_CLOCK if v is None else v.index
+            case _:
+                ins = self._compact.inputs(idx)
+                assert len(ins) <= 1, f"There should be only one input for clk {parsed}. Got {ins}"
+                self._active_input[idx] = ins[0] if ins else NO_CLOCK
+        self._enabled[idx] = not isinstance(parsed, ParsedClock) or parsed.is_enabled
+
+    def _find_cycles(self):
+        # the active edges are a subset of the graphs edges, so there can
+        # only be loops, if the complete graph has some
+        self._cycles = find_cycles(self) if self._graph.get_cycles() else []
 
     def get_clk(self, name: str) -> ClockType | None:
         return self._graph.get_clk(name)
@@ -72,44 +145,61 @@ class MemoryClockGraph(AbstractGraph):
         """These are clocks that are not connected anywhere else"""
         return self._graph.get_output_clks()
 
-    def list_outputs_for_clk(self, clk: ClockType) -> set[ClockType]:
-        unfiltered_outs = self._graph.list_outputs_for_clk(clk)
-
-        if isinstance(mclk := self._parsednodes[clk], ParsedClock) \
-                and not mclk.is_enabled:
-            return set()
-
-        def is_connected(nclk: ClockType) -> bool:
-            pclk: ParsedClockType = self._parsednodes[nclk]
+    def get_cycles(self) -> list[list[ClockType]]:
+        return self._cycles
 
-            match pclk:
-                case ParsedMux():
-                    return clk == pclk.origin.inputs.get(pclk.choosen, None)
-                case _:
-                    return True
+    def get_register_index(self) -> RegisterIndex:
+        return self._graph.get_register_index()
 
-        return set(filter(is_connected, unfiltered_outs))
+    def list_outputs_for_clk(self, clk: ClockType) -> set[ClockType]:
+        if not self._compact.contains(clk):
+            raise KeyError(clk.name)
+        idx = clk.index
+        if not self._enabled[idx]:
+            return set()
+        clocks, active = self._compact.clocks, self._active_input
+        return { clocks[out] for out in self._compact.outputs(idx) if active[out] == idx }
 
     def list_inputs_for_clk(self, clk: ClockType) -> list[ClockType]:
-        parsed = self._parsednodes[clk]
-        match parsed:
-            case ParsedMux():
-                v = parsed.origin.inputs.get(parsed.choosen, None)
-                return [] if v is None else [v]
-            case _:
-                ins = self._graph.list_inputs_for_clk(clk)
-                assert len(ins) <= 1, f"There should be only one input for clk {parsed}. Got {ins}"
-                return ins
+        if not self._compact.contains(clk):
+            raise KeyError(clk.name)
+        active = self._active_input[clk.index]
+        return [] if active == NO_CLOCK else [self._compact.clocks[active]]
+
+    def has_edge(self, n_from: ClockType, n_to: ClockType) -> bool:
+        if not self._compact.contains(n_to):
+            raise KeyError(n_to.name)
+        return self._active_input[n_to.index] == n_from.index and self._compact.contains(n_from)
 
     def get_parsed_for_clk(self, clk: ClockType) -> ParsedClockType:
-        return self._parsednodes[clk]
+        return self._parsed[clk.index]
+
+    def get_frequencies(self) -> dict[ClockType, float | None]:
+        """Frequency of every clock in Hz, None if unknown. Computed once per memory state"""
+        if self._frequencies is None:
+            # the engine shares the read plan, so the decoded values are used as they are
+            self._frequencies = self._graph.get_frequency_engine().evaluate_values(self._values)
+        return self._frequencies
+
+    def get_fields(self, clk: ClockType) -> dict[str, int]:
+        """Values of the register fields read by the clock by their name (see registers.list_register_fields)"""
+        return self._plan.clock_values(clk, self._values)
+
+    def diff(self, other: "MemoryClockGraph") -> list[tuple[RegisterField, int, int]]:
+        """
+        Register fields differing from the graph of another memory of the same
+        description as (field, value here, value there), by the decoded values
+        """
+        if other._plan is not self._plan:
+            raise ValueError("Only graphs of the same description can be compared")
+        fields = self._plan.fields
+        return [
+            (fields[idx], old, new)
+            for idx, (old, new) in enumerate(zip(self._values, other._values)) if old != new
+        ]
 
     def get_registers(self, clk: ClockType) -> dict[int, tuple[int, int]]:
-        regs = dict()
-
-        for reg in clk.used_registers:
-            reg.bit = (reg.width, 0)
-            regs[reg.addr] = (self._memory.get_register(reg), reg.width)
-
-        return regs
+        """Values of the register words read by the clock as `{address: (value, width in bits)}`"""
+        words = self._plan.words
+        return { words[word][0]: (self._words[word], words[word][1] * 8) for word in self._plan.clock_words(clk) }
 
@@ -0,0 +1,262 @@
+"""
+Copyright: 2025 Auxsys
+
+Register fields read by the clocks, the plan reading them from a memory and
+the reverse index from register addresses (and bits) to the clocks reading
+them.
+"""
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from struct import Struct
+from typing import Iterable, Sequence, TYPE_CHECKING
+
+from .elements import ClockType, Clock, Mux, Div
+from .yamlobjects import AddrObject
+from ..utils.profiling import count
+
+if TYPE_CHECKING:
+    from ..utils import SparseMemory
+    from .abstractgraph import AbstractGraph
+
+@dataclass(frozen=True)
+class RegisterField:
+    clock: ClockType
+    name: str  # `is_enabled`, `select` or the name of the div register
+    register: AddrObject
+
+    @property
+    def bits(self) -> tuple[int, int]:
+        """(high, low) bit of the field within its register word"""
+        bit = self.register.bit
+        return (bit[0], bit[0]) if len(bit) == 1 else (bit[0], bit[1])
+
+def list_register_fields(clks: Iterable[ClockType]) -> list[RegisterField]:
+    """All register fields that are read by the clocks"""
+    fields = []
+    for clk in clks:
+        match clk:
+            case Clock():
+                if clk.is_enabled is not None:
+                    fields.append(RegisterField(clk, "is_enabled", clk.is_enabled[1]))
+            case Mux():
+                fields.append(RegisterField(clk, "select", clk.register))
+            case Div():
+                for name, reg in clk.registers.items():
+                    fields.append(RegisterField(clk, name, reg))
+            case _:
+                raise NotImplementedError(f"Missing type {clk.__class__}")
+    return fields
+
+def field_shift_mask(register: AddrObject) -> tuple[int, int]:
+    """(shift, mask) of the field within its word, same semantic as SparseMemory.get_register"""
+    if len(register.bit) == 1:
+        return register.bit[0], 0x1
+    high, low = register.bit
+    return low, (1 << (high - low + 1)) - 1
+
+_WORD_FORMATS = { 1: "B", 2: "H", 4: "I", 8: "Q" }
+
+class RegisterReadPlan:
+    """
+    Reads every register word of the fields once per memory and decodes the
+    fields with precomputed shifts and masks. Fields sharing a word cost a
+    single read, adjacent words are fetched with one memory access. The
+    clocks of the fields need their dense id (see compact.py).
+    """
+    def __init__(self, fields: Iterable[RegisterField]) -> None:
+        self.fields = list(fields)
+
+        # unique words (address, bytes, endianess), ordered by address
+        keys = sorted({
+            (field.register.addr, field.register.width // 8, field.register.endianess.value) for field in self.fields
+        })
+        word_of = { key: idx for idx, key in enumerate(keys) }
+        self.words: list[tuple[int, int, str]] = keys
+
+        self._field_word = array("i", [word_of[(f.register.addr, f.register.width // 8, f.register.endianess.value)]
+                                       for f in self.fields])
+        self._shift, self._mask = array("B"), array("Q")
+        for field in self.fields:
+            shift, mask = field_shift_mask(field.register)
+            self._shift.append(shift)
+            self._mask.append(mask)
+
+        self._names = [field.name for field in self.fields]
+        self._word_fields: list[list[int]] = [[] for _ in keys]
+        for idx, word in enumerate(self._field_word):
+            self._word_fields[word].append(idx)
+
+        # fields of a clock in CSR form by the id of the clock
+        clock_ids = [field.clock.index for field in self.fields]
+        if min(clock_ids, default=0) < 0:
+            raise ValueError("The clocks of the fields have no dense id")
+        clock_ptr = [0] * (max(clock_ids, default=-1) + 2)
+        for cid in clock_ids:
+            clock_ptr[cid + 1] += 1
+        for cid in range(1, len(clock_ptr)):
+            clock_ptr[cid] += clock_ptr[cid - 1]
+        self._clock_ptr = array("i", clock_ptr)
+        self._clock_fields = array("i", sorted(range(len(self.fields)), key=clock_ids.__getitem__))
+
+        # touching words are read in one go (words with a gap in between are
+        # not, the memory may not have a filler byte for it)
+        self._unpack = self._unpackers(keys)
+        self._spans: list[tuple[int, int, list[int]]] = []
+        for idx, (addr, nbytes, _) in enumerate(keys):
+            if self._spans and addr <= self._spans[-1][1]:
+                start, stop, members = self._spans[-1]
+                self._spans[-1] = (start, max(stop, addr + nbytes), members + [idx])
+            else:
+                self._spans.append((addr, addr + nbytes, [idx]))
+        self._addrs = [addr for addr, _, _ in keys]
+        self._max_word_size = max((nbytes for _, nbytes, _ in keys), default=0)
+
+    @staticmethod
+    def _unpackers(words: list[tuple[int, int, str]]) -> list:
+        return [Struct(("<" if endian == "little" else ">") + _WORD_FORMATS[nbytes]).unpack_from
+                for _, nbytes, endian in words]
+
+    def __getstate__(self) -> dict:
+        # bound methods of Struct can not be pickled
+        return { key: value for key, value in self.__dict__.items() if key != "_unpack" }
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._unpack = self._unpackers(self.words)
+
+    def read_words(self, memory: "SparseMemory") -> array:
+        """Values of all `words` in the memory"""
+        count("register_reads", len(self.words))
+        words = array("Q", bytes(8 * len(self.words)))
+        for start, stop, members in self._spans:
+            data = memory[start:stop]
+            for idx in members:
+                words[idx] = self._unpack[idx](data, self.words[idx][0] - start)[0]
+        return words
+
+    def read_word(self, memory: "SparseMemory", word: int) -> int:
+        count("register_reads")
+        addr, nbytes, _ = self.words[word]
+        return self._unpack[word](memory[addr:addr + nbytes])[0]
+
+    def decode(self, words: Sequence[int]) -> list[int]:
+        """Values of all `fields` for the word values as returned by `read_words`"""
+        return [(words[word] >> shift) & mask for word, shift, mask in zip(self._field_word, self._shift, self._mask)]
+
+    def field_layout(self) -> tuple[array, array, array]:
+        """Word, shift and mask of every field, e.g. to decode many word sets with numpy"""
+        return self._field_word, self._shift, self._mask
+
+    def decode_field(self, words: Sequence[int], field: int) -> int:
+        return (words[self._field_word[field]] >> self._shift[field]) & self._mask[field]
+
+    def read(self, memory: "SparseMemory") -> list[int]:
+        """Values of all `fields` in the memory"""
+        return self.decode(self.read_words(memory))
+
+    def words_overlapping(self, start: int, stop: int) -> list[int]:
+        """Words overlapping the addresses [start, stop)"""
+        words = []
+        idx = bisect_left(self._addrs, start - self._max_word_size + 1)
+        while idx < len(self._addrs) and self._addrs[idx] < stop:
+            if self._addrs[idx] + self.words[idx][1] > start:
+                words.append(idx)
+            idx += 1
+        return words
+
+    def word_fields(self, word: int) -> list[int]:
+        """Fields decoded from the word"""
+        return self._word_fields[word]
+
+    def clock_fields(self, clk: ClockType) -> Sequence[int]:
+        idx, ptr = clk.index, self._clock_ptr
+        if not 0 <= idx < len(ptr) - 1:
+            return ()
+        fields = self._clock_fields[ptr[idx]:ptr[idx + 1]]
+        # the id may belong to another graph
+        return fields if fields and self.fields[fields[0]].clock is clk else ()
+
+    def clock_values(self, clk: ClockType, values: Sequence[int]) -> dict[str, int]:
+        """Values of the clock's fields by name, `values` as returned by `decode`"""
+        names = self._names
+        return { names[idx]: values[idx] for idx in self.clock_fields(clk) }
+
+    def clock_words(self, clk: ClockType) -> list[int]:
+        """Words read by the clock, ordered by address"""
+        return sorted({ self._field_word[idx] for idx in self.clock_fields(clk) })
+
+class RegisterIndex:
+    """Register fields by the address of their register word"""
+    def __init__(self, fields: Iterable[RegisterField]) -> None:
+        self._fields: dict[int, list[RegisterField]] = {}
+        self._word_size: dict[int, int] = {}
+        for field in fields:
+            addr = field.register.addr
+            self._fields.setdefault(addr, []).append(field)
+            self._word_size[addr] = max(self._word_size.get(addr, 0), field.register.width // 8)
+
+        self._addrs = sorted(self._fields)
+        self._max_word_size = max(self._word_size.values(), default=0)
+
+    def words(self) -> list[tuple[int, int]]:
+        """(address, size in bytes) of every register word, ordered by address"""
+        return [(addr, self._word_size[addr]) for addr in self._addrs]
+
+    def _words_overlapping(self, start: int, stop: int) -> Iterable[int]:
+        idx = bisect_left(self._addrs, start - self._max_word_size + 1)
+        while idx < len(self._addrs) and (addr := self._addrs[idx]) < stop:
+            if addr + self._word_size[addr] > start:
+                yield addr
+            idx += 1
+
+    def fields_reading(self, start: int, stop: int) -> list[RegisterField]:
+        """Fields of the register words overlapping the addresses [start, stop)"""
+        return [field for addr in self._words_overlapping(start, stop) for field in self._fields[addr]]
+
+    def fields_at(self, address: int, bits: tuple[int, int] | None = None) -> list[RegisterField]:
+        """
+        Fields of the register word containing the address. If given, only
+        the fields overlapping the (high, low) `bits` of the word.
+        """
+        fields = self.fields_reading(address, address + 1)
+        if bits is not None:
+            high, low = bits
+            fields = [field for field in fields if field.bits[1] <= high and field.bits[0] >= low]
+        return fields
+
+    def clks_reading(self, start: int, stop: int) -> set[ClockType]:
+        """Clocks reading a register word overlapping the addresses [start, stop)"""
+        return { field.clock for field in self.fields_reading(start, stop) }
+
+def parse_address(text: str) -> tuple[int, tuple[int, int] | None]:
+    """Parse `ADDRESS[:BIT[-BIT]]` (e.g. `0x50000280:7-4`) into the address and (high, low) bits"""
+    address, _, bits = text.partition(":")
+    if not bits:
+        return int(address, 0), None
+
+    high, _, low = bits.partition("-")
+    high_bit, low_bit = int(high, 0), int(low or high, 0)
+    if high_bit < low_bit:
+        high_bit, low_bit = low_bit, high_bit
+    return int(address, 0), (high_bit, low_bit)
+
+def address_report(graph: "AbstractGraph", address: int, bits: tuple[int, int] | None = None) -> dict:
+    """Fields at the address, the clocks reading them and all clocks fed by those"""
+    fields = graph.get_register_index().fields_at(address, bits)
+    clks = list(dict.fromkeys(field.clock for field in fields))
+    downstream = graph.list_downstream(clks) - set(clks)
+
+    return {
+        "address": f"0x{address:X}",
+        "bits": None if bits is None else list(bits),
+        "fields": [
+            {
+                "clock": field.clock.name, "type": field.clock.__class__.__name__.lower(), "field": field.name,
+                "register": f"0x{field.register.addr:X}", "bits": list(field.bits),
+            }
+            for field in fields
+        ],
+        "clocks": [clk.name for clk in clks],
+        "downstream": sorted(clk.name for clk in downstream),
+    }
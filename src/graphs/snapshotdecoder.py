@@ -0,0 +1,65 @@
+"""
+Copyright: 2025 Auxsys
+
+Vectorized decoding of the register fields of a clock graph over many memory
+snapshots at once. Every register word referenced by the graph is read once
+per snapshot (see registers.RegisterReadPlan) into a numpy matrix, the
+individual fields are then extracted with vectorized shift and mask
+operations.
+"""
+from typing import Iterable
+
+import numpy as np
+
+from ..utils import SparseMemory
+from .abstractgraph import AbstractGraph
+from .elements import ClockType
+from .registers import RegisterField, RegisterReadPlan, list_register_fields
+
+class SnapshotDecoder:
+    """
+    Decodes the register fields of a graph for N memory snapshots into a
+    N×fields matrix. The column order is given by `fields`.
+    """
+    def __init__(self, graph: AbstractGraph) -> None:
+        self._plan = RegisterReadPlan(list_register_fields(graph.get_clks()))
+        self.fields = self._plan.fields
+        self.words = self._plan.words
+        self._columns = { (field.clock, field.name): idx for idx, field in enumerate(self.fields) }
+
+        # precomputed field extraction
+        field_word, shift, mask = self._plan.field_layout()
+        self._field_word = np.array(field_word, dtype=np.intp)
+        self._shift = np.array(shift, dtype=np.uint64)
+        self._mask = np.array(mask, dtype=np.uint64)
+
+    def column(self, clk: ClockType, name: str) -> int:
+        return self._columns[(clk, name)]
+
+    def gather(self, memories: Iterable[SparseMemory]) -> np.ndarray:
+        """N×words matrix with the raw register words of each snapshot"""
+        raw = b"".join(self._plan.read_words(mem).tobytes() for mem in memories)
+        return np.frombuffer(raw, dtype=np.uint64).reshape(-1, len(self.words))
+
+    def decode_words(self, words: np.ndarray) -> np.ndarray:
+        """Extract the fields from a N×words matrix as returned by `gather`"""
+        return (words[:, self._field_word] >> self._shift) & self._mask
+
+    def decode(self, memories: Iterable[SparseMemory]) -> np.ndarray:
+        """N×fields matrix with the decoded register fields of each snapshot"""
+        return self.decode_words(self.gather(memories))
+
+    def diff(self, old: SparseMemory, new: SparseMemory) -> list[tuple[RegisterField, int, int]]:
+        """
+        Fields differing between two snapshots as (field, old value, new
+        value). Only the referenced register words are read and compared.
+        """
+        words = self.gather([old, new])
+        if not (words[0] != words[1]).any():
+            return []
+
+        values = self.decode_words(words)
+        return [
+            (self.fields[idx], int(values[0, idx]), int(values[1, idx]))
+            for idx in np.flatnonzero(values[0] != values[1])
+        ]
@@ -0,0 +1,27 @@
+"""
+Copyright: 2025 Auxsys
+
+Yaml loaders for the soc descriptions with our custom tags registered. Uses
+the libyaml parser if available.
+"""
+import yaml
+
+from .yamlobjects import AddrObject32LE, LambdaObject
+
+class PySocLoader(yaml.SafeLoader):
+    """Loader for soc descriptions using the pure python parser"""
+
+if hasattr(yaml, "CSafeLoader"):
+    class SocLoader(yaml.CSafeLoader):
+        """Loader for soc descriptions using the libyaml parser"""
+else:
+    SocLoader = PySocLoader
+
+def _construct_add(loader: yaml.BaseLoader, node) -> int:
+    value: list[int] = loader.construct_sequence(node)
+    return sum(value)
+
+for _loader in {PySocLoader, SocLoader}:
+    _loader.add_constructor("!add", _construct_add)
+    for _cls in (AddrObject32LE, LambdaObject):
+        _loader.add_constructor(_cls.yaml_tag, _cls.from_yaml)
@@ -1,23 +1,19 @@
 """
 Copyright: 2025 Auxsys
 
-Custom yaml object extensions. These are mostly for the tags
+Custom yaml object extensions. These are mostly for the tags. The objects
+themselves do not depend on yaml, the tags are registered in `yamlloader`.
 """
-import yaml
-# we don't need the speed from the c parser
-from yaml import Loader, Dumper
-
 from enum import Enum
+from functools import cached_property, lru_cache
+from typing import Callable
 
-class AddrObject(yaml.YAMLObject):
+class AddrObject:
     class Endianess(Enum):
         UNKNOWN = None
         LE = "little"
         BE = "big"
 
-    yaml_loader = Loader
-    yaml_dumper = Dumper
-
     width = 0
     endianess = Endianess.UNKNOWN
 
@@ -54,20 +50,77 @@ class AddrObject32LE(AddrObject):
     def __copy__(self):
         return AddrObject32LE(self.addr, self.bit)
 
-class LambdaObject(yaml.YAMLObject):
-    yaml_loader = Loader
-    yaml_dumper = Dumper
-
+class LambdaObject:
+    """
+    `ARG1, ARG2 -> EXPR`, compiled once into a python function. Only
+    arithmetic on the arguments and number constants is allowed, so the
+    functions work on ints, floats and numpy arrays alike.
+    """
     yaml_tag = "tag:yaml.org,2002:lambda"
 
     def __init__(self, original: str) -> None:
         self.original = original
+        self.args, self._function = _compile_lambda(original)
 
     def __call__(self, ins: list[int]) -> int:
-        raise NotImplementedError("Not yet implemented")
+        return self._function(*ins)
+
+    @cached_property
+    def _function(self) -> Callable:
+        # unpickled lambdas are compiled on their first call
+        return _compile_lambda(self.original)[1]
+
+    def __getstate__(self) -> dict:
+        # functions can not be pickled
+        return { "original": self.original, "args": self.args }
+
+    def __setstate__(self, state: dict):
+        self.original = state["original"]
+        self.args = state["args"]
 
     @classmethod
     def from_yaml(cls, loader, node):
         return cls(loader.construct_yaml_str(node))
 
+_LAMBDA_OPERATORS = (
+    "Add", "Sub", "Mult", "Div", "FloorDiv", "Mod", "LShift", "RShift", "BitAnd", "BitOr", "BitXor",
+    "UAdd", "USub", "Invert",
+)
+
+@lru_cache(maxsize=None)
+def _compile_lambda(original: str) -> tuple[tuple[str, ...], Callable]:
+    import ast  # only needed when compiling
+
+    params, arrow, body = original.partition("->")
+    args = tuple(arg.strip() for arg in params.split(","))
+    if not arrow or not all(arg.isidentifier() for arg in args):
+        raise ValueError(f"Invalid lambda `{original}`, expected `ARG1, ARG2 -> EXPR`")
+
+    try:
+        expression = ast.parse(body.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid lambda `{original}`", e)
+
+    allowed = tuple(getattr(ast, name) for name in _LAMBDA_OPERATORS)
+    for node in ast.walk(expression.body):
+        match node:
+            case ast.BinOp() | ast.UnaryOp() | ast.Load():
+                pass
+            case ast.Constant(value=value) if type(value) in (int, float):
+                pass
+            case ast.Name(id=name) if name in args:
+                pass
+            case _ if isinstance(node, allowed):
+                pass
+            case _:
+                raise ValueError(f"Invalid lambda `{original}`, `{ast.unparse(node)}` is not allowed")
+
+    function = ast.Expression(ast.Lambda(
+        ast.arguments(posonlyargs=[], args=[ast.arg(arg) for arg in args], kwonlyargs=[], kw_defaults=[], defaults=[]),
+        expression.body,
+    ))
+    ast.fix_missing_locations(function)
+    code = compile(function, f"<lambda {original}>", "eval")
+    return args, eval(code, { "__builtins__": {} })
+
 
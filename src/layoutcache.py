@@ -0,0 +1,113 @@
+"""
+Copyright: 2025 Auxsys
+
+Persistent cache of graph layouts. The layout only depends on the topology
+of the rendered graph (nodes, edges, label sizes), not on the memory state
+highlighted in it. A layout is therefore stored keyed by a hash over the
+unstyled graph source and reused for every dump that results in the same
+topology, the state is only restyled on top of the cached geometry.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+import hashlib
+import json
+import os
+import tempfile
+
+from . import __version__
+from .graphs.compiledcache import default_cache_dir
+
+# bump whenever the stored geometry changes
+LAYOUT_FORMAT = 1
+
+def edge_key(tail: str, tailport: str, head: str, headport: str) -> str:
+    return f"{tail}:{tailport}->{head}:{headport}"
+
+@dataclass
+class Layout:
+    """Positions (in points, as used by graphviz) of everything in a graph"""
+    graph: dict[str, str] = field(default_factory=dict)
+    clusters: dict[str, dict[str, str]] = field(default_factory=dict)
+    nodes: dict[str, dict[str, str]] = field(default_factory=dict)
+    edges: dict[str, dict[str, str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_graphviz_json(cls, data: dict) -> "Layout":
+        """Extract the geometry from the output of `dot -Tjson`"""
+        def pick(obj: dict, *keys: str) -> dict[str, str]:
+            return { k: obj[k] for k in keys if k in obj }
+
+        layout = cls(graph=pick(data, "bb", "lp"))
+
+        names = {}
+        for obj in data.get("objects", []):
+            if "pos" in obj:
+                names[obj["_gvid"]] = obj["name"]
+                layout.nodes[obj["name"]] = pick(obj, "pos", "width", "height")
+            elif obj.get("name", "").startswith("cluster"):
+                layout.clusters[obj["name"]] = pick(obj, "bb", "lp")
+
+        for edge in data.get("edges", []):
+            key = edge_key(names[edge["tail"]], edge.get("tailport", ""),
+                           names[edge["head"]], edge.get("headport", ""))
+            layout.edges[key] = pick(edge, "pos", "lp")
+
+        return layout
+
+    def to_dict(self) -> dict:
+        return { "graph": self.graph, "clusters": self.clusters, "nodes": self.nodes, "edges": self.edges }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Layout":
+        return cls(data["graph"], data["clusters"], data["nodes"], data["edges"])
+
+    def node(self, name: str) -> dict[str, str]:
+        return self.nodes.get(name, {})
+
+    def cluster(self, name: str) -> dict[str, str]:
+        return self.clusters.get(name, {})
+
+    def edge(self, tail: str, tailport: str, head: str, headport: str) -> dict[str, str]:
+        return self.edges.get(edge_key(tail, tailport, head, headport), {})
+
+class LayoutCache:
+    """
+    Layouts stored as json files in `cache_dir`, `None` uses the default
+    cache directory.
+    """
+    def __init__(self, cache_dir: Path | None = None) -> None:
+        self.cache_dir = (default_cache_dir() if cache_dir is None else Path(cache_dir)) / "layouts"
+
+    @staticmethod
+    def key(skeleton: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{__version__}/{LAYOUT_FORMAT}\0".encode())
+        digest.update(skeleton.encode())
+        return digest.hexdigest()
+
+    def _file(self, skeleton: str) -> Path:
+        return self.cache_dir / f"{self.key(skeleton)}.json"
+
+    def get(self, skeleton: str) -> Layout | None:
+        try:
+            with self._file(skeleton).open("r") as fp:
+                return Layout.from_dict(json.load(fp))
+        except (OSError, ValueError, KeyError, TypeError):
+            # missing or unusable, has to be laid out again
+            return None
+
+    def put(self, skeleton: str, layout: Layout):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+            # write atomically, concurrent runs may read the cache at any time
+            with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".tmp", delete=False) as fp:
+                try:
+                    json.dump(layout.to_dict(), fp)
+                except Exception:
+                    os.unlink(fp.name)
+                    raise
+            os.replace(fp.name, self._file(skeleton))
+        except OSError:
+            # not being able to cache is not an error
+            pass
@@ -0,0 +1,303 @@
+"""
+Copyright: 2025 Auxsys
+
+Long-running visualization server. All descriptions are loaded once at
+startup, requests then only parse the memory dump and render the graph.
+
+    GET  /socs                  list of the loaded SOCs
+    GET  /render/<soc>?...      graph without memory state
+    POST /render/<soc>?...      graph for the memory dump in the request body
+    GET  /address/<soc>?address=ADDRESS[:BIT[-BIT]]
+                                clocks reading the register and the clocks they feed,
+                                POST a dump to only follow its active connections
+
+Render parameters (query string):
+    format              `dot` (default), `svg`, `png`, `pdf` or `json`
+    memory_format       suffix of the dump (default `ihex`), see SparseMemory.parse_file
+    base_address        address of the first byte of raw binary dumps
+    query               clock to query
+    only_show_config    show only active nodes and edges (requires a dump)
+    only_show_query     show only the nodes and edges of the query
+    title               title of the graph
+
+Requests are handled concurrently, each SOC keeps the parsed memory graphs
+and the results of its most recent requests.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Hashable, TypeVar
+from urllib.parse import urlsplit, parse_qs, unquote
+import hashlib
+import json
+import socketserver
+import threading
+import traceback
+
+from .graphs import ClockGraph, MemoryClockGraph, ClockLoopError, address_report, parse_address
+from .filters import FilterAccumulator, QueryFilter, MemoryVisFilter
+from .grapher import Grapher, RenderError
+from .layoutcache import LayoutCache
+from .utils import SparseMemory
+from .utils.sparse_memory import ParsingError, UnknownFiletypeError, MissingBaseAddressError
+
+# graphviz formats that can be requested, besides `dot` and `json`
+RENDER_FORMATS = {"svg", "png", "pdf"}
+
+CONTENT_TYPES = {
+    "dot": "text/vnd.graphviz; charset=utf-8",
+    "json": "application/json",
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "pdf": "application/pdf",
+}
+
+# entries kept per SOC
+MEMORY_CACHE_SIZE = 16
+RESULT_CACHE_SIZE = 64
+
+# largest dump accepted in a request body
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+T = TypeVar("T")
+
+class RequestError(Exception):
+    """Invalid request, reported to the client with the status"""
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+class LRUCache:
+    """Thread safe cache of the most recently used entries"""
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._entries: OrderedDict[Hashable, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, create: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]  # type: ignore
+
+        # created outside of the lock, so other requests are not blocked
+        value = create()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+@dataclass(frozen=True)
+class RenderOptions:
+    fmt: str = "dot"
+    memory_format: str = "ihex"
+    base_address: int | None = None
+    query: str | None = None
+    only_show_config: bool = False
+    only_show_query: bool = False
+    title: str | None = None
+
+    @classmethod
+    def from_query(cls, query: str) -> "RenderOptions":
+        params = parse_qs(query)
+        def get(name: str) -> str | None:
+            return params[name][-1] if name in params else None
+        def flag(name: str) -> bool:
+            return (get(name) or "0").lower() not in ("0", "false", "no", "")
+
+        fmt = get("format") or "dot"
+        if fmt not in RENDER_FORMATS | {"dot", "json"}:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown format `{fmt}`")
+
+        try:
+            base_address = None if (base := get("base_address")) is None else int(base, 0)
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Invalid base address")
+
+        return cls(
+            fmt=fmt,
+            memory_format=(get("memory_format") or "ihex").lstrip("."),
+            base_address=base_address,
+            query=get("query"),
+            only_show_config=flag("only_show_config"),
+            only_show_query=flag("only_show_query"),
+            title=get("title"),
+        )
+
+class SocContext:
+    """A preloaded description with its caches"""
+    def __init__(self, name: str, graph: ClockGraph, layout_cache: LayoutCache | None = None) -> None:
+        self.name = name
+        self.graph = graph
+        self.layout_cache = layout_cache
+
+        self.memories = LRUCache(MEMORY_CACHE_SIZE)
+        self.results = LRUCache(RESULT_CACHE_SIZE)
+
+    def memory_graph(self, dump: bytes, options: RenderOptions) -> MemoryClockGraph:
+        def parse() -> MemoryClockGraph:
+            try:
+                memory = SparseMemory.parse_bytes(dump, f".{options.memory_format}",
+                                                  base_address=options.base_address)
+            except UnknownFiletypeError as e:
+                raise RequestError(HTTPStatus.BAD_REQUEST,
+                                   f"Unknown memory format, supported are: {', '.join(e.supported)}")
+            except (ParsingError, MissingBaseAddressError) as e:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Memory dump could not be parsed: {e}")
+            return MemoryClockGraph(self.graph, memory)
+
+        key = (hashlib.sha256(dump).digest(), options.memory_format, options.base_address)
+        return self.memories.get(key, parse)
+
+    def grapher(self, dump: bytes | None, options: RenderOptions) -> Grapher:
+        mem_graph = None if dump is None else self.memory_graph(dump, options)
+        if options.only_show_config and mem_graph is None:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "only_show_config requires a memory dump")
+
+        filters = FilterAccumulator(show_hidden=not options.only_show_query)
+        if options.query is not None:
+            queryclk = self.graph.get_clk(options.query)
+            if queryclk is None:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown clock {options.query}")
+            try:
+                filters.add_filter(QueryFilter(self.graph if mem_graph is None else mem_graph, queryclk))
+            except ClockLoopError as e:
+                raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+
+        if mem_graph is not None:
+            filters.add_filter(MemoryVisFilter(mem_graph))
+
+        graph = mem_graph if mem_graph is not None and options.only_show_config else self.graph
+        return Grapher(graph, filters, options.title)
+
+    def render(self, dump: bytes | None, options: RenderOptions) -> bytes:
+        """The graph for the dump (or without memory state if None) in the requested format"""
+        def render() -> bytes:
+            grapher = self.grapher(dump, options)
+            if options.fmt == "json":
+                return json.dumps(grapher.build_json()).encode()
+            try:
+                return grapher.render_bytes(options.fmt, self.layout_cache)
+            except RenderError as e:
+                raise RequestError(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+
+        key = (None if dump is None else hashlib.sha256(dump).digest(), options)
+        return self.results.get(key, render)
+
+    def address(self, dump: bytes | None, query: str) -> dict:
+        """See `address_report`, the dump (if given) selects the active connections"""
+        text = parse_qs(query).get("address", [""])[-1]
+        try:
+            address, bits = parse_address(text)
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid address `{text}`, expected ADDRESS[:BIT[-BIT]]")
+
+        options = RenderOptions.from_query(query)
+        graph = self.graph if dump is None else self.memory_graph(dump, options)
+        return address_report(graph, address, bits)
+
+def load_socs(soc_dir: Path, loader: Callable[[Path], ClockGraph] | None = None,
+              layout_cache: LayoutCache | None = None) -> dict[str, SocContext]:
+    """Load every description of the directory, `loader` defaults to parsing the yaml"""
+    def from_yaml(soc_file: Path) -> ClockGraph:
+        with soc_file.open("r") as fp:
+            return ClockGraph.from_yaml(fp)
+
+    loader = loader or from_yaml
+    return {
+        soc_file.stem: SocContext(soc_file.stem, loader(soc_file), layout_cache)
+        for soc_file in sorted(Path(soc_dir).glob("*.yaml"))
+    }
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server: "ClockVisServer"  # type: ignore
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self) -> str:
+        # unix sockets have no client address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def send(self, status: HTTPStatus, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_error_message(self, status: HTTPStatus, message: str):
+        self.send(status, "application/json", json.dumps({ "error": message }).encode())
+
+    def handle_request(self, dump: bytes | None):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+
+        try:
+            match parts:
+                case ["socs"]:
+                    body = json.dumps({ "socs": list(self.server.socs) }).encode()
+                    self.send(HTTPStatus.OK, "application/json", body)
+                case ["render", soc]:
+                    if soc not in self.server.socs:
+                        raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown soc `{soc}`")
+                    options = RenderOptions.from_query(url.query)
+                    body = self.server.socs[soc].render(dump, options)
+                    self.send(HTTPStatus.OK, CONTENT_TYPES[options.fmt], body)
+                case ["address", soc]:
+                    if soc not in self.server.socs:
+                        raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown soc `{soc}`")
+                    body = json.dumps(self.server.socs[soc].address(dump, url.query)).encode()
+                    self.send(HTTPStatus.OK, "application/json", body)
+                case _:
+                    raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown path `{url.path}`")
+        except RequestError as e:
+            self.send_error_message(e.status, str(e))
+        except Exception as e:
+            self.log_error("%s", traceback.format_exc())
+            self.send_error_message(HTTPStatus.INTERNAL_SERVER_ERROR, f"{e.__class__.__name__}: {e}")
+
+    def do_GET(self):
+        self.handle_request(None)
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # the body can not be skipped, so the connection can not be reused
+            self.close_connection = True
+            self.send_error_message(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+            return
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True
+            self.send_error_message(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                    f"Dumps are limited to {MAX_BODY_SIZE // (1024 * 1024)} MiB")
+            return
+        self.handle_request(self.rfile.read(length) if length > 0 else None)
+
+class ClockVisServer(ThreadingHTTPServer):
+    """HTTP server on a TCP address"""
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], socs: dict[str, SocContext]) -> None:
+        self.socs = socs
+        super().__init__(address, RequestHandler)
+
+class UnixClockVisServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a unix socket"""
+    daemon_threads = True
+
+    def __init__(self, path: str, socs: dict[str, SocContext]) -> None:
+        self.socs = socs
+        super().__init__(path, RequestHandler)
@@ -0,0 +1,84 @@
+"""
+Copyright: 2025 Auxsys
+
+Export of the resolved clock state of a memory dump as JSON or CSV, without
+building a graph for graphviz. The clocks are written one by one into a
+`write` function (e.g. `fp.write`), so the document is never held in memory.
+
+Every clock has its type, enable state (clocks only), selected mux input
+(muxes only), active input, frequency, divisor (dividers only), the values of
+its register fields and the raw values of its register words.
+"""
+from typing import Callable, Iterator
+import json
+import math
+
+from .graphs import ClockType, ClockLoopError, MemoryClockGraph
+from .graphs.memoryclockgraph import ParsedClock, ParsedMux, ParsedDiv
+
+CSV_COLUMNS = ["clock", "type", "enabled", "selected", "input", "frequency", "divisor", "fields", "registers"]
+
+def _number(value: float | None) -> float | None:
+    # json has no inf / nan
+    return None if value is None or not math.isfinite(value) else value
+
+def clock_state(graph: MemoryClockGraph, clk: ClockType, frequencies: dict[ClockType, float | None]) -> dict:
+    """The resolved state of a single clock"""
+    parsed = graph.get_parsed_for_clk(clk)
+    inputs = graph.list_inputs_for_clk(clk)
+
+    return {
+        "name": clk.name,
+        "type": clk.__class__.__name__.lower(),
+        "enabled": parsed.is_enabled if isinstance(parsed, ParsedClock) else None,
+        "selected": parsed.choosen if isinstance(parsed, ParsedMux) else None,
+        "input": inputs[0].name if inputs else None,
+        "frequency": _number(frequencies.get(clk)),
+        "divisor": _number(parsed.value) if isinstance(parsed, ParsedDiv) else None,
+        "fields": graph.get_fields(clk),
+        "registers": { f"0x{addr:X}": value for addr, (value, _) in graph.get_registers(clk).items() },
+    }
+
+def iter_clock_states(graph: MemoryClockGraph) -> Iterator[dict]:
+    """The state of every clock, in the order of the description"""
+    try:
+        frequencies = graph.get_frequencies()
+    except ClockLoopError:
+        frequencies = {}  # no frequencies in loops
+
+    for clk in graph.get_clks():
+        yield clock_state(graph, clk, frequencies)
+
+def write_json(graph: MemoryClockGraph, write: Callable[[str], object], **info: object):
+    """`{...info, "clocks": [...]}`, one clock per line"""
+    write("{")
+    for key, value in info.items():
+        write(f"{json.dumps(key)}: {json.dumps(value)}, ")
+    write('"clocks": [')
+    for idx, state in enumerate(iter_clock_states(graph)):
+        write(("\n  " if idx == 0 else ",\n  ") + json.dumps(state))
+    write("\n]}\n")
+
+def _csv_field(value: object) -> str:
+    text = "" if value is None else str(int(value)) if isinstance(value, bool) else str(value)
+    if any(c in text for c in ',"\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+def write_csv(graph: MemoryClockGraph, write: Callable[[str], object], *, header: bool = True,
+              prefix: dict[str, object] | None = None):
+    """
+    One row per clock (see CSV_COLUMNS), fields and registers as
+    `name=value` pairs separated by `;`. The `prefix` columns (e.g. the name
+    of the dump in batch runs) come first.
+    """
+    prefix = prefix or {}
+    if header:
+        write(",".join([*prefix, *CSV_COLUMNS]) + "\n")
+    lead = "".join(_csv_field(value) + "," for value in prefix.values())
+
+    for state in iter_clock_states(graph):
+        fields = ";".join(f"{name}={value}" for name, value in state["fields"].items())
+        registers = ";".join(f"{addr}=0x{value:X}" for addr, value in state["registers"].items())
+        row = [state["name"]] + [state[column] for column in CSV_COLUMNS[1:7]] + [fields, registers]
+        write(lead + ",".join(_csv_field(value) for value in row) + "\n")
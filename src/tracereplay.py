@@ -0,0 +1,163 @@
+"""
+Copyright: 2025 Auxsys
+
+Replay of register write traces. The writes are applied one after another
+to a single `MemoryClockGraph`, which decodes only the register words
+overlapping a write again (see `MemoryClockGraph.apply_writes`). Every change
+of a clock's resolved state (enable, active input, divisor) is emitted into a
+timeline.
+
+Trace format, one write per line (`#` starts a comment):
+
+    TIMESTAMP ADDRESS VALUE [SIZE]
+
+separated by whitespace or commas. Numbers may be given in any python
+integer notation (e.g. `0x50000280`), the timestamp may also be a float.
+SIZE is the number of bytes written (default 4), values are little-endian.
+The first line may be a header naming these columns.
+"""
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from .graphs import ClockGraph, MemoryClockGraph, ClockType
+from .graphs.memoryclockgraph import ParsedClock, ParsedDiv
+from .utils import SparseMemory
+from .utils.sparse_memory import ParsingError
+
+# column names of an optional header line of a trace
+TRACE_COLUMNS = ("timestamp", "address", "value", "size")
+
+@dataclass(frozen=True)
+class ClockState:
+    enabled: bool | None    # clocks only
+    input: str | None       # active input, None for sources and reserved mux inputs
+    divisor: float | None   # dividers only
+
+class Timeline:
+    """Receives the state changes as (timestamp, clock, state), None is the initial state"""
+    def add(self, timestamp: float | None, clk: ClockType, state: ClockState):
+        raise NotImplementedError()
+
+    def close(self):
+        """Called once the replay succeeded"""
+        ...
+
+class CsvTimeline(Timeline):
+    """Streams the changes as csv rows `timestamp,clock,enabled,input,divisor`"""
+    def __init__(self, fp: IO[str]) -> None:
+        self._fp = fp
+        self._fp.write("timestamp,clock,enabled,input,divisor\n")
+
+    def add(self, timestamp: float | None, clk: ClockType, state: ClockState):
+        enabled = "" if state.enabled is None else int(state.enabled)
+        self._fp.write(f"{'' if timestamp is None else timestamp},{clk.name},{enabled},"
+                       f"{state.input or ''},{'' if state.divisor is None else state.divisor}\n")
+
+    def close(self):
+        self._fp.flush()
+
+class NpzTimeline(Timeline):
+    """
+    Columns in a numpy `.npz` file: `timestamp` (float64, NaN for the initial
+    state), `clock` / `input` (int32 indices into `clocks`, -1 for no input),
+    `enabled` (int8, -1 for clocks without an enable) and `divisor` (float64,
+    NaN for clocks without a divider). Collected in compact arrays and
+    written on close.
+    """
+    def __init__(self, file: Path | str) -> None:
+        self._file = file
+        self._timestamp, self._divisor = array("d"), array("d")
+        self._clock, self._input, self._enabled = array("i"), array("i"), array("b")
+        self._clocks: dict[str, int] = {}
+
+    def add(self, timestamp: float | None, clk: ClockType, state: ClockState):
+        self._timestamp.append(float("nan") if timestamp is None else timestamp)
+        self._clock.append(self._clocks.setdefault(clk.name, len(self._clocks)))
+        self._input.append(-1 if state.input is None else self._clocks.setdefault(state.input, len(self._clocks)))
+        self._enabled.append(-1 if state.enabled is None else int(state.enabled))
+        self._divisor.append(float("nan") if state.divisor is None else state.divisor)
+
+    def close(self):
+        import numpy as np
+
+        np.savez(
+            self._file,
+            timestamp=np.frombuffer(self._timestamp, dtype=np.float64),
+            clock=np.frombuffer(self._clock, dtype=np.int32),
+            input=np.frombuffer(self._input, dtype=np.int32),
+            enabled=np.frombuffer(self._enabled, dtype=np.int8),
+            divisor=np.frombuffer(self._divisor, dtype=np.float64),
+            clocks=np.array(list(self._clocks)),
+        )
+
+def _is_header(content: list[str]) -> bool:
+    names = [column.lower() for column in content]
+    return names[0] in ("time", "timestamp") and names[1:] == list(TRACE_COLUMNS[1:len(names)])
+
+def read_trace(lines: Iterable[str]) -> Iterator[tuple[float, int, bytes]]:
+    """Stream the writes of a trace as (timestamp, address, data)"""
+    for line_n, line in enumerate(lines, start=1):
+        content = line.partition("#")[0].replace(",", " ").split()
+        if not content:
+            continue
+
+        try:
+            if len(content) not in (3, 4):
+                raise ValueError(f"Expected 3 or 4 columns, got {len(content)}")
+            if line_n == 1 and _is_header(content):
+                continue
+            try:
+                timestamp: float = int(content[0], 0)
+            except ValueError:
+                timestamp = float(content[0])
+            size = int(content[3], 0) if len(content) == 4 else 4
+            data = int(content[2], 0).to_bytes(size, "little")
+            yield timestamp, int(content[1], 0), data
+        except (ValueError, OverflowError) as e:
+            raise ParsingError(line_n, line.rstrip("\n"), e)
+
+class TraceReplay:
+    """
+    Applies writes to the memory and tracks the resolved state of all clocks
+    of the graph. Only the clocks reading a written register are evaluated
+    again.
+    """
+    def __init__(self, graph: ClockGraph, memory: SparseMemory) -> None:
+        self._graph = MemoryClockGraph(graph, memory)
+        self._state = { clk: self._resolve(clk) for clk in self._graph.get_clks() }
+
+    def _resolve(self, clk: ClockType) -> ClockState:
+        parsed = self._graph.get_parsed_for_clk(clk)
+        inputs = self._graph.list_inputs_for_clk(clk)
+        return ClockState(
+            parsed.is_enabled if isinstance(parsed, ParsedClock) else None,
+            inputs[0].name if inputs else None,
+            parsed.value if isinstance(parsed, ParsedDiv) else None,
+        )
+
+    def state(self) -> dict[ClockType, ClockState]:
+        return dict(self._state)
+
+    def apply(self, address: int, data: bytes) -> list[tuple[ClockType, ClockState]]:
+        """Write into the memory, returns the clocks whose state changed with their new state"""
+        changes = []
+        for clk in sorted(self._graph.apply_writes([(address, data)]), key=lambda clk: clk.index):
+            state = self._resolve(clk)
+            if state != self._state[clk]:
+                self._state[clk] = state
+                changes.append((clk, state))
+        return changes
+
+    def replay(self, writes: Iterable[tuple[float, int, bytes]], timeline: Timeline) -> int:
+        """Apply all writes, the initial state and every change go into the timeline. Returns the number of writes"""
+        for clk, state in self._state.items():
+            timeline.add(None, clk, state)
+
+        count = 0
+        for timestamp, address, data in writes:
+            for clk, state in self.apply(address, data):
+                timeline.add(timestamp, clk, state)
+            count += 1
+        return count
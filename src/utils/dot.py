@@ -0,0 +1,123 @@
+"""
+Copyright: 2025 Auxsys
+
+Minimal writer for graphviz DOT source. Mirrors the subset of the
+`graphviz.Digraph` interface (and its output format) we need to build the
+graph. Rendering is done by piping the source into the `dot` executable.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator
+import re
+
+_ID = re.compile(r"([a-zA-Z_][a-zA-Z0-9_]*|-?(\.[0-9]+|[0-9]+(\.[0-9]*)?))$")
+_KEYWORDS = {"graph", "edge", "subgraph", "strict", "node", "digraph"}
+_UNESCAPED_QUOTE = re.compile(r'(?P<escaped_backslashes>(?:\\{2})*)\\?(?P<literal_quote>")')
+
+def quote(identifier: str) -> str:
+    """Return DOT identifier from string, quote if needed (HTML strings are kept)"""
+    if identifier.startswith("<") and identifier.endswith(">"):
+        return identifier
+    if not _ID.match(identifier) or identifier.lower() in _KEYWORDS:
+        return '"' + _UNESCAPED_QUOTE.sub(r"\g<escaped_backslashes>\\\g<literal_quote>", identifier) + '"'
+    return identifier
+
+def quote_edge(identifier: str) -> str:
+    """Return DOT node id with optional port and compass point"""
+    node, _, rest = identifier.partition(":")
+    parts = [quote(node)]
+    if rest:
+        port, _, compass = rest.partition(":")
+        parts.append(quote(port))
+        if compass:
+            parts.append(compass)
+    return ":".join(parts)
+
+def a_list(label: str | None = None, attrs: dict[str, str | None] | None = None) -> str:
+    result = [f"label={quote(label)}"] if label is not None else []
+    if attrs:
+        result += [f"{quote(k)}={quote(v)}" for k, v in sorted(attrs.items()) if v is not None]
+    return " ".join(result)
+
+def attr_list(label: str | None = None, attrs: dict[str, str | None] | None = None) -> str:
+    content = a_list(label, attrs)
+    return f" [{content}]" if content else ""
+
+class DotGraph:
+    """
+    Directed graph collecting DOT statements
+
+    If a `sink` is given, the graph is streamed instead: the header is written
+    right away, every statement is passed to the sink as soon as it is added
+    and `close()` writes the closing brace. Nothing is kept in memory.
+    """
+    def __init__(self, name: str | None = None, *,
+                 graph_attr: dict[str, str | None] | None = None,
+                 node_attr: dict[str, str | None] | None = None,
+                 edge_attr: dict[str, str | None] | None = None,
+                 sink: Callable[[str], object] | None = None) -> None:
+        self.name = name
+        self.graph_attr = dict(graph_attr or {})
+        self.node_attr = dict(node_attr or {})
+        self.edge_attr = dict(edge_attr or {})
+        self.body: list[str] = []
+
+        self._sink = sink
+        if self._sink is not None:
+            for line in self._head():
+                self._sink(line)
+
+    def _add(self, line: str):
+        if self._sink is not None:
+            self._sink(line)
+        else:
+            self.body.append(line)
+
+    def close(self):
+        """Finish a streamed graph"""
+        if self._sink is not None:
+            self._sink("}\n")
+            self._sink = None
+
+    def node(self, name: str, label: str | None = None, **attrs: str | None):
+        self._add(f"\t{quote(name)}{attr_list(label, attrs)}\n")
+
+    def edge(self, tail_name: str, head_name: str, **attrs: str | None):
+        self._add(f"\t{quote_edge(tail_name)} -> {quote_edge(head_name)}{attr_list(None, attrs)}\n")
+
+    def attr(self, **attrs: str | None):
+        if attrs:
+            self._add(f"\t{a_list(None, attrs)}\n")
+
+    @contextmanager
+    def _subgraph_context(self) -> Iterator["DotGraph"]:
+        graph = DotGraph()
+        yield graph
+        self.subgraph(graph)
+
+    def subgraph(self, graph: "DotGraph | None" = None):
+        """Add the subgraph, or without argument, return a context manager creating one"""
+        if graph is None:
+            return self._subgraph_context()
+        for line in graph.lines(subgraph=True):
+            self._add(f"\t{line}")
+
+    def _head(self, subgraph: bool = False) -> Iterator[str]:
+        name = f"{quote(self.name)} " if self.name else ""
+        if subgraph:
+            yield f"subgraph {name}{{\n" if self.name else "{\n"
+        else:
+            yield f"digraph {name}{{\n"
+
+        for kw in ("graph", "node", "edge"):
+            if attrs := getattr(self, f"{kw}_attr"):
+                yield f"\t{kw}{attr_list(None, attrs)}\n"
+
+    def lines(self, subgraph: bool = False) -> Iterator[str]:
+        """Yield the DOT source line by line (each ending with a newline)"""
+        yield from self._head(subgraph)
+        yield from self.body
+        yield "}\n"
+
+    @property
+    def source(self) -> str:
+        return "".join(self.lines())
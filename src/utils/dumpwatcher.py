@@ -0,0 +1,104 @@
+"""
+Copyright: 2025 Auxsys
+
+Follows a memory file that is rewritten over time (e.g. re-dumped from gdb)
+and works out which parts of the memory changed. For Intel Hex files only
+the records that differ from the previous version are decoded again.
+"""
+from pathlib import Path
+import io
+import os
+
+from .sparse_memory import SparseMemory
+
+def _line_bases(lines: list[str]) -> list[int]:
+    """Extended address in effect at the start of every line, without decoding the data records"""
+    bases, base = [], 0
+    for line in lines:
+        bases.append(base)
+        pos = line.find(":")
+        while pos >= 0:
+            match line[pos + 7:pos + 9]:
+                case "02":
+                    base = int(line[pos + 9:pos + 13], 16) << 4
+                case "04":
+                    base = int(line[pos + 9:pos + 13], 16) << 16
+            pos = line.find(":", pos + 1)
+    return bases
+
+def _data_headers(line: str) -> list[str] | None:
+    """Byte count and address of the records in the line, None if it is not only data records"""
+    headers = []
+    pos = line.find(":")
+    while pos >= 0:
+        if line[pos + 7:pos + 9] != "00":
+            return None
+        headers.append(line[pos + 1:pos + 7])
+        pos = line.find(":", pos + 1)
+    return headers
+
+class DumpWatcher:
+    def __init__(self, file: Path, *, filler_byte: int | None = 0x00, base_address: int | None = None) -> None:
+        self.file = Path(file)
+        self.filler_byte = filler_byte
+        self.base_address = base_address
+
+        self._stat: tuple[int, int] | None = None
+        # records of the last read intel hex file
+        self._lines: list[str] | None = None
+        self._bases: list[int] = []
+
+    def _file_stat(self) -> tuple[int, int] | None:
+        try:
+            st = os.stat(self.file)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def modified(self) -> bool:
+        """The file was written since it was last read"""
+        return self._file_stat() != self._stat
+
+    def read(self) -> SparseMemory:
+        """Parse the complete file"""
+        stat = self._file_stat()
+        if self.file.suffix.lower() == ".ihex":
+            lines = self.file.read_text().splitlines()
+            memory = SparseMemory.from_intelhex(io.StringIO("\n".join(lines)), filler_byte=self.filler_byte)
+            self._lines, self._bases = lines, _line_bases(lines)
+        else:
+            memory = SparseMemory.parse_file(self.file, filler_byte=self.filler_byte, base_address=self.base_address)
+        self._stat = stat
+        return memory
+
+    def diff(self) -> list[tuple[int, bytes]] | None:
+        """
+        Writes `(address, data)` turning the memory of the last read into the
+        current one. Only changed data records are decoded. None if the file
+        can not be followed incrementally (other formats, changed structure)
+        and has to be read again.
+        """
+        if self._lines is None:
+            return None
+
+        stat = self._file_stat()
+        lines = self.file.read_text().splitlines()
+        if len(lines) != len(self._lines):
+            return None
+
+        writes = []
+        for idx, (old, new) in enumerate(zip(self._lines, lines)):
+            if old == new:
+                continue
+            # only the data may differ, otherwise the old data has to be removed
+            # or the addresses of the following records may have changed
+            headers = _data_headers(new)
+            if headers is None or headers != _data_headers(old):
+                return None
+
+            changed = SparseMemory(self.filler_byte)
+            changed.write_intelhex(io.StringIO(new), base_address=self._bases[idx])
+            writes += [(segment.start, bytes(data)) for segment, data in changed.segments()]
+
+        self._lines, self._stat = lines, stat
+        return writes
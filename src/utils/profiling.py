@@ -0,0 +1,159 @@
+"""
+Copyright: 2025 Auxsys
+
+Lightweight instrumentation of the processing stages. Library code marks its
+stages with `stage(name)` and counts hot-path events with `count(name)`,
+both do nothing unless a `Profiler` is active in the current context:
+
+    with Profiler() as profiler:
+        ...
+    report = profiler.report()
+
+Every stage records its wall time, CPU time (of this process and of child
+processes such as `dot`) and the peak of the memory allocated while it ran
+(using tracemalloc, which slows down the run noticeably). Nested stages are
+reported by their path (e.g. `load_soc/schema_validation`), repeated stages
+are summed up. The profiler is bound to the context of the thread it was
+entered in, stages in worker threads or processes are not recorded: callers
+fanning out work time the pool as a whole instead.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+import os
+import time
+
+_active: ContextVar["Profiler | None"] = ContextVar("profiler", default=None)
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    child_cpu: float = 0.0
+    peak_alloc: int = 0
+
+    def to_json(self) -> dict:
+        return {
+            "calls": self.calls, "wall_ms": round(self.wall * 1000, 3), "cpu_ms": round(self.cpu * 1000, 3),
+            "child_cpu_ms": round(self.child_cpu * 1000, 3), "peak_alloc_bytes": self.peak_alloc,
+        }
+
+class _Frame:
+    __slots__ = ("path", "start_alloc", "peak")
+
+    def __init__(self, path: str, start_alloc: int, peak: int) -> None:
+        self.path = path
+        self.start_alloc = start_alloc
+        self.peak = peak
+
+def _times() -> tuple[float, float, float]:
+    """Wall time, CPU time of the process and of its finished children"""
+    t = os.times()
+    return time.perf_counter(), time.process_time(), t.children_user + t.children_system
+
+class Profiler:
+    def __init__(self, *, trace_allocations: bool = True) -> None:
+        self.stages: dict[str, StageStats] = {}
+        self.counters: dict[str, int] = {}
+        self._trace_allocations = trace_allocations
+        self._started_tracing = False
+        self._stack: list[_Frame] = []
+        self._token = None
+        self._start = (0.0, 0.0, 0.0)
+        self._total = StageStats()
+
+    def __enter__(self) -> "Profiler":
+        if self._trace_allocations:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+        self._token = _active.set(self)
+        self._start = _times()
+        return self
+
+    def __exit__(self, *exc):
+        end = _times()
+        self._total.calls += 1
+        self._total.wall += end[0] - self._start[0]
+        self._total.cpu += end[1] - self._start[1]
+        self._total.child_cpu += end[2] - self._start[2]
+        if self._trace_allocations:
+            import tracemalloc
+            self._total.peak_alloc = max(self._total.peak_alloc, tracemalloc.get_traced_memory()[1])
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+        assert self._token is not None
+        _active.reset(self._token)
+        self._token = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        path = f"{self._stack[-1].path}/{name}" if self._stack else name
+        # created up front, so the stages are reported in the order they started
+        stats = self.stages.setdefault(path, StageStats())
+
+        tracing = False
+        if self._trace_allocations:
+            import tracemalloc
+            tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            frame = _Frame(path, current, current)
+        else:
+            frame = _Frame(path, 0, 0)
+
+        self._stack.append(frame)
+        start = _times()
+        try:
+            yield
+        finally:
+            end = _times()
+            self._stack.pop()
+
+            stats.calls += 1
+            stats.wall += end[0] - start[0]
+            stats.cpu += end[1] - start[1]
+            stats.child_cpu += end[2] - start[2]
+            if tracing:
+                frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+                stats.peak_alloc = max(stats.peak_alloc, frame.peak - frame.start_alloc)
+                if self._stack:
+                    self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> dict:
+        """All stages and counters, ready to be written as JSON"""
+        return {
+            "total": self._total.to_json(),
+            "stages": { path: stats.to_json() for path, stats in self.stages.items() },
+            "counters": dict(self.counters),
+        }
+
+def active_profiler() -> Profiler | None:
+    return _active.get()
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Record the enclosed code as stage of the active profiler, if there is one"""
+    profiler = _active.get()
+    if profiler is None:
+        yield
+    else:
+        with profiler.stage(name):
+            yield
+
+def count(name: str, n: int = 1):
+    """Count an event in the active profiler, if there is one"""
+    profiler = _active.get()
+    if profiler is not None:
+        profiler.count(name, n)
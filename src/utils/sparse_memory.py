@@ -4,12 +4,19 @@ Copyright: 2025 Auxsys
 Class that handles reading and working on sparse memory. Used to
 represent device memory containing the clock registers.
 """
+from __future__ import annotations
 from functools import total_ordering
-from typing import IO, overload
+from typing import IO, Iterable, Iterator, overload, TYPE_CHECKING
 from pathlib import Path
 from dataclasses import dataclass
+from bisect import bisect_left, bisect_right
+import mmap
+import io
+import os
+import struct
 
-from ..graphs.yamlobjects import AddrObject
+if TYPE_CHECKING:
+    from ..graphs.yamlobjects import AddrObject
 
 class NoDefaultByteException(Exception):
     ...
@@ -19,6 +26,9 @@ class UnknownFiletypeError(Exception):
         super().__init__(*args)
         self.supported = supported
 
+class MissingBaseAddressError(Exception):
+    ...
+
 class ParsingError(Exception):
     def __init__(self, record_number: int, record: str, *args: object) -> None:
         super().__init__(*args)
@@ -50,31 +60,135 @@ class Segment:
 
 
 class SparseMemory:
+    """
+    Sparse byte addressable memory
+
+    The segments are kept in a sorted interval index (parallel lists of start
+    addresses, stop addresses and data), so that point and range lookups are
+    a bisect away. Writes only ever coalesce with their direct neighbours.
+    """
     def __init__(self, default_byte: int | None = 0x00) -> None:
         self._default_byte = default_byte
 
-        self._segments: dict[Segment, bytearray] = {}
-
-    def _cleanup_segments(self):
-        cur_data: None | bytearray = None
-        cur_segs: list = []
-        for seg in [*sorted(self._segments.keys()), None]:
-            if len(cur_segs) > 0 and seg is not None and cur_segs[-1].stop == seg.start:
-                cur_segs.append(seg)
-                assert cur_data is not None, "Yeah this should never be the case"
-                cur_data += self._segments[seg]
+        # sorted, non-overlapping segments [start, stop) with their data
+        self._starts: list[int] = []
+        self._stops: list[int] = []
+        self._data: list[bytearray | memoryview] = []
+
+    def __len__(self) -> int:
+        """Number of segments, not the number of bytes"""
+        return len(self._starts)
+
+    def segments(self) -> Iterator[tuple[Segment, bytearray | memoryview]]:
+        for start, stop, data in zip(self._starts, self._stops, self._data):
+            yield Segment(start, stop), data
+
+    def _find(self, address: int) -> int:
+        """Index of the segment containing the address or -1"""
+        idx = bisect_right(self._starts, address) - 1
+        if idx >= 0 and address < self._stops[idx]:
+            return idx
+        return -1
+
+    def _write(self, start: int, value: bytes | bytearray | memoryview):
+        stop = start + len(value)
+        if stop == start:
+            return
+
+        # fast path: overwriting data within a single (writable) segment
+        idx = self._find(start)
+        if idx >= 0 and stop <= self._stops[idx]:
+            seg_data = self._data[idx]
+            if not (isinstance(seg_data, memoryview) and seg_data.readonly):
+                offset = start - self._starts[idx]
+                seg_data[offset:offset + len(value)] = value
+                return
+
+        # segments [lo, hi) overlap or touch the new data
+        lo = bisect_left(self._stops, start)
+        hi = bisect_right(self._starts, stop)
+
+        # only owned data is merged with directly adjacent segments. Views
+        # (e.g. into memory mapped files) would have to be copied to do so.
+        if lo < hi and self._stops[lo] == start and not isinstance(self._data[lo], bytearray):
+            lo += 1
+        if lo < hi and self._starts[hi - 1] == stop and not isinstance(self._data[hi - 1], bytearray):
+            hi -= 1
+
+        if lo == hi:
+            self._starts.insert(lo, start)
+            self._stops.insert(lo, stop)
+            self._data.insert(lo, bytearray(value))
+            return
+
+        first_start, last_stop = self._starts[lo], self._stops[hi - 1]
+
+        tail = b""
+        if last_stop > stop:
+            # -00[00-]
+            tail = bytes(self._data[hi - 1][stop - self._starts[hi - 1]:])
+
+        if first_start < start:
+            # [-00]00-
+            head = self._data[lo]
+            if isinstance(head, bytearray):
+                # grow the left neighbour in place, this keeps appending
+                # records amortized linear
+                del head[start - first_start:]
+                data = head
             else:
-                if len(cur_segs) > 1:
-                    for cur_seg in cur_segs:
-                        del self._segments[cur_seg]
-                    assert cur_data is not None, "Yeah this should never be the case"
-                    self._segments[Segment(cur_segs[0].start, cur_segs[-1].stop)] = cur_data
+                data = bytearray(head[:start - first_start])
+            data += value
+        else:
+            data = bytearray(value)
+        data += tail
 
-                if seg is None:
-                    break
+        new_start = min(first_start, start)
+        self._starts[lo:hi] = [new_start]
+        self._stops[lo:hi] = [new_start + len(data)]
+        self._data[lo:hi] = [data]
 
-                cur_segs = [seg]
-                cur_data = self._segments[seg].copy()
+    def insert_blocks(self, blocks: Iterable[tuple[int, bytes | bytearray | memoryview]]):
+        """
+        Bulk insert of (address, data) blocks
+
+        Intended for loaders that build the memory in one pass. If the memory
+        is still empty and the blocks do not overlap, the index is built with a
+        single sort and merge. Otherwise each block is written in order, i.e.
+        later blocks overwrite earlier ones. Memoryviews are kept as is
+        (zero-copy) and are not merged with their neighbours.
+        """
+        blocks = [(start, data) for start, data in blocks if len(data) > 0]
+        ordered = sorted(blocks, key=lambda block: block[0])
+
+        overlapping = len(self._starts) > 0 or any(
+            a_start + len(a_data) > b_start
+            for (a_start, a_data), (b_start, _) in zip(ordered, ordered[1:])
+        )
+        if overlapping:
+            for start, data in blocks:
+                self._write(start, data)
+            return
+
+        for start, data in ordered:
+            if isinstance(data, memoryview):
+                self._starts.append(start)
+                self._stops.append(start + len(data))
+                self._data.append(data)
+            elif len(self._starts) > 0 and self._stops[-1] == start and isinstance(self._data[-1], bytearray):
+                self._data[-1] += data
+                self._stops[-1] += len(data)
+            else:
+                self._starts.append(start)
+                self._stops.append(start + len(data))
+                self._data.append(bytearray(data))
+
+    @staticmethod
+    def _check_slice(key: slice):
+        if not (key.step == 1 or key.step is None):
+            raise KeyError("Only stepsize of 1 supported for slice")
+        if key.stop is None or key.start is None:
+            raise KeyError("Open slices are not supported")
 
     @overload
     def __getitem__(self, key: int) -> int:
@@ -86,47 +200,38 @@ class SparseMemory:
 
     def __getitem__(self, key: int | slice) -> int | bytes:
         if isinstance(key, int):
-            for seg in self._segments.keys():
-                if key in seg:
-                    return self._segments[seg][key - seg.start]
+            if (idx := self._find(key)) >= 0:
+                return self._data[idx][key - self._starts[idx]]
             if self._default_byte is None:
                 raise NoDefaultByteException(f"Trying to access bytes that are not in the segments. Disabled due to default_byte = None")
             return self._default_byte
         elif isinstance(key, slice):
-            if not (key.step == 1 or key.step is None):
-                raise KeyError("Only stepsize of 1 supported for slice")
-            if key.stop is None or key.start is None:
-                raise KeyError("Open slices are not supported")
+            self._check_slice(key)
+
+            # -0[00]0-
+            idx = self._find(key.start)
+            if idx >= 0 and key.stop <= self._stops[idx]:
+                offset = self._starts[idx]
+                return bytes(self._data[idx][key.start - offset:key.stop - offset])
 
             filler_byte = 0x00 if self._default_byte is None else self._default_byte
             data = bytearray([filler_byte]) * (key.stop - key.start)
-            filter = bytearray([0] * (key.stop - key.start))
-
-            for seg in self._segments.keys():
-                if seg.start <= key.start and key.stop <= seg.stop:
-                    # -0[00]0-
-                    data = self._segments[seg][key.start - seg.start:key.stop - seg.start]
-                    filter = bytearray([0x11] * (key.stop - key.start))
-                elif key.start <= seg.start and seg.stop <= key.stop:
-                    # [-0000-]
-                    data[seg.start - key.start:seg.stop - key.start] = self._segments[seg]
-                    filter[seg.start - key.start:seg.stop - key.start] = [0x11] * (seg.stop - seg.start)
-                elif key.start <= seg.start and seg.start <= key.stop:
-                    # [-00]00-
-                    data[seg.start - key.start:] = self._segments[seg][:key.stop - seg.start]
-                    filter[seg.start - key.start:] = [0x11] * (key.stop - seg.start)
-                elif key.start <= seg.stop and seg.stop <= key.stop:
-                    # -00[00-]
-                    data[:seg.stop - key.start] = self._segments[seg][key.start - seg.start:]
-                    filter[:seg.stop - key.start] = [0x11] * (len(self._segments[seg]) - (key.start - seg.start))
-
-                assert len(data) == len(filter)
-
-            if self._default_byte is None:
-                if 0x00 in filter:
-                    raise NoDefaultByteException(f"Trying to access bytes that are not in the segments. Disabled due to default_byte = None")
+            covered = 0
+
+            # first segment ending after the start of the slice
+            idx = bisect_right(self._stops, key.start)
+            while idx < len(self._starts) and self._starts[idx] < key.stop:
+                start = max(self._starts[idx], key.start)
+                stop = min(self._stops[idx], key.stop)
+                offset = self._starts[idx]
+                data[start - key.start:stop - key.start] = self._data[idx][start - offset:stop - offset]
+                covered += stop - start
+                idx += 1
+
+            if self._default_byte is None and covered != len(data):
+                raise NoDefaultByteException(f"Trying to access bytes that are not in the segments. Disabled due to default_byte = None")
 
-            return data
+            return bytes(data)
         else:
             raise KeyError(f"Only int and slice supported")
 
@@ -143,49 +248,18 @@ class SparseMemory:
             if not isinstance(value, int):
                 raise ValueError("value is not of type int")
 
-            for seg in self._segments.keys():
-                if key in seg:
-                    self._segments[seg][key - seg.start] = value
-                    return
-
-            self._segments[Segment(key, key + 1)] = bytearray([value])
+            self._write(key, bytes([value]))
         elif isinstance(key, slice):
-            if not isinstance(value, bytes) and not isinstance(value, bytearray):
+            if not isinstance(value, (bytes, bytearray, memoryview)):
                 raise KeyError("value is not of type bytes / bytearray")
-            if not (key.step == 1 or key.step is None):
-                raise KeyError("Only stepsize of 1 supported for slice")
-            if key.stop is None or key.start is None:
-                raise KeyError("Open slices are not supported")
+            self._check_slice(key)
             if key.stop - key.start != len(value):
                 raise ValueError(f"len(value) != len(key) (got {len(value)} == {key.stop - key.start})")
 
-            # remove previous segments that would overlap
-            for seg in list(self._segments.keys()):
-                ovalue = self._segments[seg]
-                if seg.start <= key.start and key.stop <= seg.stop:
-                    # -0[00]0-
-                    del self._segments[seg]
-                    self._segments[Segment(seg.start, key.start)] = ovalue[:key.start - seg.start]
-                    self._segments[Segment(key.stop, seg.stop)] = ovalue[-(seg.stop - key.stop):]
-                elif key.start <= seg.start and seg.stop <= key.stop:
-                    # [-0000-]
-                    del self._segments[seg]
-                elif key.start <= seg.start and seg.start < key.stop:
-                    # [-00]00-
-                    del self._segments[seg]
-                    self._segments[Segment(key.stop, seg.stop)] = ovalue[key.stop - seg.start:]
-                elif key.start < seg.stop and seg.stop <= key.stop:
-                    # -00[00-]
-                    del self._segments[seg]
-                    self._segments[Segment(seg.start, key.start)] = ovalue[:key.start - seg.stop]
-
-            # insert our new segment
-            self._segments[Segment(key.start, key.stop)] = bytearray(value)
+            self._write(key.start, value)
         else:
             raise KeyError(f"Only int and slice supported")
 
-        self._cleanup_segments()
-
     def get_register(self, addr: AddrObject) -> int:
         try:
             register = self[addr.addr:addr.addr + addr.width // 8]
@@ -201,88 +275,246 @@ class SparseMemory:
             raise ValueError(f"Error trying to read register with {addr}", e)
 
     def get_raw(self, start_address: int = 0) -> bytes:
-        data = b""
+        data = bytearray()
 
-        for key in sorted(self._segments.keys()):
-            if key.stop < start_address:
+        for start, stop, seg_data in zip(self._starts, self._stops, self._data):
+            if stop <= start_address:
                 continue
 
             cur_addr = start_address + len(data)
-            assert key.start >= cur_addr, f"There seem to be overlapping segments"
+            assert start >= cur_addr, f"There seem to be overlapping segments"
 
             if self._default_byte is None:
-                if key.start - cur_addr > 0:
+                if start - cur_addr > 0:
                     raise NoDefaultByteException(f"Trying to access bytes that are not in the segments. Disabled due to default_byte = None")
             else:
-                data += bytes([self._default_byte]) * (key.start - cur_addr)  # filling offset
+                data += bytes([self._default_byte]) * (start - cur_addr)  # filling offset
 
-            assert len(v := self._segments[key]) == key.length, f"data len({v}) seems to be different than what is defined in key {key}"
-            data += self._segments[key]  # add our data
+            assert len(seg_data) == stop - start, f"data len({len(seg_data)}) seems to be different than what is defined in segment [{start}, {stop})"
+            data += seg_data  # add our data
 
-        return data
+        return bytes(data)
 
     #######################
     ####    PARSER     ####
     #######################
 
     @classmethod
-    def parse_file(cls, file: Path, *, filler_byte: int | None = 0x00) -> "SparseMemory":
+    def _parser_for(cls, suffix: str, base_address: int | None, file: Path | None):
+        """(file mode, parser) registered for the suffix"""
+        def from_binary(fp: IO[bytes], *, filler_byte: int | None) -> "SparseMemory":
+            address = base_address
+            if address is None:
+                if file is None:
+                    raise MissingBaseAddressError("No base address given for the raw binary.")
+                address = cls.read_base_address(file)
+            return cls.from_binary(fp, base_address=address, filler_byte=filler_byte)
+
         parser_dict = {
-            ".ihex": ("Intel Hex", cls.from_intelhex),
+            ".ihex": ("Intel Hex", "r", cls.from_intelhex),
+            ".bin": ("Raw binary (requires a base address)", "rb", from_binary),
+            ".elf": ("ELF core dump", "rb", cls.from_elf),
+            ".core": ("ELF core dump", "rb", cls.from_elf),
         }
 
-        if file.suffix.lower() in parser_dict:
-            with file.open("r") as fp:
-                return parser_dict[file.suffix.lower()][1](fp, filler_byte=filler_byte)
+        if suffix.lower() in parser_dict:
+            _, mode, parser = parser_dict[suffix.lower()]
+            return mode, parser
         else:
             raise UnknownFiletypeError(
-                f"Memory file with suffix {file.suffix} is not known.",
+                f"Memory file with suffix {suffix} is not known.",
                 supported={k: v[0] for k, v in parser_dict.items() }
             )
 
+    @classmethod
+    def parse_file(cls, file: Path, *, filler_byte: int | None = 0x00,
+                   base_address: int | None = None) -> "SparseMemory":
+        """
+        Parse a memory file using the parser registered for its suffix
+
+        `base_address` is only used by formats that do not carry addresses
+        themselves (raw binaries). If not given, it is read from a sidecar
+        file next to the memory file (e.g. `dump.bin.base`).
+        """
+        mode, parser = cls._parser_for(file.suffix, base_address, file)
+        with file.open(mode) as fp:
+            return parser(fp, filler_byte=filler_byte)
+
+    @classmethod
+    def parse_bytes(cls, data: bytes, suffix: str, *, filler_byte: int | None = 0x00,
+                    base_address: int | None = None) -> "SparseMemory":
+        """
+        Parse the content of a memory file (e.g. received over the network),
+        using the parser registered for `suffix`. Raw binaries require the
+        `base_address`.
+        """
+        mode, parser = cls._parser_for(suffix, base_address, None)
+        if "b" in mode:
+            return parser(io.BytesIO(data), filler_byte=filler_byte)
+        try:
+            text = data.decode("ascii")
+        except UnicodeDecodeError as e:
+            raise ParsingError(0, "", e)
+        return parser(io.StringIO(text), filler_byte=filler_byte)
+
+    @staticmethod
+    def read_base_address(file: Path) -> int:
+        """Read the base address from the sidecar file `<file>.base`"""
+        sidecar = file.with_name(file.name + ".base")
+        if not sidecar.is_file():
+            raise MissingBaseAddressError(
+                f"No base address given for `{file}` and no sidecar file `{sidecar}` found."
+            )
+        return int(sidecar.read_text().strip(), 0)
+
+    @staticmethod
+    def _map_file(indata: IO[bytes]) -> memoryview:
+        """
+        Map the file into memory. Private (copy-on-write) mapping, so the
+        memory can still be written to without touching the file. Pages are
+        only read once they are accessed.
+        """
+        try:
+            fileno = indata.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            # in memory file
+            return memoryview(bytearray(indata.read()))
+
+        if os.fstat(fileno).st_size == 0:
+            return memoryview(b"")
+        return memoryview(mmap.mmap(fileno, 0, access=mmap.ACCESS_COPY))
+
+    @classmethod
+    def from_binary(cls, indata: IO[bytes], *, base_address: int,
+                    filler_byte: int | None = 0x00) -> "SparseMemory":
+        """
+        Create memory from a raw binary dump starting at `base_address`
+        """
+        memory = SparseMemory(filler_byte)
+        memory.insert_blocks([(base_address, cls._map_file(indata))])
+        return memory
+
+    @classmethod
+    def from_elf(cls, indata: IO[bytes], *, filler_byte: int | None = 0x00) -> "SparseMemory":
+        """
+        Create memory from an ELF (core) file using its PT_LOAD segments
+
+        The segment data is not copied, but references the mapped file.
+        Segments with a file size smaller than their memory size (e.g.
+        regions not included in the core dump) are only partially present.
+        """
+        data = cls._map_file(indata)
+        memory = SparseMemory(filler_byte)
+
+        if len(data) < 16 or data[:4] != b"\x7fELF":
+            raise ParsingError(0, "ELF header", ValueError("Missing ELF magic"))
+
+        elf_class, elf_data = data[4], data[5]
+        if elf_class not in (1, 2) or elf_data not in (1, 2):
+            raise ParsingError(0, "ELF header", ValueError(f"Unknown class ({elf_class}) or data encoding ({elf_data})"))
+
+        endian = "<" if elf_data == 1 else ">"
+        try:
+            if elf_class == 1:  # 32 bit
+                phoff, = struct.unpack_from(f"{endian}I", data, 28)
+                phentsize, phnum = struct.unpack_from(f"{endian}HH", data, 42)
+            else:  # 64 bit
+                phoff, = struct.unpack_from(f"{endian}Q", data, 32)
+                phentsize, phnum = struct.unpack_from(f"{endian}HH", data, 54)
+        except struct.error as e:  # truncated, e.g. still being written
+            raise ParsingError(0, "ELF header", e)
+
+        blocks = []
+        for idx in range(phnum):
+            offset = phoff + idx * phentsize
+            try:
+                if elf_class == 1:
+                    p_type, p_offset, p_vaddr, _, p_filesz, _, _, _ = \
+                        struct.unpack_from(f"{endian}8I", data, offset)
+                else:
+                    p_type, _, p_offset, p_vaddr, _, p_filesz, _, _ = \
+                        struct.unpack_from(f"{endian}2I6Q", data, offset)
+            except struct.error as e:
+                raise ParsingError(idx + 1, "ELF program header", e)
+
+            if p_type != 1 or p_filesz == 0:  # only PT_LOAD is of interest
+                continue
+            if p_offset + p_filesz > len(data):
+                raise ParsingError(idx + 1, "ELF program header", ValueError("Segment exceeds file size"))
+
+            blocks.append((p_vaddr, data[p_offset:p_offset + p_filesz]))
+
+        memory.insert_blocks(blocks)
+        return memory
+
     @classmethod
     def from_intelhex(cls, indata: IO[str], *, filler_byte: int | None = 0x00) -> "SparseMemory":
         """
         Create parse memory from Intel Hex format
+
+        The input is streamed line by line. Consecutive data records that
+        continue each other are collected into a single block before being
+        written into memory.
         """
-        record_n, record = 0, ""
-        data = indata.read()
         memory = SparseMemory(filler_byte)
+        memory.write_intelhex(indata)
+        return memory
+
+    def write_intelhex(self, indata: IO[str], *, base_address: int = 0) -> int:
+        """
+        Write Intel Hex records into the memory. `base_address` is the
+        extended address in effect before the first record, the one in
+        effect after the last record is returned.
+        """
+        record_n, record = 0, ""
+        run_start, run = 0, bytearray()
+
+        def flush():
+            if len(run) > 0:
+                self._write(run_start, run)
 
         try:
-            base_address = 0
-            while ":" in data:
-                record_n += 1
-                _, record = data.split(":", maxsplit=1)
-
-                byte_count = int(record[0:2], 16)
-                data = record[8 + byte_count * 2 + 2:]
-                record = record[:8 + byte_count * 2 + 2]
-
-                address = int(record[2:6], 16)
-                record_type = int(record[6:8], 16)
-                chk = int(record[-2:], 16)
-
-                # check checksum
-                if sum(bytes.fromhex(record)) & 0xFF != 0:
-                    raise Exception(f"Invalid Checksum - found 0x{chk:02X}")
-
-                match record_type:
-                    case 0:  # Data
-                        bdata = bytes.fromhex(record[8:8 + byte_count * 2])
-                        memory[base_address + address:base_address + address + byte_count] = bdata
-                    case 1:  # End Of File
-                        if byte_count != 0:
-                            raise ValueError(f"type=0x1 [EOF], byte_count!=0 (got {byte_count})")
-                        break
-                    case 2 | 4:  # Extended Segment Address / Extended Linear Addr
-                        if byte_count != 2:
-                            raise ValueError(f"type=0x2, byte_count!=2 (got {byte_count})")
-
-                        base_address = int(record[8:8 + 4], 16) << (4 if record_type == 2 else 16)
-                    case _:
-                        print(f"Ignoring record with type=`{record_type}`")
-
-            return memory
+            for line in indata:
+                pos = line.find(":")
+                while pos >= 0:
+                    record_n += 1
+
+                    byte_count = int(line[pos + 1:pos + 3], 16)
+                    record = line[pos + 1:pos + 1 + 8 + byte_count * 2 + 2]
+                    pos = line.find(":", pos + 1 + len(record))
+
+                    raw = bytes.fromhex(record)
+                    if len(raw) != 4 + byte_count + 1:
+                        raise ValueError(f"Record is truncated (expected {4 + byte_count + 1} bytes, got {len(raw)})")
+
+                    # check checksum
+                    if sum(raw) & 0xFF != 0:
+                        raise Exception(f"Invalid Checksum - found 0x{raw[-1]:02X}")
+
+                    address = (raw[1] << 8) | raw[2]
+                    record_type = raw[3]
+
+                    match record_type:
+                        case 0:  # Data
+                            address += base_address
+                            if address != run_start + len(run):
+                                flush()
+                                run_start, run = address, bytearray()
+                            run += raw[4:4 + byte_count]
+                        case 1:  # End Of File
+                            if byte_count != 0:
+                                raise ValueError(f"type=0x1 [EOF], byte_count!=0 (got {byte_count})")
+                            flush()
+                            return base_address
+                        case 2 | 4:  # Extended Segment Address / Extended Linear Addr
+                            if byte_count != 2:
+                                raise ValueError(f"type=0x2, byte_count!=2 (got {byte_count})")
+
+                            base_address = ((raw[4] << 8) | raw[5]) << (4 if record_type == 2 else 16)
+                        case _:
+                            print(f"Ignoring record with type=`{record_type}`")
+
+            flush()
+            return base_address
         except Exception as e:
             raise ParsingError(record_n, record, e)
@@ -1 +1,14 @@
 from .sparse_memory import TestSparseMemory
+from .snapshotdecoder import TestSnapshotDecoder
+from .compiledcache import TestCompiledCache
+from .clockgraph import TestClockGraph
+from .startup import TestStartup
+from .grapher import TestGrapher
+from .layoutcache import TestLayoutCache
+from .server import TestServer
+from .dumpwatcher import TestDumpWatcher
+from .tracereplay import TestTraceReplay
+from .frequencies import TestFrequencies
+from .profiling import TestProfiling
+from .stateexport import TestStateExport
+from .fleet import TestFleet
@@ -0,0 +1,173 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the clock graph loader
+"""
+import unittest
+import random
+from pathlib import Path
+from src.graphs import ClockGraph, MemoryClockGraph, Clock, Mux, Div, ClockLoopError, address_report, parse_address
+from src.utils import SparseMemory
+from src.graphs.yamlobjects import AddrObject32LE
+from src.filters import QueryFilter
+from src.graphs.yamlloader import PySocLoader, SocLoader
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+def describe(graph: ClockGraph) -> dict:
+    """Loader independent description of the graph"""
+    def reg(addr):
+        return (addr.__class__, addr.addr, tuple(addr.bit))
+
+    desc = {}
+    for clk in graph.get_clks():
+        match clk:
+            case Clock():
+                enabled = None if clk.is_enabled is None else (clk.is_enabled[0], reg(clk.is_enabled[1]))
+                desc[clk.name] = (clk.__class__, clk.description, enabled, clk.input and clk.input.name)
+            case Mux():
+                inputs = { k: v and v.name for k, v in clk.inputs.items() }
+                desc[clk.name] = (clk.__class__, clk.description, reg(clk.register), inputs)
+            case Div():
+                registers = { k: reg(v) for k, v in clk.registers.items() }
+                desc[clk.name] = (clk.__class__, clk.description, clk.value.original, registers, clk.input.name)
+    return desc
+
+class TestClockGraph(unittest.TestCase):
+    def test_loaders_identical(self):
+        with SOC_FILE.open("r") as fp:
+            py_graph = ClockGraph.from_yaml(fp, loader=PySocLoader)
+        with SOC_FILE.open("r") as fp:
+            graph = ClockGraph.from_yaml(fp, loader=SocLoader)
+
+        self.assertEqual((graph.name, graph.vendor), (py_graph.name, py_graph.vendor))
+        self.assertEqual(describe(graph), describe(py_graph))
+
+    def test_no_global_tags(self):
+        import yaml
+        with SOC_FILE.open("r") as fp:
+            ClockGraph.from_yaml(fp)
+
+        with self.assertRaises(yaml.constructor.ConstructorError):
+            yaml.load("!add [1, 2]", Loader=yaml.Loader)
+
+    def test_adjacency(self):
+        with SOC_FILE.open("r") as fp:
+            graph = ClockGraph.from_yaml(fp)
+
+        for clk in graph.get_clks():
+            consumers = { o for o in graph.get_clks() if clk in (o.list_inputs() or []) }
+            self.assertEqual(graph.list_outputs_for_clk(clk), consumers)
+            self.assertEqual(graph.list_inputs_for_clk(clk), clk.list_inputs() or [])
+
+        self.assertIn(graph.get_clk("clk_xta_osc"), graph.get_input_clks())
+        self.assertNotIn(graph.get_clk("clk_main"), graph.get_input_clks())
+        self.assertIn(graph.get_clk("clk_ahb"), graph.get_output_clks())
+        self.assertNotIn(graph.get_clk("clk_main"), graph.get_output_clks())
+
+    def test_compact(self):
+        with SOC_FILE.open("r") as fp:
+            graph = ClockGraph.from_yaml(fp)
+        compact = graph.compact
+
+        self.assertEqual(compact.clocks[:len(graph.clocks)], list(graph.get_clks()))
+        for idx, clk in enumerate(compact.clocks):
+            self.assertEqual(clk.index, idx)
+            self.assertEqual([compact.clocks[i] for i in compact.inputs(idx)], clk.list_inputs() or [])
+            self.assertEqual({ compact.clocks[i] for i in compact.outputs(idx) }, graph.list_outputs_for_clk(clk))
+            for inp in clk.list_inputs() or []:
+                self.assertTrue(graph.has_edge(inp, clk))
+                self.assertFalse(graph.has_edge(clk, inp))
+
+        # the active edges of a memory graph
+        memory = SparseMemory()
+        memory[0x50000000:0x50001000] = random.Random(0).randbytes(0x1000)
+        mem_graph = MemoryClockGraph(graph, memory)
+        for clk in graph.get_clks():
+            for out in mem_graph.list_outputs_for_clk(clk):
+                self.assertIn(clk, mem_graph.list_inputs_for_clk(out))
+            for inp in mem_graph.list_inputs_for_clk(clk):
+                self.assertTrue(mem_graph.has_edge(inp, clk))
+                self.assertIn(inp, graph.list_inputs_for_clk(clk))
+
+        mux = graph.get_clk("mux_main_clk_a")
+        selected = mux.inputs[mem_graph.get_parsed_for_clk(mux).choosen]
+        self.assertEqual(mem_graph.list_inputs_for_clk(mux), [selected])
+
+    def test_register_index(self):
+        with SOC_FILE.open("r") as fp:
+            graph = ClockGraph.from_yaml(fp)
+        index = graph.get_register_index()
+
+        for clk in graph.get_clks():
+            for reg in clk.used_registers:
+                fields = index.fields_at(reg.addr)
+                self.assertIn(clk, [field.clock for field in fields])
+                self.assertTrue(all(field.register.addr == reg.addr for field in fields))
+
+        mux = graph.get_clk("mux_main_clk_a")
+        self.assertEqual([f.clock for f in index.fields_at(0x50000282)], [mux])
+        self.assertEqual([f.clock for f in index.fields_at(0x50000280, (1, 1))], [mux])
+        self.assertEqual(index.fields_at(0x50000280, (5, 2)), [])
+
+    def test_read_plan(self):
+        with SOC_FILE.open("r") as fp:
+            graph = ClockGraph.from_yaml(fp)
+        plan = graph.read_plan
+
+        memory = SparseMemory()
+        memory[0x50000000:0x50001000] = random.Random(2).randbytes(0x1000)
+        values = plan.read(memory)
+        for field, value in zip(plan.fields, values):
+            self.assertEqual(value, memory.get_register(field.register), field)
+
+        # incremental updates match a freshly parsed graph
+        mem_graph = MemoryClockGraph(graph, memory)
+        mem_graph.apply_writes([(0x50000280, (0b10).to_bytes(4, "little")), (0x50000380, b"\x07")])
+        fresh = MemoryClockGraph(graph, memory)
+        for clk in graph.get_clks():
+            self.assertEqual(mem_graph.get_parsed_for_clk(clk), fresh.get_parsed_for_clk(clk), clk.name)
+            self.assertEqual(mem_graph.get_registers(clk), fresh.get_registers(clk), clk.name)
+            for reg in clk.used_registers:
+                word = int.from_bytes(memory[reg.addr:reg.addr + 4], "little")
+                self.assertEqual(mem_graph.get_registers(clk)[reg.addr], (word, 32), clk.name)
+
+    def test_address_report(self):
+        with SOC_FILE.open("r") as fp:
+            graph = ClockGraph.from_yaml(fp)
+
+        self.assertEqual(parse_address("0x50000280"), (0x50000280, None))
+        self.assertEqual(parse_address("0x50000280:3"), (0x50000280, (3, 3)))
+        self.assertEqual(parse_address("0x50000280:0-7"), (0x50000280, (7, 0)))
+
+        report = address_report(graph, *parse_address("0x50000284:1-0"))
+        self.assertEqual(report["clocks"], ["mux_main_clk_b"])
+        self.assertIn("clk_main", report["downstream"])
+        self.assertEqual(set(report["downstream"]),
+                         {clk.name for clk in graph.list_downstream([graph.get_clk("mux_main_clk_b")])})
+
+    def test_cycles(self):
+        src = Clock("clk_src", "", None, None)
+        mux = Mux("mux_loop", "", AddrObject32LE(0, [0]), {})
+        out = Clock("clk_out", "", None, mux)
+        div = Div("div_back", "", out, None, {})
+        mux.inputs = {0: src, 1: div}
+        graph = ClockGraph("loop", "test", {c.name: c for c in [src, mux, out, div]})
+
+        self.assertEqual(len(graph.get_cycles()), 1)
+        self.assertEqual(set(graph.get_cycles()[0]), {mux, out, div})
+
+        with self.assertRaises(ClockLoopError) as ctx:
+            QueryFilter(graph, src)
+        self.assertIn("mux_loop", str(ctx.exception))
+
+    def test_query_reconvergent(self):
+        with SOC_FILE.open("r") as fp:
+            graph = ClockGraph.from_yaml(fp)
+
+        self.assertEqual(graph.get_cycles(), [])
+        qfilter = QueryFilter(graph, graph.get_clk("clk_main"), show_outputs=False)
+        self.assertEqual({c.name for c in qfilter._filtered_graph}, {
+            "clk_main", "mux_main_clk_b", "mux_main_clk_a", "clk_pll0", "clk_pll1", "mux_pll0_clk",
+            "clk_32k_osc", "clk_fro_12m", "clk_in", "clk_xta_osc", "clk_fro_1m", "clk_fro_hf", "clk_none",
+        })
@@ -0,0 +1,88 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the compiled clock graph cache
+"""
+import unittest
+import tempfile
+import pickle
+from pathlib import Path
+from unittest import mock
+from src.graphs import ClockGraph
+from src.graphs.compiledcache import load_clock_graph
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+class Failing:
+    """Fails with the error of calling `func(*args)` when unpickled"""
+    def __init__(self, func, *args) -> None:
+        self.func, self.args = func, args
+
+    def __reduce__(self):
+        return self.func, self.args
+
+class TestCompiledCache(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self._td.name) / "cache"
+        self.soc_file = Path(self._td.name) / "soc.yaml"
+        self.soc_file.write_bytes(SOC_FILE.read_bytes())
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_cache_hit(self):
+        graph = load_clock_graph(self.soc_file, cache_dir=self.cache_dir)
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 1)
+
+        with mock.patch.object(ClockGraph, "from_yaml", side_effect=AssertionError("cache not used")), \
+             mock.patch.object(ClockGraph, "_build_index", side_effect=AssertionError("index rebuilt")):
+            cached = load_clock_graph(self.soc_file, cache_dir=self.cache_dir)
+
+        self.assertEqual(cached.name, graph.name)
+        self.assertEqual({c.name for c in cached.get_clks()}, {c.name for c in graph.get_clks()})
+        mux = cached.get_clk("mux_main_clk_b")
+        self.assertIs(mux.inputs[0], cached.get_clk("mux_main_clk_a"))
+
+    def test_invalidation(self):
+        load_clock_graph(self.soc_file, cache_dir=self.cache_dir)
+
+        self.soc_file.write_text(self.soc_file.read_text().replace("name: LPC55S51x_DS", "name: changed"))
+        graph = load_clock_graph(self.soc_file, cache_dir=self.cache_dir)
+
+        self.assertEqual(graph.name, "changed")
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 1)
+
+    def test_corrupt(self):
+        graph = load_clock_graph(self.soc_file, cache_dir=self.cache_dir)
+        cache_file, = self.cache_dir.glob("*.pickle")
+        data = cache_file.read_bytes()
+        # any error unpickling is a miss, the entry is written again
+
+        for corrupt in (data[:len(data) // 2], b"garbage", pickle.dumps(Failing(int, "zz")),
+                        pickle.dumps(Failing(int, "1", 2, 3)), pickle.dumps(Failing(dict.__getitem__, {}, "key"))):
+            cache_file.write_bytes(corrupt)
+            rebuilt = load_clock_graph(self.soc_file, cache_dir=self.cache_dir)
+            self.assertEqual(rebuilt.name, graph.name)
+            self.assertIsInstance(pickle.loads(cache_file.read_bytes()), ClockGraph)
+
+    def test_unpicklable(self):
+        with mock.patch("pickle.dumps", side_effect=pickle.PicklingError("lambda")):
+            graph = load_clock_graph(self.soc_file, cache_dir=self.cache_dir)
+        self.assertIsNotNone(graph.get_clk("clk_main"))
+        self.assertFalse(any(self.cache_dir.glob("*.pickle")))
+
+    def test_other_entries_kept(self):
+        self.cache_dir.mkdir()
+        foreign = self.cache_dir / f"soc-{'0' * 64}.pickle"  # e.g. of another version
+        foreign.write_bytes(b"")
+
+        load_clock_graph(self.soc_file, cache_dir=self.cache_dir)
+        load_clock_graph(self.soc_file, schema_file=None, cache_dir=self.cache_dir)
+        self.assertEqual(len(list(self.cache_dir.glob("*.pickle"))), 3)
+
+        # a new revision of the description replaces its own entry only
+        self.soc_file.write_text(self.soc_file.read_text().replace("name: LPC55S51x_DS", "name: changed"))
+        load_clock_graph(self.soc_file, cache_dir=self.cache_dir)
+        self.assertEqual(len(list(self.cache_dir.glob("*.pickle"))), 3)
+        self.assertTrue(foreign.exists())
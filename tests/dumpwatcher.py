@@ -0,0 +1,106 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for following changing memory dumps
+"""
+import unittest
+import tempfile
+import random
+import struct
+from pathlib import Path
+from src.graphs import ClockGraph, MemoryClockGraph
+from src.utils.dumpwatcher import DumpWatcher
+from src.utils.sparse_memory import SparseMemory, ParsingError
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+def record(address: int, data: bytes, record_type: int = 0) -> str:
+    raw = bytes([len(data), address >> 8, address & 0xFF, record_type]) + data
+    return ":" + (raw + bytes([-sum(raw) & 0xFF])).hex().upper()
+
+def intelhex(data: bytes, base: int = 0x50000000) -> str:
+    lines = [record(0, (base >> 16).to_bytes(2, "big"), 4)]
+    lines += [record(offset, data[offset:offset + 16]) for offset in range(0, len(data), 16)]
+    return "\n".join(lines + [record(0, b"", 1)]) + "\n"
+
+def elfcore(data: bytes, base: int = 0x50000000) -> bytes:
+    """32 bit little endian core with a single PT_LOAD segment"""
+    header = b"\x7fELF\x01\x01\x01" + bytes(9)
+    header += struct.pack("<HHIIIIIHHHHHH", 4, 40, 1, 0, 52, 0, 0, 52, 32, 1, 0, 0, 0)
+    return header + struct.pack("<8I", 1, 84, base, base, len(data), len(data), 6, 4) + data
+
+class TestDumpWatcher(unittest.TestCase):
+    def setUp(self):
+        with SOC_FILE.open("r") as fp:
+            self.graph = ClockGraph.from_yaml(fp)
+
+        self._td = tempfile.TemporaryDirectory()
+        self.file = Path(self._td.name) / "state.ihex"
+        self.data = bytearray(random.Random(0).randbytes(0x1000))
+        self.file.write_text(intelhex(self.data))
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_changed_records(self):
+        watcher = DumpWatcher(self.file)
+        watcher.read()
+        self.assertEqual(watcher.diff(), [])
+
+        self.data[0x123] ^= 0xFF
+        self.file.write_text(intelhex(self.data))
+        self.assertEqual(watcher.diff(), [(0x50000120, bytes(self.data[0x120:0x130]))])
+
+        # structural changes need a complete read
+        self.file.write_text(intelhex(self.data, base=0x40000000))
+        self.assertIsNone(watcher.diff())
+
+    def test_truncated(self):
+        # other formats are read completely, a partially written file fails until it is complete
+        file = Path(self._td.name) / "state.elf"
+        file.write_bytes(elfcore(bytes(self.data)))
+        watcher = DumpWatcher(file)
+        self.assertEqual(watcher.read()[0x50000123], self.data[0x123])
+        self.assertIsNone(watcher.diff())
+
+        file.write_bytes(elfcore(bytes(self.data))[:40])
+        self.assertTrue(watcher.modified())
+        with self.assertRaises(ParsingError):
+            watcher.read()
+        # still modified, so the watch loop tries again
+        self.assertTrue(watcher.modified())
+
+        self.data[0x123] ^= 0xFF
+        file.write_bytes(elfcore(bytes(self.data)))
+        self.assertEqual(watcher.read()[0x50000123], self.data[0x123])
+        self.assertFalse(watcher.modified())
+
+    def test_clks_reading(self):
+        for clk in self.graph.get_clks():
+            for reg in clk.used_registers:
+                self.assertIn(clk, self.graph.list_clks_reading(reg.addr, reg.addr + 1))
+                self.assertIn(clk, self.graph.list_clks_reading(reg.addr + reg.width // 8 - 1, reg.addr + 0x100))
+                self.assertNotIn(clk, self.graph.list_clks_reading(reg.addr - 0x100, reg.addr))
+
+    def test_apply_writes(self):
+        watcher = DumpWatcher(self.file)
+        mem_graph = MemoryClockGraph(self.graph, watcher.read())
+
+        # unused memory does not change anything
+        self.data[0xFFF] ^= 0xFF
+        self.file.write_text(intelhex(self.data))
+        self.assertEqual(mem_graph.apply_writes(watcher.diff() or []), set())
+
+        rng = random.Random(1)
+        self.data[:] = rng.randbytes(0x1000)
+        self.file.write_text(intelhex(self.data))
+        changed = mem_graph.apply_writes(watcher.diff() or [])
+
+        memory = SparseMemory()
+        memory[0x50000000:0x50001000] = bytes(self.data)
+        expected = MemoryClockGraph(self.graph, memory)
+        self.assertTrue(changed)
+        self.assertEqual(mem_graph.resolved_state(), expected.resolved_state())
+        for clk in self.graph.get_clks():
+            self.assertEqual(mem_graph.list_inputs_for_clk(clk), expected.list_inputs_for_clk(clk))
+            self.assertEqual(mem_graph.list_outputs_for_clk(clk), expected.list_outputs_for_clk(clk))
@@ -0,0 +1,100 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the analysis of many dumps at once
+"""
+import unittest
+import tempfile
+from pathlib import Path
+from src.graphs import ClockGraph
+from unittest import mock
+from src import fleet
+from src.fleet import FleetAnalyzer, FleetReport, find_dumps
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+BASE = 0x50000000
+MAINCLKSELB = 0x50000284
+PLL0CTRL = 0x50000580
+
+def dump(main_from_pll0: bool, pll0_enabled: bool) -> bytes:
+    data = bytearray(0x1000)
+    data[MAINCLKSELB - BASE] = 0b001 if main_from_pll0 else 0b000
+    data[PLL0CTRL - BASE + 2] = (1 << 5) if pll0_enabled else 0  # bit 21
+    return bytes(data)
+
+class TestFleet(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with SOC_FILE.open("r") as fp:
+            cls.graph = ClockGraph.from_yaml(fp)
+
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.dir = Path(self._td.name)
+        boards = [(False, False)] * 3 + [(True, True)] * 2 + [(True, False)] * 2
+        for idx, (main_from_pll0, pll0_enabled) in enumerate(boards):
+            (self.dir / f"board{idx}.bin").write_bytes(dump(main_from_pll0, pll0_enabled))
+        (self.dir / "broken.ihex").write_text(":10000000\n")
+        (self.dir / "notes.txt").write_text("not a dump")
+        (self.dir / "truncated.elf").write_bytes(b"\x7fELF\x01\x01\x01" + bytes(20))
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_find_dumps(self):
+        dumps = find_dumps([self.dir])
+        self.assertEqual([p.name for p in dumps], ["board0.bin", "board1.bin", "board2.bin", "board3.bin",
+                                                   "board4.bin", "board5.bin", "board6.bin", "broken.ihex",
+                                                   "truncated.elf"])
+        self.assertEqual(find_dumps([self.dir / "board[01].bin", self.dir / "board0.bin"]),
+                         [self.dir / "board0.bin", self.dir / "board1.bin"])
+
+    def report(self, jobs: int, required=()) -> dict:
+        analyzer = FleetAnalyzer(self.graph, required, base_address=BASE)
+        report = FleetReport(analyzer)
+        for result in analyzer.run(find_dumps([self.dir]), jobs):
+            report.add(result)
+        return report.to_json()
+
+    def test_report(self):
+        report = self.report(jobs=1)
+        self.assertEqual(report["dumps"], 9)
+        self.assertEqual(list(report["failed"]), [str(self.dir / "broken.ihex"), str(self.dir / "truncated.elf")])
+
+        self.assertEqual([config["count"] for config in report["configurations"]], [3, 2, 2])
+        self.assertEqual(report["configurations"][0]["boards"], [str(self.dir / f"board{idx}.bin") for idx in range(3)])
+
+        for selections in report["mux_selections"].values():
+            self.assertEqual(sum(selections.values()), 7)
+        self.assertEqual(report["mux_selections"]["mux_main_clk_b"], { "mux_main_clk_a": 3, "clk_pll0": 4 })
+
+        # the main clock runs from the disabled PLL0 only on the last two boards
+        boards = report["disabled_required"]["boards"]
+        for idx in range(5):
+            self.assertNotIn("clk_pll0", boards.get(str(self.dir / f"board{idx}.bin"), []))
+        for idx in range(5, 7):
+            self.assertIn("clk_pll0", boards[str(self.dir / f"board{idx}.bin")])
+        self.assertEqual(report["disabled_required"]["clocks"]["clk_pll0"], 2)
+
+    def test_required(self):
+        report = self.report(jobs=1, required=["clk_pll0"])
+        self.assertEqual(report["disabled_required"]["clocks"]["clk_pll0"], 5)
+        with self.assertRaises(KeyError):
+            FleetAnalyzer(self.graph, ["does-not-exist"])
+
+    def test_failing_dump(self):
+        # any error evaluating a dump is reported, the other dumps are analysed
+        original = fleet.MemoryClockGraph
+        def evaluate(graph, memory):
+            if memory[MAINCLKSELB] == 0b001 and memory[PLL0CTRL + 2]:
+                raise RuntimeError("evaluation failed")
+            return original(graph, memory)
+
+        with mock.patch.object(fleet, "MemoryClockGraph", side_effect=evaluate):
+            report = self.report(jobs=1)
+        self.assertEqual(report["failed"][str(self.dir / "board3.bin")], "RuntimeError: evaluation failed")
+        self.assertEqual(len(report["failed"]), 4)
+        self.assertEqual(sum(config["count"] for config in report["configurations"]), 5)
+
+    def test_parallel(self):
+        self.assertEqual(self.report(jobs=3), self.report(jobs=1))
@@ -0,0 +1,120 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the compiled lambdas and the frequency propagation
+"""
+import unittest
+import pickle
+import random
+from pathlib import Path
+import numpy as np
+from unittest import mock
+from src.graphs import ClockGraph, MemoryClockGraph, FrequencyEngine, format_frequency
+from src.graphs.yamlobjects import LambdaObject
+from src.graphs.registers import RegisterReadPlan
+from src.utils.sparse_memory import SparseMemory
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+MAINCLKSELA = 0x50000280
+MAINCLKSELB = 0x50000284
+AHBCLKDIV = 0x50000380
+PLL0CLKSEL = 0x50000290
+PLL0CTRL = 0x50000580
+
+class TestFrequencies(unittest.TestCase):
+    def setUp(self):
+        with SOC_FILE.open("r") as fp:
+            self.graph = ClockGraph.from_yaml(fp)
+
+        self.memory = SparseMemory()
+        self.memory[0x50000000:0x50001000] = random.Random(0).randbytes(0x1000)
+
+    def test_lambda(self):
+        frg = LambdaObject("div, mult -> 1 + mult / (div + 1)")
+        self.assertEqual(frg.args, ("div", "mult"))
+        self.assertEqual(frg([255, 128]), 1.5)
+        self.assertEqual(pickle.loads(pickle.dumps(frg))([255, 128]), 1.5)
+        self.assertEqual(list(frg([np.array([255, 255]), np.array([0, 256])])), [1.0, 2.0])
+
+        for invalid in ("x -> __import__('os')", "x -> x.real", "x -> y", "x -> 'a'", "x -> x ** 99", "1x -> x", "x"):
+            with self.assertRaises(ValueError, msg=invalid):
+                LambdaObject(invalid)
+
+    def test_format(self):
+        self.assertEqual(format_frequency(12e6), "12 MHz")
+        self.assertEqual(format_frequency(32768), "32.768 kHz")
+        self.assertEqual(format_frequency(0), "0 Hz")
+        self.assertEqual(format_frequency(None), "? Hz")
+
+    def test_propagation(self):
+        engine = FrequencyEngine(self.graph)
+        order = { clk: idx for idx, clk in enumerate(engine.clocks) }
+        for clk in self.graph.get_clks():
+            for inp in self.graph.list_inputs_for_clk(clk):
+                self.assertLess(order[inp], order[clk])
+
+        # main clock from the 96 MHz FRO, AHB divided by 2
+        self.memory[MAINCLKSELA:MAINCLKSELA + 4] = (0b11).to_bytes(4, "little")
+        self.memory[MAINCLKSELB:MAINCLKSELB + 4] = (0b000).to_bytes(4, "little")
+        self.memory[AHBCLKDIV:AHBCLKDIV + 4] = (1).to_bytes(4, "little")
+
+        freqs = MemoryClockGraph(self.graph, self.memory).get_frequencies()
+        self.assertEqual(freqs[self.graph.get_clk("clk_main")], 96e6)
+        self.assertEqual(freqs[self.graph.get_clk("clk_ahb")], 48e6)
+        self.assertIsNone(freqs[self.graph.get_clk("clk_xta_osc")])
+
+        # the crystal of the board
+        engine = FrequencyEngine(self.graph, { "clk_xta_osc": 16e6 })
+        self.memory[MAINCLKSELA:MAINCLKSELA + 4] = (0b01).to_bytes(4, "little")
+        freqs = engine.evaluate(self.memory)
+        self.assertEqual(freqs[self.graph.get_clk("clk_ahb")], 8e6)
+
+    def test_shared_plan(self):
+        engine = self.graph.get_frequency_engine()
+        self.assertIs(engine.fields, self.graph.read_plan.fields)
+
+        # the memory graph hands its decoded values to the engine
+        mem_graph = MemoryClockGraph(self.graph, self.memory)
+        with mock.patch.object(RegisterReadPlan, "read_words", side_effect=AssertionError("memory read again")):
+            freqs = mem_graph.get_frequencies()
+        self.assertEqual(freqs, FrequencyEngine(self.graph).evaluate(self.memory))
+
+        mem_graph.apply_writes([(AHBCLKDIV, (3).to_bytes(4, "little"))])
+        self.assertEqual(mem_graph.get_frequencies(), FrequencyEngine(self.graph).evaluate(self.memory))
+
+    def test_pll(self):
+        # main clock from the enabled PLL0, fed by the 12 MHz FRO
+        self.memory[MAINCLKSELB:MAINCLKSELB + 4] = (0b001).to_bytes(4, "little")
+        self.memory[PLL0CLKSEL:PLL0CLKSEL + 4] = (0b000).to_bytes(4, "little")
+        self.memory[PLL0CTRL:PLL0CTRL + 4] = (1 << 21).to_bytes(4, "little")
+
+        engine = FrequencyEngine(self.graph)
+        freqs = engine.evaluate(self.memory)
+        self.assertEqual(freqs[self.graph.get_clk("mux_pll0_clk")], 12e6)
+        for name in ("clk_pll0", "clk_main", "clk_ahb"):
+            self.assertIsNone(freqs[self.graph.get_clk(name)], name)
+        many = engine.evaluate_many([engine.read_values(self.memory)])
+        self.assertTrue(np.isnan(many[self.graph.get_clk("clk_ahb")][0]))
+
+        # a disabled PLL still runs at 0 Hz
+        self.memory[PLL0CTRL:PLL0CTRL + 4] = (0).to_bytes(4, "little")
+        self.assertEqual(engine.evaluate(self.memory)[self.graph.get_clk("clk_main")], 0.0)
+
+    def test_vectorized(self):
+        engine = FrequencyEngine(self.graph, { "clk_xta_osc": 16e6 })
+        rng = random.Random(1)
+
+        values = []
+        for _ in range(20):
+            self.memory[0x50000000:0x50001000] = rng.randbytes(0x1000)
+            values.append(engine.read_values(self.memory))
+
+        many = engine.evaluate_many(values)
+        for row, row_values in enumerate(values):
+            single = engine.evaluate_values(row_values)
+            for clk, frequency in single.items():
+                if frequency is None:
+                    self.assertTrue(np.isnan(many[clk][row]), clk.name)
+                else:
+                    self.assertAlmostEqual(many[clk][row], frequency, msg=clk.name)
@@ -0,0 +1,87 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the graph rendering
+"""
+import unittest
+import tempfile
+import os
+import stat
+from pathlib import Path
+from unittest import mock
+from src.graphs import ClockGraph
+from src.filters import FilterAccumulator
+from src.grapher import Grapher, RenderError, render_source
+from src.utils.profiling import Profiler
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+# stand-in for graphviz: echoes its command line followed by its stdin
+FAKE_DOT = """#!/bin/sh
+echo "$(basename "$0") $*"
+cat
+"""
+
+class TestGrapher(unittest.TestCase):
+    def setUp(self):
+        with SOC_FILE.open("r") as fp:
+            self.graph = ClockGraph.from_yaml(fp)
+
+        self._td = tempfile.TemporaryDirectory()
+        self.dir = Path(self._td.name)
+        dot = self.dir / "bin" / "dot"
+        dot.parent.mkdir()
+        dot.write_text(FAKE_DOT)
+        dot.chmod(dot.stat().st_mode | stat.S_IEXEC)
+        (dot.parent / "neato").symlink_to(dot)
+        self.path = f"{dot.parent}{os.pathsep}{os.environ.get('PATH', '')}"
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_streamed_dot(self):
+        grapher = Grapher(self.graph, FilterAccumulator(), "title")
+        grapher.render(self.dir / "out.dot")
+
+        # streaming and building in memory yields the same source
+        self.assertEqual((self.dir / "out.dot").read_text(), grapher.graph.source)
+
+    def test_piped_render(self):
+        source = Grapher(self.graph, FilterAccumulator()).graph.source
+
+        with mock.patch.dict(os.environ, {"PATH": self.path}):
+            Grapher(self.graph, FilterAccumulator()).render(self.dir / "out.svg")
+            render_source(source, self.dir / "out2.png")
+
+        self.assertEqual((self.dir / "out.svg").read_text(), "dot -Tsvg\n" + source)
+        self.assertEqual((self.dir / "out2.png").read_text(), "dot -Tpng\n" + source)
+
+    def test_shared_layout(self):
+        grapher = Grapher(self.graph, FilterAccumulator())
+        source = grapher.graph.source
+
+        with mock.patch.dict(os.environ, {"PATH": self.path}):
+            grapher.render_all([self.dir / "out.dot", self.dir / "out.svg", self.dir / "out.pdf"])
+
+        # every format is converted from the one positioned graph
+        self.assertEqual((self.dir / "out.dot").read_text(), source)
+        layout = "dot -Txdot\n" + source
+        self.assertEqual((self.dir / "out.svg").read_text(), "neato -n2 -Tsvg\n" + layout)
+        self.assertEqual((self.dir / "out.pdf").read_text(), "neato -n2 -Tpdf\n" + layout)
+
+    def test_profiled_render(self):
+        grapher = Grapher(self.graph, FilterAccumulator())
+        with mock.patch.dict(os.environ, {"PATH": self.path}), Profiler(trace_allocations=False) as profiler:
+            grapher.render_all([self.dir / "out.svg", self.dir / "out.pdf", self.dir / "out.png"], jobs=3)
+
+        # the layout and the conversions on the workers
+        stages = profiler.report()["stages"]
+        self.assertEqual(stages["dot"]["calls"], 2)
+        self.assertGreater(stages["dot"]["wall_ms"], 0)
+        self.assertEqual(stages["dot_source"]["calls"], 1)
+
+    def test_missing_dot(self):
+        with mock.patch.dict(os.environ, {"PATH": str(self.dir / "empty")}):
+            with self.assertRaises(RenderError):
+                Grapher(self.graph, FilterAccumulator()).render(self.dir / "out.svg")
+        self.assertFalse((self.dir / "out.svg").exists())
@@ -0,0 +1,90 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the layout cache and restyling
+"""
+import unittest
+import tempfile
+import random
+import json
+from pathlib import Path
+from unittest import mock
+from src.graphs import ClockGraph, MemoryClockGraph
+from src.filters import FilterAccumulator, MemoryVisFilter
+from src.grapher import Grapher, cached_layout
+from src.layoutcache import Layout, LayoutCache
+from src.utils.sparse_memory import SparseMemory
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+# shortened output of `dot -Tjson`
+GRAPHVIZ_JSON = {
+    "name": "%3", "bb": "0,0,300,100", "lp": "50,90",
+    "objects": [
+        { "_gvid": 0, "name": "cluster_mux", "bb": "100,0,200,80", "lp": "150,10", "nodes": [2] },
+        { "_gvid": 1, "name": "clk_a", "pos": "20,40", "width": "0.75", "height": "0.5" },
+        { "_gvid": 2, "name": "mux", "pos": "150,40", "width": "1", "height": "1" },
+    ],
+    "edges": [
+        { "_gvid": 0, "tail": 1, "head": 2, "tailport": "e", "headport": "clk_a:w", "pos": "e,120,40 40,40" },
+    ],
+}
+
+class TestLayoutCache(unittest.TestCase):
+    def setUp(self):
+        with SOC_FILE.open("r") as fp:
+            self.graph = ClockGraph.from_yaml(fp)
+
+        self._td = tempfile.TemporaryDirectory()
+        self.cache = LayoutCache(Path(self._td.name))
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def grapher(self, seed: int) -> Grapher:
+        mem = SparseMemory()
+        mem[0x50000000:0x50001000] = random.Random(seed).randbytes(0x1000)
+
+        filters = FilterAccumulator()
+        filters.add_filter(MemoryVisFilter(MemoryClockGraph(self.graph, mem)))
+        return Grapher(self.graph, filters, "title")
+
+    def test_graphviz_json(self):
+        layout = Layout.from_graphviz_json(GRAPHVIZ_JSON)
+
+        self.assertEqual(layout.graph, { "bb": "0,0,300,100", "lp": "50,90" })
+        self.assertEqual(layout.cluster("cluster_mux"), { "bb": "100,0,200,80", "lp": "150,10" })
+        self.assertEqual(layout.node("mux"), { "pos": "150,40", "width": "1", "height": "1" })
+        self.assertEqual(layout.edge("clk_a", "e", "mux", "clk_a:w"), { "pos": "e,120,40 40,40" })
+
+    def test_roundtrip(self):
+        layout = Layout.from_graphviz_json(GRAPHVIZ_JSON)
+
+        self.assertIsNone(self.cache.get("digraph {}"))
+        self.cache.put("digraph {}", layout)
+        self.assertEqual(self.cache.get("digraph {}"), layout)
+        self.assertIsNone(self.cache.get("digraph { a }"))
+
+    def test_state_independent(self):
+        first, second = self.grapher(0), self.grapher(1)
+
+        # different dumps, same topology
+        self.assertNotEqual(first.graph.source, second.graph.source)
+        self.assertEqual(first.skeleton_source(), second.skeleton_source())
+
+        with mock.patch("src.grapher.layout_source", return_value=json.dumps(GRAPHVIZ_JSON)) as layout_source:
+            layout = cached_layout(self.cache, first.skeleton_source())
+            self.assertEqual(cached_layout(self.cache, second.skeleton_source()), layout)
+        layout_source.assert_called_once()
+
+    def test_restyle(self):
+        grapher = self.grapher(0)
+        clk = next(clk for clk in self.graph.get_clks() if clk.name in grapher.graph.source)
+        layout = Layout(nodes={ clk.name: { "pos": "1,2", "width": "3", "height": "4" } })
+
+        positioned = grapher.positioned_source(layout)
+        self.assertIn('pos="1,2"', positioned)
+
+        # apart from the geometry, it is the styled graph
+        self.assertEqual(positioned.replace(' height=4', '').replace(' pos="1,2"', '').replace(' width=3', ''),
+                         grapher.graph.source)
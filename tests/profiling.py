@@ -0,0 +1,65 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the stage profiler and its hooks in the library
+"""
+import unittest
+import json
+import random
+from pathlib import Path
+from src.graphs import ClockGraph, MemoryClockGraph
+from src.filters import FilterAccumulator, QueryFilter, MemoryVisFilter
+from src.grapher import Grapher
+from src.utils import SparseMemory
+from src.utils.profiling import Profiler, stage, count, active_profiler
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+class TestProfiling(unittest.TestCase):
+    def test_inactive(self):
+        self.assertIsNone(active_profiler())
+        with stage("nothing"):
+            count("events")
+
+    def test_stages(self):
+        with Profiler() as profiler:
+            self.assertIs(active_profiler(), profiler)
+            for _ in range(2):
+                with stage("outer"):
+                    with stage("inner"):
+                        data = bytearray(1 << 20)
+                        del data
+                    count("events", 3)
+        self.assertIsNone(active_profiler())
+
+        report = json.loads(json.dumps(profiler.report()))
+        self.assertEqual(list(report["stages"]), ["outer", "outer/inner"])
+        self.assertEqual(report["stages"]["outer"]["calls"], 2)
+        self.assertEqual(report["counters"], { "events": 6 })
+
+        inner, outer = report["stages"]["outer/inner"], report["stages"]["outer"]
+        self.assertGreaterEqual(inner["peak_alloc_bytes"], 1 << 20)
+        self.assertGreaterEqual(outer["peak_alloc_bytes"], inner["peak_alloc_bytes"])
+        self.assertGreaterEqual(outer["wall_ms"], inner["wall_ms"])
+
+    def test_library_hooks(self):
+        memory = SparseMemory()
+        memory[0x50000000:0x50001000] = random.Random(0).randbytes(0x1000)
+
+        with Profiler(trace_allocations=False) as profiler:
+            with SOC_FILE.open("r") as fp:
+                graph = ClockGraph.from_yaml(fp)
+            mem_graph = MemoryClockGraph(graph, memory)
+            # every register word once
+            self.assertEqual(profiler.counters["register_reads"], len(graph.read_plan.words))
+
+            filters = FilterAccumulator()
+            filters.add_filter(QueryFilter(mem_graph, graph.get_clk("clk_main")))
+            filters.add_filter(MemoryVisFilter(mem_graph))
+            source = Grapher(graph, filters).build_raw_graph(None).source
+
+        report = profiler.report()
+        self.assertIn("schema_validation", report["stages"])
+        self.assertIn("dot_source", report["stages"])
+        self.assertEqual(report["counters"]["edges_emitted"], source.count("->"))
+        self.assertGreater(report["counters"]["filter_lookups"], 0)
@@ -0,0 +1,132 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the visualization server
+"""
+import unittest
+import http.client
+import tempfile
+import threading
+import socket
+import random
+import json
+from pathlib import Path
+from unittest import mock
+from src.server import ClockVisServer, UnixClockVisServer, RequestHandler, load_socs, MAX_BODY_SIZE
+
+SOC_DIR = Path(__file__).parent / "../socs/"
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str) -> None:
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.quiet = mock.patch.object(RequestHandler, "log_message")
+        cls.quiet.start()
+
+        cls.socs = load_socs(SOC_DIR)
+        cls.server = ClockVisServer(("127.0.0.1", 0), cls.socs)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+        rng = random.Random(0)
+        cls.dump = "".join(
+            f":10{addr:04X}00{data.hex().upper()}{(-sum(bytes([0x10, addr >> 8, addr & 0xFF]) + data)) & 0xFF:02X}\n"
+            for addr in range(0, 0x1000, 0x10) if (data := rng.randbytes(0x10))
+        )
+        cls.dump = ":020000045000AA\n" + cls.dump
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.quiet.stop()
+
+    def request(self, method: str, path: str, body: bytes | None = None,
+                conn: http.client.HTTPConnection | None = None, headers: dict[str, str] | None = None) -> tuple[int, str, bytes]:
+        conn = conn or http.client.HTTPConnection(*self.server.server_address[:2])
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, response.getheader("Content-Type", ""), response.read()
+        finally:
+            conn.close()
+
+    def test_socs(self):
+        status, _, body = self.request("GET", "/socs")
+        self.assertEqual(status, 200)
+        self.assertIn("NXP_LPC55S1x_DS", json.loads(body)["socs"])
+
+    def test_render_dot(self):
+        status, content_type, body = self.request("POST", "/render/NXP_LPC55S1x_DS?title=test", self.dump.encode())
+        self.assertEqual(status, 200)
+        self.assertTrue(content_type.startswith("text/vnd.graphviz"))
+        self.assertTrue(body.startswith(b"digraph {"))
+        self.assertIn(b"label=test", body)
+
+    def test_render_json(self):
+        status, _, body = self.request("POST", "/render/NXP_LPC55S1x_DS?format=json&query=clk_main&only_show_query=1",
+                                       self.dump.encode())
+        self.assertEqual(status, 200)
+        data = json.loads(body)
+        self.assertIn("clk_main", [clk["name"] for clk in data["clocks"]])
+        self.assertTrue(all("registers" in clk and "frequency" in clk for clk in data["clocks"]))
+
+    def test_cached(self):
+        soc = self.socs["NXP_LPC55S1x_DS"]
+        path = "/render/NXP_LPC55S1x_DS?format=json&title=cached"
+        first = self.request("POST", path, self.dump.encode())
+        results, memories = len(soc.results), len(soc.memories)
+
+        self.assertEqual(self.request("POST", path, self.dump.encode()), first)
+        self.assertEqual((len(soc.results), len(soc.memories)), (results, memories))
+
+    def test_address(self):
+        status, _, body = self.request("GET", "/address/NXP_LPC55S1x_DS?address=0x50000284")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["clocks"], ["mux_main_clk_b"])
+
+        # only active connections with a dump
+        status, _, body = self.request("POST", "/address/NXP_LPC55S1x_DS?address=0x50000284", self.dump.encode())
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["clocks"], ["mux_main_clk_b"])
+
+        self.assertEqual(self.request("GET", "/address/NXP_LPC55S1x_DS?address=zz")[0], 400)
+
+    def test_errors(self):
+        self.assertEqual(self.request("GET", "/render/unknown")[0], 404)
+        self.assertEqual(self.request("GET", "/render/NXP_LPC55S1x_DS?format=exe")[0], 400)
+        self.assertEqual(self.request("GET", "/render/NXP_LPC55S1x_DS?query=unknown")[0], 400)
+        self.assertEqual(self.request("POST", "/render/NXP_LPC55S1x_DS", b":zz\n")[0], 400)
+        self.assertEqual(self.request("POST", "/render/NXP_LPC55S1x_DS?memory_format=bin", b"abcd")[0], 400)
+
+        # the length is checked before reading the body
+        too_large = { "Content-Length": str(MAX_BODY_SIZE + 1) }
+        self.assertEqual(self.request("POST", "/render/NXP_LPC55S1x_DS", b"", headers=too_large)[0], 413)
+        negative = { "Content-Length": "-1" }
+        self.assertEqual(self.request("POST", "/render/NXP_LPC55S1x_DS", b"", headers=negative)[0], 400)
+
+    def test_head(self):
+        status, content_type, body = self.request("HEAD", "/socs")
+        self.assertEqual((status, content_type, body), (200, "application/json", b""))
+
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as td:
+            path = str(Path(td) / "clock-vis.sock")
+            with UnixClockVisServer(path, self.socs) as server:
+                thread = threading.Thread(target=server.serve_forever, daemon=True)
+                thread.start()
+                try:
+                    status, _, body = self.request("GET", "/socs", conn=UnixHTTPConnection(path))
+                finally:
+                    server.shutdown()
+
+        self.assertEqual(status, 200)
+        self.assertIn("NXP_LPC55S1x_DS", json.loads(body)["socs"])
@@ -0,0 +1,73 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the vectorized snapshot decoder
+"""
+import unittest
+import random
+from pathlib import Path
+from src.graphs import ClockGraph, MemoryClockGraph
+from src.filters import DiffFilter
+from src.filters.abstractfilter import State
+from src.graphs.snapshotdecoder import SnapshotDecoder
+from src.utils.sparse_memory import SparseMemory
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+class TestSnapshotDecoder(unittest.TestCase):
+    def setUp(self):
+        with SOC_FILE.open("r") as fp:
+            self.graph = ClockGraph.from_yaml(fp)
+
+        rng = random.Random(0)
+        self.memories = []
+        for _ in range(5):
+            mem = SparseMemory()
+            mem[0x50000000:0x50001000] = rng.randbytes(0x1000)
+            self.memories.append(mem)
+
+    def test_matches_get_register(self):
+        decoder = SnapshotDecoder(self.graph)
+        values = decoder.decode(self.memories)
+
+        self.assertEqual(values.shape, (len(self.memories), len(decoder.fields)))
+        for row, mem in enumerate(self.memories):
+            for col, field in enumerate(decoder.fields):
+                self.assertEqual(values[row, col], mem.get_register(field.register), field)
+
+    def test_sparse_memory(self):
+        # only the register words are mapped, the gaps have no filler byte
+        decoder = SnapshotDecoder(self.graph)
+        mem = SparseMemory(default_byte=None)
+        for addr, nbytes, _ in decoder.words:
+            mem[addr:addr + nbytes] = self.memories[0][addr:addr + nbytes]
+        self.assertEqual(decoder.decode([mem]).tolist(), decoder.decode(self.memories[:1]).tolist())
+
+    def test_column(self):
+        decoder = SnapshotDecoder(self.graph)
+        mux = self.graph.get_clk("mux_main_clk_a")
+        values = decoder.decode(self.memories[:1])
+
+        self.assertEqual(values[0, decoder.column(mux, "select")], mux.parse(self.memories[0]))
+
+    def test_diff(self):
+        decoder = SnapshotDecoder(self.graph)
+        old, new = self.memories[0], SparseMemory()
+        new[0x50000000:0x50001000] = old[0x50000000:0x50001000]
+        self.assertEqual(decoder.diff(old, new), [])
+
+        mux = self.graph.get_clk("mux_main_clk_a")
+        new[mux.register.addr] = old[mux.register.addr] ^ 0x1
+        changes = decoder.diff(old, new)
+        self.assertEqual(changes, [(decoder.fields[decoder.column(mux, "select")], mux.parse(old), mux.parse(new))])
+
+        old_graph, new_graph = MemoryClockGraph(self.graph, old), MemoryClockGraph(self.graph, new)
+        self.assertEqual(old_graph.diff(new_graph), changes)
+        self.assertEqual(old_graph.diff(MemoryClockGraph(self.graph, old)), [])
+        difffilter = DiffFilter(old_graph, new_graph, [mux])
+        self.assertEqual(difffilter.should_show_clock(mux), State.SPECIAL)
+        self.assertEqual(difffilter.should_show_clock(self.graph.get_clk("clk_main")), State.SHOW)
+        for inp in self.graph.list_inputs_for_clk(mux):
+            was_active = old_graph.list_inputs_for_clk(mux) == [inp]
+            is_active = new_graph.list_inputs_for_clk(mux) == [inp]
+            self.assertEqual(difffilter.should_show_edge(inp, mux) == State.SPECIAL, was_active != is_active)
@@ -5,8 +5,11 @@ Testing for sparse memory class
 """
 import unittest
 import textwrap
+import tempfile
+import struct
 import io
-from src.utils.sparse_memory import SparseMemory
+from pathlib import Path
+from src.utils.sparse_memory import SparseMemory, ParsingError, MissingBaseAddressError
 from src.graphs.yamlobjects import AddrObject32LE
 
 class TestSparseMemory(unittest.TestCase):
@@ -77,6 +80,33 @@ class TestSparseMemory(unittest.TestCase):
         self.assertEqual(self.mem[7:10], b"d" + self.def_byte * 2)
 
 
+    def test_coalescing(self):
+        self.mem[0:2] = b"ab"
+        self.mem[4:6] = b"ef"
+        self.assertEqual(len(self.mem), 2)
+
+        self.mem[2:4] = b"cd"  # closes the gap
+        self.assertEqual(len(self.mem), 1)
+        self.assertEqual(self.mem[0:6], b"abcdef")
+
+        self.mem[1:3] = b"XY"  # overwrite within a segment
+        self.assertEqual(len(self.mem), 1)
+        self.assertEqual(self.mem[0:6], b"aXYdef")
+
+    def test_insert_blocks(self):
+        self.mem.insert_blocks([(4, b"ef"), (0, b"ab"), (2, b"cd"), (8, memoryview(b"ij"))])
+        self.assertEqual(len(self.mem), 2)
+        self.assertEqual(self.mem.get_raw(), b"abcdef" + self.def_byte * 2 + b"ij")
+
+        # overlapping blocks are written in order
+        mem = SparseMemory(default_byte=self.def_byte[0])
+        mem.insert_blocks([(0, b"abcd"), (2, b"XY"), (1, b"1")])
+        self.assertEqual(mem.get_raw(), b"a1XY")
+
+        # read-only views are copied on write
+        self.mem[8] = ord("I")
+        self.assertEqual(self.mem[7:10], self.def_byte + b"Ij")
+
     def test_intelhex(self):
         data = textwrap.dedent("""
             :02010000aabb98
@@ -87,3 +117,82 @@ class TestSparseMemory(unittest.TestCase):
 
         mem = SparseMemory.from_intelhex(io.StringIO(data))
         self.assertEqual(mem.get_raw(start_address=0x0100), bytes.fromhex("aabbccddeeff"))
+
+    def test_intelhex_extended(self):
+        data = textwrap.dedent("""
+            :020000040001F9
+            :02000000aabb99
+            :02000200ccdd53
+            :02001000eeff01
+            :00000001FF
+        """)
+
+        mem = SparseMemory.from_intelhex(io.StringIO(data))
+        self.assertEqual(len(mem), 2)
+        self.assertEqual(mem[0x10000:0x10004], bytes.fromhex("aabbccdd"))
+        self.assertEqual(mem[0x10010:0x10012], bytes.fromhex("eeff"))
+
+    def test_intelhex_error(self):
+        data = textwrap.dedent("""
+            :02010000aabb98
+            :02010200ccdd53
+        """)
+
+        with self.assertRaises(ParsingError) as ctx:
+            SparseMemory.from_intelhex(io.StringIO(data))
+        self.assertEqual(ctx.exception.record_number, 2)
+        self.assertEqual(ctx.exception.record, "02010200ccdd53")
+
+    def test_binary(self):
+        with tempfile.TemporaryDirectory() as td:
+            file = Path(td) / "dump.bin"
+            file.write_bytes(b"abcd")
+
+            mem = SparseMemory.parse_file(file, base_address=0x100)
+            self.assertEqual(mem[0x100:0x104], b"abcd")
+
+            (Path(td) / "dump.bin.base").write_text("0x200\n")
+            mem = SparseMemory.parse_file(file)
+            self.assertEqual(mem[0x1FF:0x203], b"\x00abc")
+
+            # writing does not alter the file
+            mem[0x200] = ord("A")
+            self.assertEqual(mem[0x200:0x202], b"Ab")
+            self.assertEqual(file.read_bytes(), b"abcd")
+
+    def test_parse_bytes(self):
+        mem = SparseMemory.parse_bytes(b":02000000aabb99\n", ".ihex")
+        self.assertEqual(mem[0:2], bytes.fromhex("aabb"))
+
+        mem = SparseMemory.parse_bytes(b"abcd", ".bin", base_address=0x100)
+        self.assertEqual(mem[0x100:0x104], b"abcd")
+
+        with self.assertRaises(MissingBaseAddressError):
+            SparseMemory.parse_bytes(b"abcd", ".bin")
+
+    def test_elf(self):
+        # 32 bit little endian core with a PT_NOTE and two PT_LOAD headers
+        phdrs = [
+            (4, 0x94, 0, 0, 0, 0, 0, 0),
+            (1, 0x94, 0x50000000, 0x50000000, 4, 4, 6, 4),
+            (1, 0x98, 0x50001000, 0x50001000, 2, 8, 6, 4),
+        ]
+        header = b"\x7fELF\x01\x01\x01" + bytes(9)
+        header += struct.pack("<HHIIIIIHHHHHH", 4, 40, 1, 0, 52, 0, 0, 52, 32, len(phdrs), 0, 0, 0)
+        data = header + b"".join(struct.pack("<8I", *ph) for ph in phdrs) + b"abcdef"
+
+        with tempfile.TemporaryDirectory() as td:
+            file = Path(td) / "dump.core"
+            file.write_bytes(data)
+
+            mem = SparseMemory.parse_file(file)
+            self.assertEqual(len(mem), 2)
+            self.assertEqual(mem[0x50000000:0x50000004], b"abcd")
+            self.assertEqual(mem[0x50001000:0x50001004], b"ef\x00\x00")
+
+            # truncated headers of both classes
+            for idx, truncated in enumerate((data[:27], b"\x7fELF\x02\x01\x01" + bytes(40))):
+                file = Path(td) / f"truncated{idx}.elf"
+                file.write_bytes(truncated)
+                with self.assertRaises(ParsingError):
+                    SparseMemory.parse_file(file)
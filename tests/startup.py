@@ -0,0 +1,61 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing that the command line tool only imports what it needs
+"""
+import unittest
+import subprocess
+import tempfile
+import sys
+import os
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+CHECK = """
+import runpy, sys
+sys.argv = ["clock-vis.py", *sys.argv[1:]]
+try:
+    runpy.run_path("clock-vis.py", run_name="__main__")
+except SystemExit:
+    pass
+print(",".join(sorted({"graphviz", "jsonschema", "yaml", "numpy"} & set(sys.modules))))
+"""
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.env = {**os.environ, "XDG_CACHE_HOME": self._td.name}
+        self.out = str(Path(self._td.name) / "out.dot")
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def loaded_modules(self, *args: str) -> set[str]:
+        proc = subprocess.run([sys.executable, "-c", CHECK, *args], cwd=ROOT, env=self.env,
+                              capture_output=True, text=True, check=True)
+        # the modules are on the last line, after the output of the tool
+        return set(filter(None, proc.stdout.split("\n")[-2].split(",")))
+
+    def test_unknown_soc(self):
+        self.assertEqual(self.loaded_modules("-s", "does-not-exist", "-o", self.out), set())
+
+    def test_dot_output(self):
+        self.assertEqual(self.loaded_modules("-s", "NXP_LPC55S1x_DS", "-o", self.out), {"yaml", "jsonschema"})
+        # second run is served from the compiled cache
+        self.assertEqual(self.loaded_modules("-s", "NXP_LPC55S1x_DS", "-o", self.out), set())
+
+    def test_diff(self):
+        old, new = Path(self._td.name) / "old.bin", Path(self._td.name) / "new.bin"
+        old.write_bytes(bytes(0x1000))
+        new.write_bytes(bytes(0x280) + b"\x03" + bytes(0x1000 - 0x281))
+        self.loaded_modules("-s", "NXP_LPC55S1x_DS", "-o", self.out)
+        self.assertEqual(self.loaded_modules("-s", "NXP_LPC55S1x_DS", "-m", str(old), "-d", str(new), "-ba", "0x50000000",
+                                             "-o", self.out), set())
+
+    def test_state_export(self):
+        memory = Path(self._td.name) / "state.bin"
+        memory.write_bytes(bytes(0x1000))
+        self.loaded_modules("-s", "NXP_LPC55S1x_DS", "-o", self.out)
+        self.assertEqual(self.loaded_modules("-s", "NXP_LPC55S1x_DS", "-m", str(memory), "-ba", "0x50000000",
+                                             "-e", "json", "-o", str(Path(self._td.name) / "state.json")), set())
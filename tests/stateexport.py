@@ -0,0 +1,62 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the export of the resolved clock state
+"""
+import unittest
+import random
+import json
+import csv
+import io
+from pathlib import Path
+from src.graphs import ClockGraph, MemoryClockGraph
+from src.stateexport import write_json, write_csv, CSV_COLUMNS
+from src.utils import SparseMemory
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+class TestStateExport(unittest.TestCase):
+    def setUp(self):
+        with SOC_FILE.open("r") as fp:
+            self.graph = ClockGraph.from_yaml(fp)
+
+        memory = SparseMemory()
+        memory[0x50000000:0x50001000] = random.Random(0).randbytes(0x1000)
+        self.mem_graph = MemoryClockGraph(self.graph, memory)
+
+    def test_json(self):
+        out = io.StringIO()
+        write_json(self.mem_graph, out.write, soc="test")
+        document = json.loads(out.getvalue())
+        self.assertEqual(document["soc"], "test")
+
+        clocks = { state["name"]: state for state in document["clocks"] }
+        self.assertEqual(set(clocks), {clk.name for clk in self.graph.get_clks()})
+
+        mux = self.graph.get_clk("mux_main_clk_a")
+        state = clocks[mux.name]
+        self.assertEqual(state["type"], "mux")
+        self.assertEqual(state["selected"], self.mem_graph.get_parsed_for_clk(mux).choosen)
+        self.assertEqual(state["input"], mux.inputs[state["selected"]].name)
+        self.assertEqual(state["fields"], { "select": state["selected"] })
+        self.assertEqual(state["registers"], { "0x50000280": self.mem_graph.get_registers(mux)[0x50000280][0] })
+
+        div = clocks["div_flexcomm0"]
+        self.assertEqual(set(div["fields"]), {"div", "mult"})
+        self.assertAlmostEqual(div["divisor"], 1 + div["fields"]["mult"] / (div["fields"]["div"] + 1))
+
+        clk = self.graph.get_clk("clk_pll0")
+        self.assertEqual(clocks[clk.name]["enabled"], self.mem_graph.get_parsed_for_clk(clk).is_enabled)
+
+    def test_csv(self):
+        out = io.StringIO()
+        write_csv(self.mem_graph, out.write, prefix={ "dump": "a,b.ihex" })
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+
+        self.assertEqual(list(rows[0]), ["dump", *CSV_COLUMNS])
+        self.assertEqual(len(rows), len(list(self.graph.get_clks())))
+        self.assertTrue(all(row["dump"] == "a,b.ihex" for row in rows))
+
+        row = next(row for row in rows if row["clock"] == "mux_main_clk_a")
+        self.assertEqual(row["fields"], f"select={row['selected']}")
+        self.assertTrue(row["registers"].startswith("0x50000280=0x"))
@@ -0,0 +1,111 @@
+"""
+Copyright: 2025 Auxsys
+
+Testing for the replay of register write traces
+"""
+import unittest
+import tempfile
+import random
+import io
+from pathlib import Path
+import numpy as np
+from src.graphs import ClockGraph, MemoryClockGraph
+from src.tracereplay import TraceReplay, ClockState, CsvTimeline, NpzTimeline, read_trace
+from src.utils.sparse_memory import SparseMemory, ParsingError
+
+SOC_FILE = Path(__file__).parent / "../socs/NXP_LPC55S1x_DS.yaml"
+
+MAINCLKSELA = 0x50000280
+AHBCLKDIV = 0x50000380
+PLL0CTRL = 0x50000580
+
+class TestTraceReplay(unittest.TestCase):
+    def setUp(self):
+        with SOC_FILE.open("r") as fp:
+            self.graph = ClockGraph.from_yaml(fp)
+
+        self.memory = SparseMemory()
+        self.memory[0x50000000:0x50001000] = random.Random(0).randbytes(0x1000)
+
+    def test_read_trace(self):
+        trace = io.StringIO("time,address,value\n# comment\n1 0x50000280 3\n\n2.5, 0x50000281, 0xAB, 1 # one byte\n")
+        self.assertEqual(list(read_trace(trace)), [
+            (1, 0x50000280, b"\x03\x00\x00\x00"),
+            (2.5, 0x50000281, b"\xAB"),
+        ])
+        self.assertEqual(len(list(read_trace(io.StringIO("Timestamp Address Value Size\n1 0x50000280 3 1\n")))), 1)
+
+        with self.assertRaises(ParsingError):
+            list(read_trace(io.StringIO("1 0x50000280 3\n2 0x50000280\n")))
+        with self.assertRaises(ParsingError):
+            list(read_trace(io.StringIO("1 0x50000280 3\n2 0x50000280 0x100 1\n")))
+        # a malformed first write is not mistaken for a header
+        with self.assertRaises(ParsingError):
+            list(read_trace(io.StringIO("1 0x5000028G 3\n2 0x50000280 3\n")))
+
+    def test_apply(self):
+        replay = TraceReplay(self.graph, self.memory)
+        before = replay.state()
+        mux = self.graph.get_clk("mux_main_clk_a")
+
+        select = 0 if self.memory[MAINCLKSELA] & 0b11 else 1
+        changes = replay.apply(MAINCLKSELA, select.to_bytes(4, "little"))
+        self.assertEqual(changes, [(mux, ClockState(None, mux.inputs[select].name, None))])
+        self.assertEqual(replay.apply(MAINCLKSELA, select.to_bytes(4, "little")), [])
+
+        # all other clocks are untouched and the state matches a fresh evaluation
+        after = replay.state()
+        self.assertEqual({ clk for clk in before if before[clk] != after[clk] }, { mux })
+        self.assertEqual(TraceReplay(self.graph, self.memory).state(), after)
+
+        mem_graph = MemoryClockGraph(self.graph, self.memory)
+        self.assertEqual(mem_graph.list_inputs_for_clk(mux), [mux.inputs[select]])
+
+    def test_resolved_state(self):
+        memory = SparseMemory()
+        memory[0x50000000:0x50001000] = bytes(0x1000)
+        replay = TraceReplay(self.graph, memory)
+
+        div = self.graph.get_clk("div_clk_ahb")
+        self.assertEqual(replay.state()[div], ClockState(None, "mux_main_clk_b", 1))
+        self.assertEqual(replay.apply(AHBCLKDIV, b"\x03"), [(div, ClockState(None, "mux_main_clk_b", 4))])
+
+        pll = self.graph.get_clk("clk_pll0")
+        self.assertFalse(replay.state()[pll].enabled)
+        self.assertEqual(replay.apply(PLL0CTRL + 2, b"\x20"), [(pll, ClockState(True, "mux_pll0_clk", None))])
+
+    def test_replay_csv(self):
+        replay = TraceReplay(self.graph, self.memory)
+        initial = replay.state()
+
+        out = io.StringIO()
+        count = replay.replay([(1, MAINCLKSELA, b"\x00"), (2, MAINCLKSELA, b"\x01"), (3, MAINCLKSELA, b"\x01")],
+                              CsvTimeline(out))
+        self.assertEqual(count, 3)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "timestamp,clock,enabled,input,divisor")
+        self.assertEqual(len(lines), 1 + len(initial) + 1 + (self.memory[MAINCLKSELA] & 0b11 != 0))
+        self.assertTrue(all(line.startswith(",") for line in lines[1:1 + len(initial)]))
+        self.assertEqual(lines[-1], "2,mux_main_clk_a,,clk_in,")
+
+    def test_replay_npz(self):
+        selected = self.memory[MAINCLKSELA]
+        replay = TraceReplay(self.graph, self.memory)
+        initial = replay.state()
+
+        with tempfile.TemporaryDirectory() as td:
+            file = Path(td) / "timeline.npz"
+            timeline = NpzTimeline(file)
+            replay.replay([(0.5, MAINCLKSELA, b"\x02"), (1.5, MAINCLKSELA, b"\x03")], timeline)
+            self.assertFalse(file.exists())  # only written on close
+            timeline.close()
+
+            data = np.load(file)
+            self.assertTrue(np.isnan(data["timestamp"][:len(initial)]).all())
+            changes = [0.5, 1.5] if selected & 0b11 != 0b10 else [1.5]
+            self.assertEqual(list(data["timestamp"][len(initial):]), changes)
+            self.assertEqual(data["clocks"][data["clock"][-1]], "mux_main_clk_a")
+            self.assertEqual(data["clocks"][data["input"][-1]], "clk_fro_hf")
+            self.assertEqual(data["enabled"][-1], -1)
+            self.assertTrue(np.isnan(data["divisor"][-1]))